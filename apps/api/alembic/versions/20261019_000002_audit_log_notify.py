@@ -0,0 +1,40 @@
+"""Notify listeners of new audit log entries
+
+Revision ID: 002
+Revises: 001
+Create Date: 2026-10-19 00:00:02
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic
+revision: str = '002'
+down_revision: Union[str, None] = '001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Publish the ID of each new audit log on the audit_events channel.
+    # NOTIFY is transactional, so listeners only hear about committed rows.
+    op.execute("""
+        CREATE OR REPLACE FUNCTION notify_audit_event() RETURNS trigger AS $$
+        BEGIN
+            PERFORM pg_notify('audit_events', NEW.id::text);
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER audit_logs_notify
+        AFTER INSERT ON audit_logs
+        FOR EACH ROW EXECUTE FUNCTION notify_audit_event()
+    """)
+
+
+def downgrade() -> None:
+    op.execute('DROP TRIGGER IF EXISTS audit_logs_notify ON audit_logs')
+    op.execute('DROP FUNCTION IF EXISTS notify_audit_event()')
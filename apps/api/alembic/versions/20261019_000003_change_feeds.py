@@ -0,0 +1,90 @@
+"""Add tombstones and change feed ordering for projects and users
+
+Revision ID: 003
+Revises: 002
+Create Date: 2026-10-19 00:00:03
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic
+revision: str = '003'
+down_revision: Union[str, None] = '002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SYNCED_TABLES = ('projects', 'users')
+
+# ID of the writing transaction as a bigint (Postgres 13+)
+CURRENT_XID = 'pg_current_xact_id()::text::bigint'
+
+
+def upgrade() -> None:
+    # Create tombstones table
+    op.create_table(
+        'tombstones',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('resource_type', sa.String(length=50), nullable=False),
+        sa.Column('resource_id', sa.Integer(), nullable=False),
+        sa.Column('deleted_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('change_xid', sa.BigInteger(), server_default=sa.text(CURRENT_XID), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(
+        'ix_tombstones_resource_type_change_xid_id',
+        'tombstones',
+        ['resource_type', 'change_xid', 'id'],
+        unique=False,
+    )
+    
+    # Record every delete, including ones cascaded by foreign keys
+    op.execute("""
+        CREATE OR REPLACE FUNCTION record_tombstone() RETURNS trigger AS $$
+        BEGIN
+            INSERT INTO tombstones (resource_type, resource_id) VALUES (TG_TABLE_NAME, OLD.id);
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    # Stamp every write with its transaction, which feeds read up to once it has committed
+    op.execute(f"""
+        CREATE OR REPLACE FUNCTION record_change_xid() RETURNS trigger AS $$
+        BEGIN
+            NEW.change_xid := {CURRENT_XID};
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    for table in SYNCED_TABLES:
+        op.add_column(
+            table,
+            sa.Column('change_xid', sa.BigInteger(), server_default=sa.text(CURRENT_XID), nullable=False),
+        )
+        op.create_index(f'ix_{table}_updated_at_id', table, ['updated_at', 'id'], unique=False)
+        op.create_index(f'ix_{table}_change_xid_id', table, ['change_xid', 'id'], unique=False)
+        op.execute(f"""
+            CREATE TRIGGER {table}_tombstone
+            AFTER DELETE ON {table}
+            FOR EACH ROW EXECUTE FUNCTION record_tombstone()
+        """)
+        op.execute(f"""
+            CREATE TRIGGER {table}_change_xid
+            BEFORE INSERT OR UPDATE ON {table}
+            FOR EACH ROW EXECUTE FUNCTION record_change_xid()
+        """)
+
+
+def downgrade() -> None:
+    for table in SYNCED_TABLES:
+        op.execute(f'DROP TRIGGER IF EXISTS {table}_change_xid ON {table}')
+        op.execute(f'DROP TRIGGER IF EXISTS {table}_tombstone ON {table}')
+        op.drop_index(f'ix_{table}_change_xid_id', table_name=table)
+        op.drop_index(f'ix_{table}_updated_at_id', table_name=table)
+        op.drop_column(table, 'change_xid')
+    op.execute('DROP FUNCTION IF EXISTS record_change_xid()')
+    op.execute('DROP FUNCTION IF EXISTS record_tombstone()')
+    op.drop_index('ix_tombstones_resource_type_change_xid_id', table_name='tombstones')
+    op.drop_table('tombstones')
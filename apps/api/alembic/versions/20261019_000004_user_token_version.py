@@ -0,0 +1,37 @@
+"""Add token_version to users for token revocation
+
+Revision ID: 004
+Revises: 003
+Create Date: 2026-10-19 00:00:04
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic
+revision: str = '004'
+down_revision: Union[str, None] = '003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        'users',
+        sa.Column('token_version', sa.Integer(), nullable=False, server_default='0'),
+    )
+    # Keeps the periodic scan for revoked versions proportional to revoked users
+    op.create_index(
+        'ix_users_revoked_token_version',
+        'users',
+        ['id', 'token_version'],
+        unique=False,
+        postgresql_where=sa.text('token_version > 0'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_users_revoked_token_version', table_name='users')
+    op.drop_column('users', 'token_version')
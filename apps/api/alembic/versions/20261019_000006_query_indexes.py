@@ -0,0 +1,82 @@
+"""Match indexes to the filter and sort combinations services query
+
+Revision ID: 006
+Revises: 005
+Create Date: 2026-10-19 00:00:06
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic
+revision: str = '006'
+down_revision: Union[str, None] = '005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (name, table, columns) of composite indexes serving "filter, newest first" lists
+COMPOSITE_INDEXES = [
+    ('ix_audit_logs_user_id_created_at', 'audit_logs', ['user_id', 'created_at']),
+    ('ix_audit_logs_action_created_at', 'audit_logs', ['action', 'created_at']),
+    ('ix_audit_logs_resource_type_created_at', 'audit_logs', ['resource_type', 'created_at']),
+    ('ix_projects_created_at', 'projects', ['created_at']),
+    ('ix_projects_status_created_at', 'projects', ['status', 'created_at']),
+    ('ix_projects_owner_id_created_at', 'projects', ['owner_id', 'created_at']),
+    ('ix_users_created_at', 'users', ['created_at']),
+    ('ix_users_role_created_at', 'users', ['role', 'created_at']),
+]
+
+# Single-column indexes made redundant by a primary key or a composite's leading column
+REDUNDANT_INDEXES = [
+    ('ix_audit_logs_id', 'audit_logs', ['id']),
+    ('ix_audit_logs_user_id', 'audit_logs', ['user_id']),
+    ('ix_audit_logs_action', 'audit_logs', ['action']),
+    ('ix_audit_logs_resource_type', 'audit_logs', ['resource_type']),
+    ('ix_projects_id', 'projects', ['id']),
+    ('ix_projects_owner_id', 'projects', ['owner_id']),
+    ('ix_users_id', 'users', ['id']),
+]
+
+
+def upgrade() -> None:
+    # Build without blocking writes; audit_logs can be large
+    with op.get_context().autocommit_block():
+        for name, table, columns in COMPOSITE_INDEXES:
+            op.create_index(
+                name, table, columns, unique=False,
+                postgresql_concurrently=True, if_not_exists=True,
+            )
+        # revoked_at follows insertion order, so a BRIN index serves the
+        # incremental refresh range scans at a fraction of a B-tree's size
+        op.create_index(
+            'ix_revoked_tokens_revoked_at_brin', 'revoked_tokens', ['revoked_at'],
+            unique=False, postgresql_using='brin',
+            postgresql_concurrently=True, if_not_exists=True,
+        )
+        op.drop_index(
+            'ix_revoked_tokens_revoked_at', table_name='revoked_tokens',
+            postgresql_concurrently=True, if_exists=True,
+        )
+        for name, table, _ in REDUNDANT_INDEXES:
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, columns in REDUNDANT_INDEXES:
+            op.create_index(
+                name, table, columns, unique=False,
+                postgresql_concurrently=True, if_not_exists=True,
+            )
+        op.create_index(
+            'ix_revoked_tokens_revoked_at', 'revoked_tokens', ['revoked_at'],
+            unique=False, postgresql_concurrently=True, if_not_exists=True,
+        )
+        op.drop_index(
+            'ix_revoked_tokens_revoked_at_brin', table_name='revoked_tokens',
+            postgresql_concurrently=True, if_exists=True,
+        )
+        for name, table, _ in COMPOSITE_INDEXES:
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,93 @@
+"""Compact audit_logs: interned user agents, INET addresses, enum resource types
+
+Revision ID: 007
+Revises: 006
+Create Date: 2026-10-19 00:00:07
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic
+revision: str = '007'
+down_revision: Union[str, None] = '006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE TYPE auditresourcetype AS ENUM ('auth', 'user', 'project')")
+    op.create_table(
+        'user_agents',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('digest', sa.Uuid(), nullable=False),
+        sa.Column('value', sa.Text(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('digest'),
+    )
+    # md5(value)::uuid matches user_agent_digest() in the app
+    op.execute("""
+        INSERT INTO user_agents (digest, value)
+        SELECT DISTINCT md5(user_agent)::uuid, user_agent
+        FROM audit_logs
+        WHERE user_agent IS NOT NULL AND user_agent <> ''
+    """)
+
+    # Session-local helpers so every column change below shares one table rewrite
+    op.execute("""
+        CREATE FUNCTION pg_temp.to_inet(value text) RETURNS inet AS $$
+        BEGIN
+            RETURN value::inet;
+        EXCEPTION WHEN others THEN
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql IMMUTABLE
+    """)
+    op.execute("""
+        CREATE FUNCTION pg_temp.user_agent_id(value text) RETURNS integer AS $$
+            SELECT id FROM user_agents WHERE digest = md5(value)::uuid
+        $$ LANGUAGE sql STABLE
+    """)
+
+    # Rows are only ever appended, so pack heap and append-ordered index pages
+    # full, and move larger details documents out of line to keep scans dense.
+    # The rewrite below rebuilds every index with these settings.
+    op.execute("ALTER TABLE audit_logs SET (fillfactor = 100, toast_tuple_target = 256)")
+    op.execute("ALTER INDEX audit_logs_pkey SET (fillfactor = 100)")
+    op.execute("ALTER INDEX ix_audit_logs_created_at SET (fillfactor = 100)")
+    # Fails on resource types other than the enum's, rather than dropping them
+    op.execute("""
+        ALTER TABLE audit_logs
+            ALTER COLUMN ip_address TYPE inet USING pg_temp.to_inet(ip_address),
+            ALTER COLUMN resource_type TYPE auditresourcetype
+                USING resource_type::auditresourcetype,
+            ALTER COLUMN user_agent TYPE integer USING pg_temp.user_agent_id(user_agent)
+    """)
+    op.alter_column('audit_logs', 'user_agent', new_column_name='user_agent_id')
+    op.create_foreign_key(
+        'audit_logs_user_agent_id_fkey', 'audit_logs', 'user_agents',
+        ['user_agent_id'], ['id'],
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint('audit_logs_user_agent_id_fkey', 'audit_logs', type_='foreignkey')
+    op.alter_column('audit_logs', 'user_agent_id', new_column_name='user_agent')
+    op.execute("""
+        CREATE FUNCTION pg_temp.user_agent_value(agent_id integer) RETURNS text AS $$
+            SELECT value FROM user_agents WHERE id = agent_id
+        $$ LANGUAGE sql STABLE
+    """)
+    op.execute("ALTER INDEX ix_audit_logs_created_at RESET (fillfactor)")
+    op.execute("ALTER INDEX audit_logs_pkey RESET (fillfactor)")
+    op.execute("ALTER TABLE audit_logs RESET (fillfactor, toast_tuple_target)")
+    op.execute("""
+        ALTER TABLE audit_logs
+            ALTER COLUMN ip_address TYPE varchar(45) USING host(ip_address),
+            ALTER COLUMN resource_type TYPE varchar(50) USING resource_type::text,
+            ALTER COLUMN user_agent TYPE text USING pg_temp.user_agent_value(user_agent)
+    """)
+    op.drop_table('user_agents')
+    op.execute("DROP TYPE auditresourcetype")
@@ -0,0 +1,49 @@
+"""Add audit_archive_files manifest for archived audit logs
+
+Revision ID: 008
+Revises: 007
+Create Date: 2026-10-19 00:00:08
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic
+revision: str = '008'
+down_revision: Union[str, None] = '007'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'audit_archive_files',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('path', sa.String(length=512), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('first_id', sa.Integer(), nullable=False),
+        sa.Column('last_id', sa.Integer(), nullable=False),
+        sa.Column('row_count', sa.Integer(), nullable=False),
+        sa.Column('size_bytes', sa.BigInteger(), nullable=False),
+        sa.Column('min_created_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('max_created_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('actions', postgresql.ARRAY(sa.String(length=32)), nullable=False),
+        sa.Column('resource_types', postgresql.ARRAY(sa.String(length=16)), nullable=False),
+        sa.Column('archived_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('path'),
+    )
+    op.create_index(
+        'ix_audit_archive_files_created_range',
+        'audit_archive_files',
+        ['min_created_at', 'max_created_at'],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_audit_archive_files_created_range', table_name='audit_archive_files')
+    op.drop_table('audit_archive_files')
@@ -0,0 +1,56 @@
+"""Add user_deletions for background user deletion
+
+Revision ID: 009
+Revises: 008
+Create Date: 2026-10-19 00:00:09
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic
+revision: str = '009'
+down_revision: Union[str, None] = '008'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'user_deletions',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('email', sa.String(length=255), nullable=False),
+        sa.Column('requested_by_id', sa.Integer(), nullable=True),
+        sa.Column('reassign_to_id', sa.Integer(), nullable=True),
+        sa.Column(
+            'status',
+            sa.Enum('pending', 'running', 'completed', 'failed', name='userdeletionstatus'),
+            nullable=False,
+        ),
+        sa.Column('projects_total', sa.Integer(), nullable=True),
+        sa.Column('projects_done', sa.Integer(), nullable=False),
+        sa.Column('audit_logs_total', sa.Integer(), nullable=True),
+        sa.Column('audit_logs_done', sa.Integer(), nullable=False),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('completed_at', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index(
+        'ix_user_deletions_unfinished_user_id',
+        'user_deletions',
+        ['user_id'],
+        unique=True,
+        postgresql_where=sa.text("status IN ('pending', 'running')"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_user_deletions_unfinished_user_id', table_name='user_deletions')
+    op.drop_table('user_deletions')
+    op.execute('DROP TYPE userdeletionstatus')
@@ -1,24 +1,41 @@
 """API dependencies for authentication and authorization."""
+import secrets
+from collections.abc import Iterable
 from typing import Annotated
 
-from fastapi import Depends, HTTPException, Request, status
+from fastapi import Depends, HTTPException, Query, Request, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from pydantic import ValidationError
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.config import settings
 from app.core.database import get_db
+from app.core.metrics import metrics
+from app.core.rate_limit import Limit, rate_limiter, retry_after
 from app.core.security import decode_token
 from app.models.user import User, UserRole
+from app.schemas.auth import TokenPrincipal
+from app.schemas.common import SparseFieldset
+from app.services.change_feed import ChangeCursor, decode_change_token
+from app.services.token_revocations import token_revocations
+from app.services.token_versions import token_versions
 from app.services.user_service import UserService
 
 # Security scheme
 security = HTTPBearer()
+optional_security = HTTPBearer(auto_error=False)
 
 
-async def get_current_user(
+async def get_token_principal(
+    request: Request,
     credentials: Annotated[HTTPAuthorizationCredentials, Depends(security)],
-    db: Annotated[AsyncSession, Depends(get_db)],
-) -> User:
-    """Get the current authenticated user from JWT token."""
+) -> TokenPrincipal:
+    """Get the caller's identity and role from the access token, without a DB query."""
+    # Batch sub-requests reuse the principal authenticated by the batch itself
+    batch_principal = getattr(request.state, "batch_principal", None)
+    if batch_principal is not None:
+        return batch_principal
+    
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -32,15 +49,36 @@ async def get_current_user(
     if payload.get("type") != "access":
         raise credentials_exception
     
-    user_id = payload.get("sub")
-    if user_id is None:
+    try:
+        principal = TokenPrincipal.from_claims(payload)
+    except (KeyError, ValidationError):
+        raise credentials_exception
+    
+    # Role changes, deactivation and deletion revoke previously issued tokens
+    if not token_versions.is_current(principal.id, principal.token_version):
         raise credentials_exception
     
+    # Logged out tokens; in memory unless the Bloom filter reports a hit
+    if await token_revocations.is_revoked(principal.jti):
+        raise credentials_exception
+    
+    return principal
+
+
+async def get_current_user(
+    principal: Annotated[TokenPrincipal, Depends(get_token_principal)],
+    db: Annotated[AsyncSession, Depends(get_db)],
+) -> User:
+    """Get the current authenticated user's record, for endpoints needing more than the claims."""
     user_service = UserService(db)
-    user = await user_service.get_by_id(int(user_id))
+    user = await user_service.get_by_id(principal.id)
     
     if user is None:
-        raise credentials_exception
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
     
     if not user.is_active:
         raise HTTPException(
@@ -59,10 +97,10 @@ async def get_current_active_user(
 
 
 def require_role(*allowed_roles: UserRole):
-    """Dependency factory for role-based access control."""
+    """Dependency factory for role-based access control, decided from token claims."""
     async def role_checker(
-        current_user: Annotated[User, Depends(get_current_user)],
-    ) -> User:
+        current_user: Annotated[TokenPrincipal, Depends(get_token_principal)],
+    ) -> TokenPrincipal:
         if current_user.role not in allowed_roles:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
@@ -72,12 +110,115 @@ def require_role(*allowed_roles: UserRole):
     return role_checker
 
 
+async def require_metrics_access(
+    request: Request,
+    credentials: Annotated[HTTPAuthorizationCredentials | None, Depends(optional_security)],
+) -> None:
+    """Allow the metrics scrape token or an admin's access token."""
+    if credentials is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    if settings.METRICS_TOKEN and secrets.compare_digest(
+        credentials.credentials.encode(), settings.METRICS_TOKEN.encode()
+    ):
+        return
+    principal = await get_token_principal(request, credentials)
+    if principal.role != UserRole.admin:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Access denied. Required roles: ['admin']",
+        )
+
+
 # Common role dependencies
 AdminOnly = Depends(require_role(UserRole.admin))
 AdminOrManager = Depends(require_role(UserRole.admin, UserRole.manager))
 AnyRole = Depends(require_role(UserRole.admin, UserRole.manager, UserRole.viewer))
 
 
+def sparse_fieldset(allowed: Iterable[str], expandable: Iterable[str] = ()):
+    """Dependency factory parsing the ``fields`` and ``expand`` query parameters."""
+    allowed = set(allowed)
+    expandable = set(expandable)
+    
+    def split(value: str | None) -> list[str]:
+        return [part.strip() for part in value.split(",") if part.strip()] if value else []
+    
+    async def parser(
+        fields: str | None = Query(None, description="Comma-separated item fields to return"),
+        expand: str | None = Query(None, description="Comma-separated related resources to include"),
+    ) -> SparseFieldset | None:
+        if fields is None and expand is None:
+            return None
+        
+        requested = split(fields) or sorted(allowed)
+        unknown = set(requested) - allowed
+        if unknown:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unknown fields: {sorted(unknown)}. Allowed: {sorted(allowed)}",
+            )
+        expanded = split(expand)
+        unknown = set(expanded) - expandable
+        if unknown:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Cannot expand: {sorted(unknown)}. Allowed: {sorted(expandable)}",
+            )
+        
+        # Items are always identifiable
+        if "id" not in requested:
+            requested.insert(0, "id")
+        return SparseFieldset(fields=list(dict.fromkeys(requested)), expand=sorted(set(expanded)))
+    return parser
+
+
+def sort_field(allowed: Iterable[str], default: str = "created_at"):
+    """Dependency factory validating ``sort_by`` against a whitelist of columns."""
+    allowed = sorted(allowed)
+    
+    async def parser(
+        sort_by: str = Query(default, description=f"Column to sort by: {', '.join(allowed)}"),
+    ) -> str:
+        if sort_by not in allowed:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Cannot sort by {sort_by!r}. Allowed: {allowed}",
+            )
+        return sort_by
+    return parser
+
+
+async def change_cursor(
+    since: str | None = Query(None, description="Change token from a previous response"),
+) -> ChangeCursor | None:
+    """Parse the ``since`` change token; omit it to start a full sync."""
+    if since is None:
+        return None
+    cursor = decode_change_token(since)
+    if cursor is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid change token",
+        )
+    return cursor
+
+
+async def enforce_rate_limit(key: str, cost: float, limit: Limit, detail: str) -> None:
+    """Spend from a rate limit bucket, raising 429 if it is exhausted."""
+    wait = await rate_limiter.take(key, cost, limit)
+    if wait > 0:
+        metrics.increment("rate_limit.rejected")
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=detail,
+            headers={"Retry-After": retry_after(wait)},
+        )
+
+
 def get_request_info(request: Request) -> dict:
     """Extract request metadata for audit logging."""
     return {
@@ -89,5 +230,7 @@ def get_request_info(request: Request) -> dict:
 
 # Type aliases for cleaner endpoint signatures
 CurrentUser = Annotated[User, Depends(get_current_user)]
+Principal = Annotated[TokenPrincipal, Depends(get_token_principal)]
 DbSession = Annotated[AsyncSession, Depends(get_db)]
 RequestInfo = Annotated[dict, Depends(get_request_info)]
+SinceCursor = Annotated[ChangeCursor | None, Depends(change_cursor)]
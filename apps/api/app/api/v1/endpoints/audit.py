@@ -2,34 +2,99 @@
 from datetime import datetime
 from math import ceil
 
-from fastapi import APIRouter, Query
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
 
-from app.api.deps import AdminOnly, DbSession
-from app.models.audit_log import AuditAction
-from app.models.user import User
+from app.api.deps import AdminOnly, DbSession, sparse_fieldset
+from app.core.coalesce import coalesce
+from app.core.config import settings
+from app.core.responses import FastJSONRoute
+from app.models.audit_log import AuditAction, AuditResourceType
+from app.schemas.auth import TokenPrincipal
 from app.schemas.audit_log import AuditLogListResponse, AuditLogResponse
+from app.schemas.common import SparseFieldset, SparseListResponse
+from app.schemas.user import UserResponse
 from app.services.audit_service import AuditService
+from app.services.audit_stream import audit_stream
+from app.services.user_service import UserService
 
-router = APIRouter(prefix="/audit-logs", tags=["Audit Logs"])
+router = APIRouter(prefix="/audit-logs", tags=["Audit Logs"], route_class=FastJSONRoute)
 
+# Fields selectable with ?fields=; the acting user is only available through ?expand=user
+AUDIT_LOG_FIELDS = [name for name in AuditLogResponse.model_fields if name != "user_email"]
 
-@router.get("", response_model=AuditLogListResponse)
+
+@router.get("", response_model=AuditLogListResponse | SparseListResponse)
+@coalesce()
 async def list_audit_logs(
     db: DbSession,
-    current_user: User = AdminOnly,
+    current_user: TokenPrincipal = AdminOnly,
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=100),
     user_id: int | None = Query(None),
     action: AuditAction | None = Query(None),
-    resource_type: str | None = Query(None),
+    resource_type: AuditResourceType | None = Query(None),
     start_date: datetime | None = Query(None),
     end_date: datetime | None = Query(None),
     search: str | None = Query(None),
+    include_archived: bool = Query(False, description="Also search archived audit logs"),
+    sparse: SparseFieldset | None = Depends(sparse_fieldset(AUDIT_LOG_FIELDS, ["user"])),
 ):
-    """List audit logs with pagination and filters (admin only)."""
+    """List audit logs with pagination and filters (admin only).
+    
+    With ``fields`` and/or ``expand=user``, only the requested columns are
+    selected and acting users are returned once each in ``included["users"]``.
+    ``include_archived`` merges in logs moved to archive files, reading
+    them newest first only until the page is certain; with filters, the
+    archived part of the total is then estimated. Both sources are read up
+    to the requested page, so its depth is capped; narrow the date range to
+    reach older logs. Archived logs of users deleted since are returned
+    with ``user_id`` unset, as deletion leaves those in the table.
+    """
+    if include_archived and page * page_size > settings.AUDIT_ARCHIVE_MAX_LIST_ROWS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=(
+                f"Pages past row {settings.AUDIT_ARCHIVE_MAX_LIST_ROWS} are not available "
+                "with include_archived; narrow the date range instead"
+            ),
+        )
     audit_service = AuditService(db)
     
-    logs, total = await audit_service.get_list(
+    if sparse is not None:
+        expand_user = "user" in sparse.expand
+        columns = sparse.fields
+        if expand_user and "user_id" not in columns:
+            columns = [*columns, "user_id"]
+        rows, total, estimated = await audit_service.get_partial_list(
+            columns,
+            page=page,
+            page_size=page_size,
+            user_id=user_id,
+            action=action,
+            resource_type=resource_type,
+            start_date=start_date,
+            end_date=end_date,
+            search=search,
+            include_archived=include_archived,
+        )
+        included = {}
+        if expand_user:
+            users = await UserService(db).get_many(
+                row["user_id"] for row in rows if row["user_id"] is not None
+            )
+            included["users"] = {u.id: UserResponse.model_validate(u) for u in users}
+        return SparseListResponse(
+            items=rows,
+            included=included,
+            total=total,
+            page=page,
+            page_size=page_size,
+            pages=ceil(total / page_size) if total > 0 else 1,
+            total_estimated=estimated,
+        )
+    
+    logs, total, estimated = await audit_service.get_list(
         page=page,
         page_size=page_size,
         user_id=user_id,
@@ -38,6 +103,7 @@ async def list_audit_logs(
         start_date=start_date,
         end_date=end_date,
         search=search,
+        include_archived=include_archived,
     )
     
     items = []
@@ -52,4 +118,32 @@ async def list_audit_logs(
         page=page,
         page_size=page_size,
         pages=ceil(total / page_size) if total > 0 else 1,
+        total_estimated=estimated,
+    )
+
+
+@router.get("/stream")
+async def stream_audit_logs(
+    current_user: TokenPrincipal = AdminOnly,
+    user_id: int | None = Query(None),
+    action: AuditAction | None = Query(None),
+    resource_type: AuditResourceType | None = Query(None),
+    after_id: int | None = Query(None, description="Replay events after this audit log ID"),
+    last_event_id: int | None = Header(None),
+):
+    """Stream new audit logs as Server-Sent Events (admin only).
+    
+    Reconnecting clients resume from ``Last-Event-ID`` (or ``after_id``) and
+    get the missed events replayed first. Clients that fall too far behind
+    are disconnected and can resume the same way.
+    """
+    return StreamingResponse(
+        audit_stream.stream(
+            after_id=last_event_id if last_event_id is not None else after_id,
+            user_id=user_id,
+            action=action,
+            resource_type=resource_type,
+        ),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
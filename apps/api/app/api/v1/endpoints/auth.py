@@ -1,15 +1,34 @@
 """Authentication endpoints."""
 from fastapi import APIRouter, HTTPException, status
+from pydantic import ValidationError
 
-from app.api.deps import CurrentUser, DbSession, RequestInfo
+from app.api.deps import CurrentUser, DbSession, Principal, RequestInfo, enforce_rate_limit
+from app.core.config import settings
+from app.core.http_cache import REVALIDATE, conditional, user_etag
+from app.core.rate_limit import Limit
+from app.core.responses import FastJSONRoute
 from app.core.security import create_access_token, create_refresh_token, decode_token
-from app.models.audit_log import AuditAction
-from app.schemas.auth import AuthResponse, LoginRequest, RefreshTokenRequest, TokenResponse
+from app.models.audit_log import AuditAction, AuditResourceType
+from app.schemas.auth import (
+    AuthResponse,
+    LoginRequest,
+    LogoutRequest,
+    RefreshTokenRequest,
+    TokenPrincipal,
+    TokenResponse,
+)
+from app.models.user import User
 from app.schemas.user import UserResponse
 from app.services.audit_service import AuditService
+from app.services.token_revocations import token_revocations
+from app.services.token_versions import token_versions
 from app.services.user_service import UserService
 
-router = APIRouter(prefix="/auth", tags=["Authentication"])
+router = APIRouter(prefix="/auth", tags=["Authentication"], route_class=FastJSONRoute)
+
+LOGIN_ACCOUNT_LIMIT = Limit(
+    settings.RATE_LIMIT_LOGIN_ACCOUNT_BURST, settings.RATE_LIMIT_LOGIN_ACCOUNT_PER_SECOND
+)
 
 
 @router.post("/login", response_model=AuthResponse)
@@ -19,6 +38,14 @@ async def login(
     request_info: RequestInfo,
 ):
     """Authenticate user and return tokens."""
+    # Per-account throttle against credential stuffing, before any hashing or DB work
+    await enforce_rate_limit(
+        f"login:{data.email.lower()}",
+        1,
+        LOGIN_ACCOUNT_LIMIT,
+        "Too many login attempts, try again later",
+    )
+    
     user_service = UserService(db)
     audit_service = AuditService(db)
     
@@ -28,7 +55,7 @@ async def login(
         # Log failed login attempt
         await audit_service.log(
             action=AuditAction.login_failed,
-            resource_type="auth",
+            resource_type=AuditResourceType.auth,
             details={"email": data.email},
             **request_info,
         )
@@ -37,26 +64,23 @@ async def login(
             detail="Incorrect email or password",
         )
     
-    # Update last login
-    await user_service.update_last_login(user)
+    # Buffer the last login; it is written back in bulk
+    last_login = await user_service.update_last_login(user)
     
     # Log successful login
     await audit_service.log(
         action=AuditAction.login,
-        resource_type="auth",
+        resource_type=AuditResourceType.auth,
         user_id=user.id,
         **request_info,
     )
     
-    # Refresh user to get updated fields (last_login, updated_at)
-    await db.refresh(user)
-    
-    # Create tokens
-    access_token = create_access_token(user.id)
-    refresh_token = create_refresh_token(user.id)
+    # Create tokens carrying the claims authorization is decided from
+    access_token = create_access_token(user.id, user.role.value, user.token_version)
+    refresh_token = create_refresh_token(user.id, user.role.value, user.token_version)
     
     return AuthResponse(
-        user=UserResponse.model_validate(user),
+        user=UserResponse.model_validate(user).model_copy(update={"last_login": last_login}),
         tokens=TokenResponse(
             access_token=access_token,
             refresh_token=refresh_token,
@@ -65,7 +89,7 @@ async def login(
 
 
 @router.post("/refresh", response_model=TokenResponse)
-async def refresh_token(data: RefreshTokenRequest, db: DbSession):
+async def refresh_token(data: RefreshTokenRequest):
     """Refresh access token using refresh token."""
     payload = decode_token(data.refresh_token)
     
@@ -75,26 +99,31 @@ async def refresh_token(data: RefreshTokenRequest, db: DbSession):
             detail="Invalid refresh token",
         )
     
-    user_id = payload.get("sub")
-    if not user_id:
+    try:
+        principal = TokenPrincipal.from_claims(payload)
+    except (KeyError, ValidationError):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid refresh token",
         )
     
-    # Verify user still exists and is active
-    user_service = UserService(db)
-    user = await user_service.get_by_id(int(user_id))
-    
-    if not user or not user.is_active:
+    # Role changes, deactivation and deletion bump the version, so the claims are still accurate
+    if not token_versions.is_current(principal.id, principal.token_version):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="User not found or inactive",
         )
     
+    if await token_revocations.is_revoked(principal.jti):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid refresh token",
+        )
+    
     # Create new tokens
-    access_token = create_access_token(user.id)
-    new_refresh_token = create_refresh_token(user.id)
+    role = principal.role.value
+    access_token = create_access_token(principal.id, role, principal.token_version)
+    new_refresh_token = create_refresh_token(principal.id, role, principal.token_version)
     
     return TokenResponse(
         access_token=access_token,
@@ -104,16 +133,32 @@ async def refresh_token(data: RefreshTokenRequest, db: DbSession):
 
 @router.post("/logout")
 async def logout(
-    current_user: CurrentUser,
+    current_user: Principal,
     db: DbSession,
     request_info: RequestInfo,
+    data: LogoutRequest | None = None,
 ):
-    """Logout user (logs the action for audit)."""
+    """Logout user, revoking the access token and the refresh token if given."""
+    await token_revocations.revoke(db, current_user.jti, current_user.expires_at)
+    
+    if data is not None:
+        payload = decode_token(data.refresh_token)
+        # Only the caller's own refresh token can be revoked here
+        if payload is not None and payload.get("type") == "refresh":
+            try:
+                refresh_principal = TokenPrincipal.from_claims(payload)
+            except (KeyError, ValidationError):
+                refresh_principal = None
+            if refresh_principal is not None and refresh_principal.id == current_user.id:
+                await token_revocations.revoke(
+                    db, refresh_principal.jti, refresh_principal.expires_at
+                )
+    
     audit_service = AuditService(db)
     
     await audit_service.log(
         action=AuditAction.logout,
-        resource_type="auth",
+        resource_type=AuditResourceType.auth,
         user_id=current_user.id,
         **request_info,
     )
@@ -121,7 +166,13 @@ async def logout(
     return {"message": "Successfully logged out"}
 
 
+async def _me_etag(current_user: User, **_) -> str:
+    """ETag for the current user's profile."""
+    return user_etag(current_user)
+
+
 @router.get("/me", response_model=UserResponse)
+@conditional(_me_etag, cache_control=REVALIDATE)
 async def get_current_user_info(current_user: CurrentUser):
     """Get current user information."""
     return UserResponse.model_validate(current_user)
@@ -0,0 +1,152 @@
+"""Batch endpoint multiplexing GET sub-requests over one authentication."""
+import asyncio
+import json
+from urllib.parse import urlsplit
+
+import msgpack
+from fastapi import APIRouter, HTTPException, Request, status
+from starlette.types import Message, Scope
+
+from app.api.deps import Principal
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.core.responses import MSGPACK_MEDIA_TYPE, FastJSONRoute
+from app.schemas.auth import TokenPrincipal
+from app.schemas.batch import BatchRequest, BatchResponse, BatchSubRequest, BatchSubResponse
+
+logger = get_logger(__name__)
+
+router = APIRouter(prefix="/batch", tags=["Batch"], route_class=FastJSONRoute)
+
+# Request headers passed through to sub-requests
+FORWARDED_HEADERS = (b"authorization", b"user-agent", b"x-request-id")
+
+
+def _sub_scope(request: Request, principal: TokenPrincipal, path: str, query: str) -> Scope:
+    """Build the ASGI scope of a sub-request from the batch request."""
+    parent = request.scope
+    headers = [(name, value) for name, value in parent["headers"] if name in FORWARDED_HEADERS]
+    # Sub-responses are decoded here, so take the cheaper encoding
+    headers.append((b"accept", MSGPACK_MEDIA_TYPE.encode()))
+    return {
+        "type": "http",
+        "asgi": parent["asgi"],
+        "http_version": parent["http_version"],
+        "method": "GET",
+        "scheme": parent["scheme"],
+        "server": parent.get("server"),
+        "client": parent.get("client"),
+        "root_path": parent.get("root_path", ""),
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": query.encode(),
+        "headers": headers,
+        "app": parent["app"],
+        "state": {**parent.get("state", {}), "batch_principal": principal},
+    }
+
+
+async def _dispatch(request: Request, principal: TokenPrincipal, sub: BatchSubRequest) -> BatchSubResponse:
+    """Run one sub-request through the app's middleware and router, capturing its response."""
+    url = urlsplit(sub.path)
+    started: Message = {}
+    chunks: list[bytes] = []
+    body_sent = False
+    finished = asyncio.Event()
+
+    async def receive() -> Message:
+        nonlocal body_sent
+        if not body_sent:
+            body_sent = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        # As from a server: nothing more arrives until the client goes away
+        await finished.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message: Message) -> None:
+        if message["type"] == "http.response.start":
+            started.update(message)
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body", False):
+                finished.set()
+
+    try:
+        # The full stack, so each sub-request is rate limited, admitted and
+        # given a deadline like any other request
+        await request.app.middleware_stack(_sub_scope(request, principal, url.path, url.query), receive, send)
+    except Exception as exc:
+        logger.exception("batch_subrequest_failed", path=sub.path, error=str(exc))
+        return BatchSubResponse(
+            id=sub.id,
+            path=sub.path,
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            body={"detail": "An internal server error occurred"},
+        )
+
+    headers = {name.decode().lower(): value.decode() for name, value in started.get("headers", [])}
+    raw = b"".join(chunks)
+    try:
+        if not raw:
+            body = None
+        elif headers.get("content-type", "").startswith(MSGPACK_MEDIA_TYPE):
+            body = msgpack.unpackb(raw, timestamp=3, strict_map_key=False)
+        else:
+            # Errors and non-negotiating routes answer in JSON
+            body = json.loads(raw)
+    except ValueError:
+        logger.warning(
+            "batch_subresponse_undecodable", path=sub.path, content_type=headers.get("content-type")
+        )
+        return BatchSubResponse(
+            id=sub.id,
+            path=sub.path,
+            status=status.HTTP_502_BAD_GATEWAY,
+            body={"detail": "Sub-response is neither JSON nor MessagePack"},
+        )
+
+    return BatchSubResponse(
+        id=sub.id,
+        path=sub.path,
+        status=started.get("status", status.HTTP_500_INTERNAL_SERVER_ERROR),
+        etag=headers.get("etag"),
+        body=body,
+    )
+
+
+@router.post("", response_model=BatchResponse)
+async def run_batch(
+    data: BatchRequest,
+    request: Request,
+    current_user: Principal,
+):
+    """Run GET sub-requests concurrently under the caller's authentication.
+    
+    Sub-requests reuse the batch's verified token claims, and at most
+    ``BATCH_MAX_CONCURRENCY`` of them run at a time. Each one is charged
+    against the rate limit, may be shed by admission control and runs
+    within its own deadline and what is left of the batch's. Each result
+    carries the sub-request's status, ETag and body. Streaming routes
+    (``BATCH_UNSUPPORTED_PATHS``) are refused.
+    """
+    batch_path = f"{settings.API_V1_PREFIX}{router.prefix}"
+    for sub in data.requests:
+        path = urlsplit(sub.path).path
+        if (
+            not path.startswith(f"{settings.API_V1_PREFIX}/")
+            or path.rstrip("/") == batch_path
+            or path.rstrip("/") in settings.BATCH_UNSUPPORTED_PATHS
+        ):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unsupported batch path: {sub.path}",
+            )
+    
+    semaphore = asyncio.Semaphore(settings.BATCH_MAX_CONCURRENCY)
+    
+    async def run(sub: BatchSubRequest) -> BatchSubResponse:
+        async with semaphore:
+            return await _dispatch(request, current_user, sub)
+    
+    responses = await asyncio.gather(*(run(sub) for sub in data.requests))
+    return BatchResponse(responses=responses)
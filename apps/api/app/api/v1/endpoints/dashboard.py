@@ -1,19 +1,22 @@
 """Dashboard endpoints for KPIs and stats."""
 from fastapi import APIRouter
 
-from app.api.deps import CurrentUser, DbSession
+from app.api.deps import DbSession, Principal
+from app.core.coalesce import coalesce
+from app.core.responses import FastJSONRoute
 from app.schemas.common import StatsResponse
 from app.services.audit_service import AuditService
 from app.services.project_service import ProjectService
 from app.services.user_service import UserService
 
-router = APIRouter(prefix="/dashboard", tags=["Dashboard"])
+router = APIRouter(prefix="/dashboard", tags=["Dashboard"], route_class=FastJSONRoute)
 
 
 @router.get("/stats", response_model=StatsResponse)
+@coalesce()
 async def get_dashboard_stats(
     db: DbSession,
-    current_user: CurrentUser,
+    current_user: Principal,
 ):
     """Get dashboard statistics."""
     user_service = UserService(db)
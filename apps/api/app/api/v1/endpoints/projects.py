@@ -1,41 +1,155 @@
 """Project management endpoints."""
 from math import ceil
 
-from fastapi import APIRouter, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.api.deps import AdminOrManager, CurrentUser, DbSession, RequestInfo
-from app.models.audit_log import AuditAction
+from app.api.deps import (
+    AdminOrManager,
+    DbSession,
+    Principal,
+    RequestInfo,
+    SinceCursor,
+    sort_field,
+    sparse_fieldset,
+)
+from app.core.coalesce import coalesce
+from app.core.config import settings
+from app.core.http_cache import (
+    REVALIDATE,
+    REVALIDATE_RESOURCE,
+    conditional,
+    entity_etag,
+    make_etag,
+    user_etag,
+)
+from app.core.responses import FastJSONRoute
+from app.models.audit_log import AuditAction, AuditResourceType
 from app.models.project import ProjectStatus
-from app.models.user import User, UserRole
-from app.schemas.common import MessageResponse
+from app.models.user import UserRole
+from app.schemas.auth import TokenPrincipal
+from app.schemas.common import MessageResponse, SparseFieldset, SparseListResponse
 from app.schemas.project import (
+    ProjectBulkDelete,
+    ProjectBulkResponse,
+    ProjectBulkResult,
+    ProjectBulkUpdate,
+    ProjectChangesResponse,
     ProjectCreate,
     ProjectListResponse,
     ProjectResponse,
     ProjectUpdate,
 )
 from app.services.audit_service import AuditService
-from app.services.project_service import ProjectService
+from app.schemas.user import UserResponse
+from app.services.change_feed import encode_change_token
+from app.services.project_service import PROJECT_SORT_COLUMNS, BulkResult, ProjectService
+from app.services.user_service import UserService
 
-router = APIRouter(prefix="/projects", tags=["Projects"])
+router = APIRouter(prefix="/projects", tags=["Projects"], route_class=FastJSONRoute)
 
+# Fields selectable with ?fields=; the owner is only available through ?expand=owner
+PROJECT_FIELDS = [name for name in ProjectResponse.model_fields if name != "owner"]
 
-@router.get("", response_model=ProjectListResponse)
+
+async def _list_etag(
+    db: AsyncSession,
+    page: int,
+    page_size: int,
+    sort_by: str,
+    sort_order: str,
+    search: str | None,
+    status: ProjectStatus | None,
+    owner_id: int | None,
+    sparse: SparseFieldset | None,
+    **_,
+) -> str | None:
+    """ETag for a project list page, answered from table versions."""
+    tag = await ProjectService(db).list_etag(
+        page=page,
+        page_size=page_size,
+        sort_by=sort_by,
+        sort_order=sort_order,
+        search=search,
+        status=status,
+        owner_id=owner_id,
+    )
+    return make_etag(tag, sparse) if tag and sparse else tag
+
+
+async def _check_owner(db: AsyncSession, owner_id: int) -> None:
+    """Reject a new owner that does not exist or is being deleted."""
+    user_service = UserService(db)
+    if not await user_service.get_by_id(owner_id):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Owner not found",
+        )
+    if await user_service.get_unfinished_deletion(owner_id):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Owner is being deleted",
+        )
+
+
+async def _project_etag(project_id: int, db: AsyncSession, **_) -> str | None:
+    """ETag for a project and its embedded owner, answered from the entity cache."""
+    project = await ProjectService(db).get_by_id(project_id)
+    return make_etag(entity_etag(project), user_etag(project.owner)) if project else None
+
+
+@router.get("", response_model=ProjectListResponse | SparseListResponse)
+@conditional(_list_etag, cache_control=REVALIDATE)
+@coalesce()
 async def list_projects(
     db: DbSession,
-    current_user: CurrentUser,
+    current_user: Principal,
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=100),
-    sort_by: str = Query("created_at"),
+    sort_by: str = Depends(sort_field(PROJECT_SORT_COLUMNS)),
     sort_order: str = Query("desc", pattern="^(asc|desc)$"),
     search: str | None = Query(None),
     status: ProjectStatus | None = Query(None),
     owner_id: int | None = Query(None),
+    sparse: SparseFieldset | None = Depends(sparse_fieldset(PROJECT_FIELDS, ["owner"])),
 ):
-    """List all projects with pagination and filters."""
+    """List all projects with pagination and filters.
+    
+    With ``fields`` and/or ``expand=owner``, only the requested columns are
+    selected and owners are returned once each in ``included["users"]``.
+    """
     project_service = ProjectService(db)
     
-    projects, total = await project_service.get_list(
+    if sparse is not None:
+        expand_owner = "owner" in sparse.expand
+        columns = sparse.fields
+        if expand_owner and "owner_id" not in columns:
+            columns = [*columns, "owner_id"]
+        rows, total, estimated = await project_service.get_partial_list(
+            columns,
+            page=page,
+            page_size=page_size,
+            sort_by=sort_by,
+            sort_order=sort_order,
+            search=search,
+            status=status,
+            owner_id=owner_id,
+        )
+        included = {}
+        if expand_owner:
+            owners = await UserService(db).get_many(row["owner_id"] for row in rows)
+            included["users"] = {u.id: UserResponse.model_validate(u) for u in owners}
+        return SparseListResponse(
+            items=rows,
+            included=included,
+            total=total,
+            page=page,
+            page_size=page_size,
+            pages=ceil(total / page_size) if total > 0 else 1,
+            total_estimated=estimated,
+        )
+    
+    projects, total, estimated = await project_service.get_list(
         page=page,
         page_size=page_size,
         sort_by=sort_by,
@@ -51,20 +165,126 @@ async def list_projects(
         page=page,
         page_size=page_size,
         pages=ceil(total / page_size) if total > 0 else 1,
+        total_estimated=estimated,
+    )
+
+
+@router.get("/changes", response_model=ProjectChangesResponse)
+async def list_project_changes(
+    db: DbSession,
+    current_user: Principal,
+    since: SinceCursor,
+    limit: int = Query(100, ge=1, le=settings.CHANGE_FEED_MAX_LIMIT),
+):
+    """List projects changed and IDs deleted since a change token.
+    
+    Call without ``since`` to start a full sync, then pass ``next_token``
+    back until ``has_more`` is false. Embedded owners are kept in sync
+    through ``/users/changes``.
+    """
+    changes = await ProjectService(db).get_changes(since, limit)
+    return ProjectChangesResponse(
+        items=[ProjectResponse.model_validate(p) for p in changes.changed],
+        deleted=changes.deleted,
+        next_token=encode_change_token(changes.cursor),
+        has_more=changes.has_more,
+    )
+
+
+def _bulk_response(ids: list[int], result: BulkResult, done: str) -> ProjectBulkResponse:
+    """Report the outcome for every requested ID, in request order."""
+    outcomes = {row.id: done for row in result.rows}
+    outcomes.update(dict.fromkeys(result.not_found, "not_found"))
+    outcomes.update(dict.fromkeys(result.forbidden, "forbidden"))
+    return ProjectBulkResponse(
+        results=[ProjectBulkResult(id=project_id, status=outcomes[project_id]) for project_id in ids],
+        succeeded=len(result.rows),
     )
 
 
+@router.patch("/bulk", response_model=ProjectBulkResponse)
+async def bulk_update_projects(
+    data: ProjectBulkUpdate,
+    db: DbSession,
+    current_user: TokenPrincipal = AdminOrManager,
+    request_info: RequestInfo = None,
+):
+    """Apply the same changes to many projects (admin/manager only, managers only their own).
+    
+    Projects that do not exist or that a manager does not own are skipped
+    and reported per ID.
+    """
+    changes = data.changes.model_dump(exclude_unset=True)
+    if not changes:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="No changes given",
+        )
+    if data.changes.owner_id is not None:
+        await _check_owner(db, data.changes.owner_id)
+    
+    ids = list(dict.fromkeys(data.ids))
+    owner_id = current_user.id if current_user.role == UserRole.manager else None
+    result = await ProjectService(db).bulk_update(ids, data.changes, owner_id)
+    
+    new_status = data.changes.status
+    entries = []
+    for row in result.rows:
+        # Log status changes specifically, as single updates do
+        if new_status and new_status != row.old_status:
+            entries.append((
+                AuditAction.project_status_change,
+                row.id,
+                {"old_status": row.old_status.value, "new_status": new_status.value},
+            ))
+        else:
+            entries.append((AuditAction.project_update, row.id, changes))
+    await AuditService(db).log_many(
+        AuditResourceType.project, entries, user_id=current_user.id, **request_info
+    )
+    
+    return _bulk_response(ids, result, "updated")
+
+
+@router.delete("/bulk", response_model=ProjectBulkResponse)
+async def bulk_delete_projects(
+    data: ProjectBulkDelete,
+    db: DbSession,
+    current_user: TokenPrincipal = AdminOrManager,
+    request_info: RequestInfo = None,
+):
+    """Delete many projects (admin/manager only, managers only their own).
+    
+    Projects that do not exist or that a manager does not own are skipped
+    and reported per ID.
+    """
+    ids = list(dict.fromkeys(data.ids))
+    owner_id = current_user.id if current_user.role == UserRole.manager else None
+    result = await ProjectService(db).bulk_delete(ids, owner_id)
+    
+    await AuditService(db).log_many(
+        AuditResourceType.project,
+        [(AuditAction.project_delete, row.id, {"name": row.name}) for row in result.rows],
+        user_id=current_user.id,
+        **request_info,
+    )
+    
+    return _bulk_response(ids, result, "deleted")
+
+
 @router.post("", response_model=ProjectResponse, status_code=status.HTTP_201_CREATED)
 async def create_project(
     data: ProjectCreate,
     db: DbSession,
-    current_user: User = AdminOrManager,
+    current_user: TokenPrincipal = AdminOrManager,
     request_info: RequestInfo = None,
 ):
     """Create a new project (admin/manager only)."""
     project_service = ProjectService(db)
     audit_service = AuditService(db)
     
+    if data.owner_id is not None:
+        await _check_owner(db, data.owner_id)
     project = await project_service.create(data, current_user.id)
     
     # Reload to get owner relationship
@@ -72,7 +292,7 @@ async def create_project(
     
     await audit_service.log(
         action=AuditAction.project_create,
-        resource_type="project",
+        resource_type=AuditResourceType.project,
         user_id=current_user.id,
         resource_id=project.id,
         details={"name": project.name, "status": project.status.value},
@@ -83,10 +303,11 @@ async def create_project(
 
 
 @router.get("/{project_id}", response_model=ProjectResponse)
+@conditional(_project_etag, cache_control=REVALIDATE_RESOURCE)
 async def get_project(
     project_id: int,
     db: DbSession,
-    current_user: CurrentUser,
+    current_user: Principal,
 ):
     """Get project by ID."""
     project_service = ProjectService(db)
@@ -106,7 +327,7 @@ async def update_project(
     project_id: int,
     data: ProjectUpdate,
     db: DbSession,
-    current_user: User = AdminOrManager,
+    current_user: TokenPrincipal = AdminOrManager,
     request_info: RequestInfo = None,
 ):
     """Update project (admin/manager only)."""
@@ -127,6 +348,9 @@ async def update_project(
             detail="Managers can only edit their own projects",
         )
     
+    if data.owner_id is not None and data.owner_id != project.owner_id:
+        await _check_owner(db, data.owner_id)
+    
     old_status = project.status
     updated_project = await project_service.update(project, data)
     
@@ -134,7 +358,7 @@ async def update_project(
     if data.status and data.status != old_status:
         await audit_service.log(
             action=AuditAction.project_status_change,
-            resource_type="project",
+            resource_type=AuditResourceType.project,
             user_id=current_user.id,
             resource_id=project_id,
             details={"old_status": old_status.value, "new_status": data.status.value},
@@ -143,7 +367,7 @@ async def update_project(
     else:
         await audit_service.log(
             action=AuditAction.project_update,
-            resource_type="project",
+            resource_type=AuditResourceType.project,
             user_id=current_user.id,
             resource_id=project_id,
             details=data.model_dump(exclude_unset=True),
@@ -157,7 +381,7 @@ async def update_project(
 async def delete_project(
     project_id: int,
     db: DbSession,
-    current_user: User = AdminOrManager,
+    current_user: TokenPrincipal = AdminOrManager,
     request_info: RequestInfo = None,
 ):
     """Delete project (admin/manager only, managers only their own)."""
@@ -180,7 +404,7 @@ async def delete_project(
     
     await audit_service.log(
         action=AuditAction.project_delete,
-        resource_type="project",
+        resource_type=AuditResourceType.project,
         user_id=current_user.id,
         resource_id=project_id,
         details={"name": project.name},
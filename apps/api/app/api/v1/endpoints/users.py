@@ -1,41 +1,142 @@
 """User management endpoints."""
+import asyncio
 from math import ceil
+from pathlib import PurePath
+from typing import Literal
 
-from fastapi import APIRouter, HTTPException, Query, status
+from fastapi import (
+    APIRouter,
+    BackgroundTasks,
+    Depends,
+    File,
+    HTTPException,
+    Query,
+    UploadFile,
+    status,
+)
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.api.deps import AdminOnly, AdminOrManager, CurrentUser, DbSession, RequestInfo
-from app.models.audit_log import AuditAction
-from app.models.user import User, UserRole
-from app.schemas.common import MessageResponse
+from app.api.deps import (
+    AdminOnly,
+    AdminOrManager,
+    CurrentUser,
+    DbSession,
+    Principal,
+    RequestInfo,
+    SinceCursor,
+    sort_field,
+    sparse_fieldset,
+)
+from app.core.config import settings
+from app.core.http_cache import (
+    REVALIDATE,
+    REVALIDATE_RESOURCE,
+    conditional,
+    make_etag,
+    user_etag,
+)
+from app.core.responses import FastJSONRoute
+from app.models.audit_log import AuditAction, AuditResourceType
+from app.models.user import UserRole
+from app.schemas.auth import TokenPrincipal
+from app.schemas.common import MessageResponse, SparseFieldset, SparseListResponse
 from app.schemas.user import (
+    UserChangesResponse,
     UserCreate,
+    UserDeletionResponse,
+    UserImportResponse,
     UserListResponse,
     UserPasswordUpdate,
     UserResponse,
     UserUpdate,
 )
 from app.services.audit_service import AuditService
-from app.services.user_service import UserService
+from app.services.change_feed import encode_change_token
+from app.services.user_deletion import user_deletions
+from app.services.user_service import USER_SORT_COLUMNS, UserService
+from app.services.user_transfer import (
+    EXPORT_MEDIA_TYPES,
+    IMPORT_FORMATS,
+    parse_import,
+    stream_export,
+)
+
+router = APIRouter(prefix="/users", tags=["Users"], route_class=FastJSONRoute)
+
+# Fields selectable with ?fields=
+USER_FIELDS = list(UserResponse.model_fields)
+
+
+async def _list_etag(
+    db: AsyncSession,
+    page: int,
+    page_size: int,
+    sort_by: str,
+    sort_order: str,
+    search: str | None,
+    role: UserRole | None,
+    is_active: bool | None,
+    sparse: SparseFieldset | None,
+    **_,
+) -> str | None:
+    """ETag for a user list page, answered from table versions."""
+    tag = await UserService(db).list_etag(
+        page=page,
+        page_size=page_size,
+        sort_by=sort_by,
+        sort_order=sort_order,
+        search=search,
+        role=role,
+        is_active=is_active,
+    )
+    return make_etag(tag, sparse) if tag and sparse else tag
 
-router = APIRouter(prefix="/users", tags=["Users"])
 
+async def _user_etag(user_id: int, db: AsyncSession, **_) -> str | None:
+    """ETag for a user, answered from the entity cache."""
+    user = await UserService(db).get_by_id(user_id)
+    return user_etag(user) if user else None
 
-@router.get("", response_model=UserListResponse)
+
+@router.get("", response_model=UserListResponse | SparseListResponse)
+@conditional(_list_etag, cache_control=REVALIDATE)
 async def list_users(
     db: DbSession,
-    current_user: CurrentUser,
+    current_user: Principal,
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=100),
-    sort_by: str = Query("created_at"),
+    sort_by: str = Depends(sort_field(USER_SORT_COLUMNS)),
     sort_order: str = Query("desc", pattern="^(asc|desc)$"),
     search: str | None = Query(None),
     role: UserRole | None = Query(None),
     is_active: bool | None = Query(None),
+    sparse: SparseFieldset | None = Depends(sparse_fieldset(USER_FIELDS)),
 ):
-    """List all users with pagination and filters."""
+    """List all users with pagination and filters, optionally narrowed with ``fields``."""
     user_service = UserService(db)
     
-    users, total = await user_service.get_list(
+    if sparse is not None:
+        rows, total, estimated = await user_service.get_partial_list(
+            sparse.fields,
+            page=page,
+            page_size=page_size,
+            sort_by=sort_by,
+            sort_order=sort_order,
+            search=search,
+            role=role,
+            is_active=is_active,
+        )
+        return SparseListResponse(
+            items=rows,
+            total=total,
+            page=page,
+            page_size=page_size,
+            pages=ceil(total / page_size) if total > 0 else 1,
+            total_estimated=estimated,
+        )
+    
+    users, total, estimated = await user_service.get_list(
         page=page,
         page_size=page_size,
         sort_by=sort_by,
@@ -51,6 +152,107 @@ async def list_users(
         page=page,
         page_size=page_size,
         pages=ceil(total / page_size) if total > 0 else 1,
+        total_estimated=estimated,
+    )
+
+
+@router.get("/changes", response_model=UserChangesResponse)
+async def list_user_changes(
+    db: DbSession,
+    current_user: Principal,
+    since: SinceCursor,
+    limit: int = Query(100, ge=1, le=settings.CHANGE_FEED_MAX_LIMIT),
+):
+    """List users changed and IDs deleted since a change token.
+    
+    Call without ``since`` to start a full sync, then pass ``next_token``
+    back until ``has_more`` is false.
+    """
+    changes = await UserService(db).get_changes(since, limit)
+    return UserChangesResponse(
+        items=[UserResponse.model_validate(u) for u in changes.changed],
+        deleted=changes.deleted,
+        next_token=encode_change_token(changes.cursor),
+        has_more=changes.has_more,
+    )
+
+
+@router.get("/deletions/{deletion_id}", response_model=UserDeletionResponse)
+async def get_user_deletion(
+    deletion_id: int,
+    db: DbSession,
+    current_user: TokenPrincipal = AdminOnly,
+):
+    """Get the progress of a user deletion (admin only)."""
+    deletion = await UserService(db).get_deletion(deletion_id)
+    if not deletion:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User deletion not found",
+        )
+    return UserDeletionResponse.model_validate(deletion)
+
+
+@router.get("/export")
+async def export_users(
+    current_user: TokenPrincipal = AdminOnly,
+    format: Literal["csv", "ndjson"] = Query("csv"),
+):
+    """Download every user as CSV or NDJSON, streamed (admin only)."""
+    return StreamingResponse(
+        stream_export(format),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="users.{format}"'},
+    )
+
+
+@router.post("/import", response_model=UserImportResponse)
+async def import_users(
+    db: DbSession,
+    file: UploadFile = File(...),
+    format: Literal["csv", "ndjson"] | None = Query(
+        None, description="Defaults to the file extension (.csv, .ndjson or .jsonl)"
+    ),
+    current_user: TokenPrincipal = AdminOnly,
+    request_info: RequestInfo = None,
+):
+    """Create users from a CSV or NDJSON file (admin only).
+    
+    Rows take the ``POST /users`` fields (``email``, ``full_name``, ``role``,
+    ``password``). Valid rows are created together; every other row is
+    reported with its line number and the reason.
+    """
+    format = format or IMPORT_FORMATS.get(PurePath(file.filename or "").suffix.lower())
+    if format is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Unknown import format; pass format=csv or format=ndjson",
+        )
+    
+    rows, errors, truncated = await asyncio.to_thread(
+        parse_import, file.file, format, settings.USER_IMPORT_MAX_ROWS
+    )
+    if truncated:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Imports are limited to {settings.USER_IMPORT_MAX_ROWS} rows",
+        )
+    
+    created, import_errors = await UserService(db).import_users(rows)
+    
+    await AuditService(db).log_many(
+        AuditResourceType.user,
+        [
+            (AuditAction.user_create, row.id, {"email": row.email, "role": row.role.value})
+            for row in created
+        ],
+        user_id=current_user.id,
+        **request_info,
+    )
+    
+    return UserImportResponse(
+        created=len(created),
+        errors=sorted(errors + import_errors, key=lambda error: error.line),
     )
 
 
@@ -58,7 +260,7 @@ async def list_users(
 async def create_user(
     data: UserCreate,
     db: DbSession,
-    current_user: User = AdminOnly,
+    current_user: TokenPrincipal = AdminOnly,
     request_info: RequestInfo = None,
 ):
     """Create a new user (admin only)."""
@@ -78,7 +280,7 @@ async def create_user(
     # Log user creation
     await audit_service.log(
         action=AuditAction.user_create,
-        resource_type="user",
+        resource_type=AuditResourceType.user,
         user_id=current_user.id,
         resource_id=user.id,
         details={"email": user.email, "role": user.role.value},
@@ -89,10 +291,11 @@ async def create_user(
 
 
 @router.get("/{user_id}", response_model=UserResponse)
+@conditional(_user_etag, cache_control=REVALIDATE_RESOURCE)
 async def get_user(
     user_id: int,
     db: DbSession,
-    current_user: CurrentUser,
+    current_user: Principal,
 ):
     """Get user by ID."""
     user_service = UserService(db)
@@ -112,7 +315,7 @@ async def update_user(
     user_id: int,
     data: UserUpdate,
     db: DbSession,
-    current_user: User = AdminOrManager,
+    current_user: TokenPrincipal = AdminOrManager,
     request_info: RequestInfo = None,
 ):
     """Update user (admin/manager only)."""
@@ -151,7 +354,7 @@ async def update_user(
     if data.role and data.role != old_role:
         await audit_service.log(
             action=AuditAction.user_role_change,
-            resource_type="user",
+            resource_type=AuditResourceType.user,
             user_id=current_user.id,
             resource_id=user_id,
             details={"old_role": old_role.value, "new_role": data.role.value},
@@ -160,7 +363,7 @@ async def update_user(
     else:
         await audit_service.log(
             action=AuditAction.user_update,
-            resource_type="user",
+            resource_type=AuditResourceType.user,
             user_id=current_user.id,
             resource_id=user_id,
             details=data.model_dump(exclude_unset=True),
@@ -170,14 +373,25 @@ async def update_user(
     return UserResponse.model_validate(updated_user)
 
 
-@router.delete("/{user_id}", response_model=MessageResponse)
+@router.delete(
+    "/{user_id}", response_model=UserDeletionResponse, status_code=status.HTTP_202_ACCEPTED
+)
 async def delete_user(
     user_id: int,
     db: DbSession,
-    current_user: User = AdminOnly,
+    background_tasks: BackgroundTasks,
+    reassign_to: int | None = Query(
+        None, description="Give the user's projects to this user instead of deleting them"
+    ),
+    current_user: TokenPrincipal = AdminOnly,
     request_info: RequestInfo = None,
 ):
-    """Delete user (admin only)."""
+    """Delete user (admin only).
+    
+    The user is deactivated immediately; their projects and audit log links
+    are removed in the background. Follow progress at
+    ``/users/deletions/{id}``.
+    """
     user_service = UserService(db)
     audit_service = AuditService(db)
     
@@ -195,19 +409,44 @@ async def delete_user(
             detail="Cannot delete your own account",
         )
     
+    if await user_service.get_unfinished_deletion(user_id):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="User is already being deleted",
+        )
+    
+    if reassign_to is not None:
+        target = await user_service.get_by_id(reassign_to)
+        if not target or not target.is_active or target.id == user.id:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Projects can only be reassigned to another active user",
+            )
+    
     # Log before deletion
+    details = {"email": user.email}
+    if reassign_to is not None:
+        details["reassign_to"] = reassign_to
     await audit_service.log(
         action=AuditAction.user_delete,
-        resource_type="user",
+        resource_type=AuditResourceType.user,
         user_id=current_user.id,
         resource_id=user_id,
-        details={"email": user.email},
+        details=details,
         **request_info,
     )
     
-    await user_service.delete(user)
+    deletion = await user_service.request_deletion(user, current_user.id, reassign_to)
+    if deletion is None:
+        # Another request queued one since the check above
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="User is already being deleted",
+        )
+    # Runs after the commit; workers without the wake-up find the job on their next poll
+    background_tasks.add_task(user_deletions.notify)
     
-    return MessageResponse(message="User deleted successfully")
+    return UserDeletionResponse.model_validate(deletion)
 
 
 @router.post("/me/password", response_model=MessageResponse)
@@ -222,8 +461,7 @@ async def change_password(
     audit_service = AuditService(db)
     
     # Verify current password
-    from app.core.security import verify_password
-    if not verify_password(data.current_password, current_user.hashed_password):
+    if not await user_service.check_password(current_user, data.current_password):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Current password is incorrect",
@@ -233,7 +471,7 @@ async def change_password(
     
     await audit_service.log(
         action=AuditAction.password_change,
-        resource_type="user",
+        resource_type=AuditResourceType.user,
         user_id=current_user.id,
         resource_id=current_user.id,
         **request_info,
@@ -1,7 +1,7 @@
 """API v1 router that combines all endpoint modules."""
 from fastapi import APIRouter
 
-from app.api.v1.endpoints import audit, auth, dashboard, projects, users
+from app.api.v1.endpoints import audit, auth, batch, dashboard, projects, users
 
 api_router = APIRouter()
 
@@ -10,3 +10,4 @@ api_router.include_router(users.router)
 api_router.include_router(projects.router)
 api_router.include_router(audit.router)
 api_router.include_router(dashboard.router)
+api_router.include_router(batch.router)
@@ -0,0 +1,189 @@
+"""Admission control that sheds low-priority requests when the DB pool backs up.
+
+Every request is classed as low (dashboard polling and list pages), normal
+or high priority (writes and admin callers). The controller counts requests
+in flight and tracks how long connection checkouts wait on the pool; once
+the pool is saturated or waits grow, low and then normal priority requests
+are answered with a fast 503 and ``Retry-After`` instead of queueing for a
+connection. The last ``ADMISSION_RESERVED_SLOTS`` in-flight slots are kept
+for high priority requests.
+"""
+import math
+import time
+from enum import IntEnum
+
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.core.metrics import metrics
+from app.core.responses import FastJSONResponse
+from app.core.security import verified_tokens
+
+logger = get_logger(__name__)
+
+
+class Priority(IntEnum):
+    """Request priority; higher values are shed later."""
+    low = 0
+    normal = 1
+    high = 2
+
+
+class PoolWaitTracker:
+    """Moving average of pool checkout waits that decays while no samples arrive."""
+
+    def __init__(self, half_life: float):
+        self.half_life = half_life
+        self._value = 0.0
+        self._updated = time.monotonic()
+
+    def _decayed(self, now: float) -> float:
+        return self._value * math.pow(0.5, (now - self._updated) / self.half_life)
+
+    def observe(self, wait_ms: float) -> None:
+        """Record one checkout's wait."""
+        now = time.monotonic()
+        # Blend half-and-half so a burst of slow checkouts is seen after a few samples
+        self._value = (self._decayed(now) + wait_ms) / 2
+        self._updated = now
+
+    @property
+    def value(self) -> float:
+        """Current average wait in milliseconds."""
+        return self._decayed(time.monotonic())
+
+
+pool_waits = PoolWaitTracker(settings.ADMISSION_POOL_WAIT_HALF_LIFE_SECONDS)
+
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """Connection pool that reports how long each checkout waited."""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            wait_ms = (time.perf_counter() - start) * 1000
+            pool_waits.observe(wait_ms)
+            metrics.observe("db.pool_wait_ms", wait_ms)
+
+
+class AdmissionController:
+    """Per-worker in-flight accounting and shedding decisions."""
+
+    def __init__(self):
+        self.in_flight = 0
+        self._pool = None
+
+    def attach(self, pool) -> None:
+        """Watch a connection pool's checkouts for saturation."""
+        self._pool = pool
+
+    def pool_saturated(self) -> bool:
+        """Check whether every pooled and overflow connection is checked out."""
+        if self._pool is None or not hasattr(self._pool, "checkedout"):
+            return False
+        capacity = settings.DATABASE_POOL_SIZE + settings.DATABASE_MAX_OVERFLOW
+        return self._pool.checkedout() >= capacity
+
+    def admit(self, priority: Priority) -> bool:
+        """Decide whether a request of a priority may start now."""
+        if self.in_flight >= settings.ADMISSION_MAX_IN_FLIGHT:
+            return False
+        if priority is Priority.high:
+            return True
+        if self.in_flight >= settings.ADMISSION_MAX_IN_FLIGHT - settings.ADMISSION_RESERVED_SLOTS:
+            return False
+        wait_ms = pool_waits.value
+        if priority is Priority.normal:
+            return wait_ms < settings.ADMISSION_SHED_NORMAL_WAIT_MS
+        return wait_ms < settings.ADMISSION_SHED_LOW_WAIT_MS and not self.pool_saturated()
+
+
+admission = AdmissionController()
+
+
+def admin_token(token: str) -> bool:
+    """Check whether a token is an already verified, unrevoked admin access token.
+
+    Only tokens in ``verified_tokens`` count, so this never verifies a
+    signature; a token's first request is classed by route alone and the
+    auth dependency then verifies and caches it.
+    """
+    # Imported here: both services need the database module, which imports this one
+    from app.services.token_revocations import token_revocations
+    from app.services.token_versions import token_versions
+
+    claims = verified_tokens.get(verified_tokens.digest(token))
+    if claims is None or claims.get("type") != "access" or claims.get("role") != "admin":
+        return False
+    try:
+        current = token_versions.is_current(int(claims["sub"]), claims["ver"])
+    except (KeyError, TypeError, ValueError):
+        return False
+    # A filter hit is treated as revoked rather than confirmed with a query
+    return current and not token_revocations.may_be_revoked(claims.get("jti", ""))
+
+
+def request_priority(scope: Scope) -> Priority:
+    """Class a request by route and, for admins, by the role in its token."""
+    method = scope["method"]
+    if f"{method} {scope['path']}" in settings.ADMISSION_LOW_PRIORITY_ROUTES:
+        priority = Priority.low
+    elif method in ("GET", "HEAD"):
+        priority = Priority.normal
+    else:
+        return Priority.high
+
+    authorization = Headers(scope=scope).get("authorization", "")
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() == "bearer" and token and admin_token(token):
+        return Priority.high
+    return priority
+
+
+def service_unavailable() -> FastJSONResponse:
+    """Build a fast 503 telling the client when to retry."""
+    return FastJSONResponse(
+        status_code=503,
+        content={"detail": "Server is busy, please retry shortly"},
+        headers={"Retry-After": str(settings.ADMISSION_RETRY_AFTER_SECONDS)},
+    )
+
+
+class AdmissionMiddleware:
+    """Shed requests the controller does not admit, counting the rest in flight."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            scope["type"] != "http"
+            or not settings.ADMISSION_ENABLED
+            or scope["path"] in settings.ADMISSION_EXEMPT_PATHS
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        priority = request_priority(scope)
+        if not admission.admit(priority):
+            metrics.increment(f"admission.shed.{priority.name}")
+            logger.info(
+                "request_shed",
+                priority=priority.name,
+                in_flight=admission.in_flight,
+                pool_wait_ms=round(pool_waits.value, 2),
+            )
+            await service_unavailable()(scope, receive, send)
+            return
+
+        admission.in_flight += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            admission.in_flight -= 1
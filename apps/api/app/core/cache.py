@@ -0,0 +1,456 @@
+"""Entity and query-result caches backed by an in-process LRU and Redis.
+
+Entities are cached as snapshots of their column attributes under versioned
+keys; columns marked ``info={"secret": True}`` are never cached. Writers
+invalidate keys through the session so the eviction is repeated once the
+transaction ends, and every eviction is broadcast over Redis pub/sub so the
+local tier of other workers is dropped as well. Evictions also bump a
+per-entity generation, and a read-through only stores the row it loaded if
+no eviction happened since the load began.
+
+List query results are kept in process memory only, keyed by the normalized
+query and the current version of every table they read. Write paths bump
+those versions in Redis, so a cached page is never served after a commit.
+"""
+import asyncio
+import enum
+import json
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Callable, TypeVar
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError, WatchError
+from sqlalchemy import DateTime, Enum, inspect
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import make_transient_to_detached
+from sqlalchemy.orm.util import identity_key
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.core.redis import get_redis
+
+logger = get_logger(__name__)
+
+ModelT = TypeVar("ModelT")
+
+# Bump when the cached entity layout changes so stale snapshots are never read
+CACHE_SCHEMA_VERSION = 2
+
+# Session.info keys holding cache keys and tables written by the current transaction
+PENDING_INVALIDATIONS = "entity_cache_pending"
+PENDING_TABLE_BUMPS = "query_cache_pending"
+# Session.info key memoizing table versions read during the current request
+TABLE_VERSIONS = "query_cache_versions"
+# Session.info key holding the generations seen by cache misses awaiting a store
+LOAD_GENERATIONS = "entity_cache_loads"
+
+
+class LRUCache:
+    """Bounded in-process LRU cache with a per-entry TTL."""
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+
+    def get(self, key: str) -> Any | None:
+        """Get a live entry, dropping it if it has expired."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any, ttl: float | None = None) -> None:
+        """Store an entry, evicting the least recently used ones when full."""
+        self._entries[key] = (time.monotonic() + (ttl or self.ttl), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        """Remove an entry if present."""
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        """Remove all entries."""
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def dump_entity(instance: Any) -> dict[str, Any]:
+    """Snapshot an instance's column attributes, leaving out secret and unloaded deferred ones."""
+    state = inspect(instance)
+    return {
+        attr.key: getattr(instance, attr.key)
+        for attr in state.mapper.column_attrs
+        if not attr.columns[0].info.get("secret")
+        and not (attr.deferred and attr.key in state.unloaded)
+    }
+
+
+def _json_default(value: Any) -> Any:
+    """Encode datetimes and enums for the Redis tier."""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, enum.Enum):
+        return value.value
+    raise TypeError(f"Cannot encode {type(value).__name__} for the cache")
+
+
+def _decode_entity(model: type, data: dict[str, Any]) -> dict[str, Any]:
+    """Restore Python types on a snapshot read back from Redis."""
+    for attr in inspect(model).column_attrs:
+        value = data.get(attr.key)
+        if value is None:
+            continue
+        column_type = attr.columns[0].type
+        if isinstance(column_type, DateTime):
+            data[attr.key] = datetime.fromisoformat(value)
+        elif isinstance(column_type, Enum) and column_type.enum_class is not None:
+            data[attr.key] = column_type.enum_class(value)
+    return data
+
+
+async def attach_entity(
+    session: AsyncSession, model: type[ModelT], data: dict[str, Any]
+) -> ModelT:
+    """Attach a snapshot to the session as a persistent instance without a SELECT."""
+    ident = data[inspect(model).primary_key[0].key]
+    existing = session.identity_map.get(identity_key(model, ident))
+    if existing is not None:
+        return existing
+    # Rebuild as a detached instance so merge() skips loading it
+    instance = model(**data)
+    make_transient_to_detached(instance)
+    return await session.merge(instance, load=False)
+
+
+class RedisTier:
+    """Shared Redis client for the caches, backing off after errors."""
+
+    def __init__(self):
+        self.client: Redis | None = None
+        self._down_until = 0.0
+        self._on_failure: list[Callable[[], None]] = []
+
+    @property
+    def available(self) -> Redis | None:
+        """Redis client, or None while the tier is disabled or backing off."""
+        if self.client is None or time.monotonic() < self._down_until:
+            return None
+        return self.client
+
+    def on_failure(self, callback: Callable[[], None]) -> None:
+        """Register a callback run whenever Redis becomes unavailable."""
+        self._on_failure.append(callback)
+
+    def failed(self, exc: Exception) -> None:
+        """Back off from Redis after an error instead of failing requests."""
+        self._down_until = time.monotonic() + settings.CACHE_REDIS_RETRY_SECONDS
+        # Invalidations may be lost while Redis is down, so drop local state
+        for callback in self._on_failure:
+            callback()
+        logger.warning("cache_redis_unavailable", error=str(exc))
+
+
+class EntityCache:
+    """Read-through cache for ORM entities keyed by primary key."""
+
+    def __init__(self, tier: RedisTier, namespace: str = "entity"):
+        self.tier = tier
+        self.namespace = namespace
+        self.local = LRUCache(
+            settings.CACHE_LOCAL_MAX_ENTRIES, settings.CACHE_LOCAL_TTL_SECONDS
+        )
+        self.instance_id = uuid.uuid4().hex
+        # Bumped on every local eviction so loads that raced one are not stored
+        self.local_generation = 0
+        self._listener: asyncio.Task | None = None
+        tier.on_failure(self._clear_local)
+
+    def key(self, model: type, ident: Any) -> str:
+        """Build the versioned cache key for an entity."""
+        return f"{self.namespace}:v{CACHE_SCHEMA_VERSION}:{model.__tablename__}:{ident}"
+
+    def generation_key(self, key: str) -> str:
+        """Build the Redis key counting evictions of an entity."""
+        return f"{key}:generation"
+
+    def _clear_local(self) -> None:
+        """Drop the local tier."""
+        self.local.clear()
+        self.local_generation += 1
+
+    async def start(self, redis: Redis | None = None) -> None:
+        """Attach the Redis tier and start listening for invalidations."""
+        if not settings.CACHE_ENABLED:
+            return
+        if redis is None and not settings.CACHE_REDIS_ENABLED:
+            return
+        self.tier.client = redis or get_redis()
+        self._listener = asyncio.create_task(self._listen())
+
+    async def stop(self) -> None:
+        """Stop the invalidation listener and detach the Redis tier."""
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+        self.tier.client = None
+        self._clear_local()
+
+    async def get(self, model: type, ident: Any) -> dict[str, Any] | None:
+        """Get an entity snapshot from the local tier, then Redis."""
+        data, _ = await self._get(model, ident)
+        return data
+
+    async def _get(self, model: type, ident: Any) -> tuple[dict[str, Any] | None, tuple | None]:
+        """Get an entity snapshot, or on a miss the generations to store a fresh one at."""
+        if not settings.CACHE_ENABLED:
+            return None, None
+        key = self.key(model, ident)
+        data = self.local.get(key)
+        if data is not None:
+            return data, None
+
+        local_generation = self.local_generation
+        redis = self.tier.available
+        if redis is None:
+            return None, (local_generation, False, None)
+        try:
+            raw, generation = await redis.mget(key, self.generation_key(key))
+        except RedisError as exc:
+            self.tier.failed(exc)
+            return None, (local_generation, False, None)
+        if raw is None:
+            return None, (local_generation, True, generation)
+
+        data = _decode_entity(model, json.loads(raw))
+        if self.local_generation == local_generation:
+            self.local.set(key, data)
+        return data, None
+
+    async def _set(self, key: str, data: dict[str, Any], generations: tuple) -> None:
+        """Write a snapshot to both tiers unless the entity was evicted since it was loaded."""
+        local_generation, redis_checked, generation = generations
+        redis = self.tier.available
+        if redis is not None and redis_checked:
+            generation_key = self.generation_key(key)
+            try:
+                async with redis.pipeline(transaction=True) as pipe:
+                    # The write is dropped if an eviction bumps the generation meanwhile
+                    await pipe.watch(generation_key)
+                    if await pipe.get(generation_key) != generation:
+                        return
+                    pipe.multi()
+                    pipe.set(
+                        key,
+                        json.dumps(data, default=_json_default),
+                        ex=settings.CACHE_REDIS_TTL_SECONDS,
+                    )
+                    await pipe.execute()
+            except WatchError:
+                return
+            except RedisError as exc:
+                self.tier.failed(exc)
+                return
+        if self.local_generation == local_generation:
+            self.local.set(key, data)
+
+    async def evict(self, *keys: str) -> None:
+        """Drop keys from both tiers and tell the other workers to do the same."""
+        if not keys:
+            return
+        for key in keys:
+            self.local.delete(key)
+        self.local_generation += 1
+        redis = self.tier.available
+        if redis is None:
+            return
+        try:
+            async with redis.pipeline(transaction=True) as pipe:
+                pipe.delete(*keys)
+                for key in keys:
+                    generation_key = self.generation_key(key)
+                    pipe.incr(generation_key)
+                    pipe.expire(generation_key, settings.CACHE_GENERATION_TTL_SECONDS)
+                pipe.publish(
+                    settings.CACHE_INVALIDATION_CHANNEL,
+                    json.dumps({"origin": self.instance_id, "keys": list(keys)}),
+                )
+                await pipe.execute()
+        except RedisError as exc:
+            self.tier.failed(exc)
+
+    async def load(self, session: AsyncSession, model: type[ModelT], ident: Any) -> ModelT | None:
+        """Get a session-attached instance from the cache, or None on a miss."""
+        existing = session.identity_map.get(identity_key(model, ident))
+        if existing is not None:
+            return existing
+
+        data, generations = await self._get(model, ident)
+        if data is None:
+            if generations is not None:
+                session.info.setdefault(LOAD_GENERATIONS, {})[self.key(model, ident)] = generations
+            return None
+        return await attach_entity(session, model, data)
+
+    async def store(self, session: AsyncSession, instance: Any) -> None:
+        """Cache an instance loaded from the database after a miss in ``load``."""
+        if not settings.CACHE_ENABLED:
+            return
+        key = self.key(type(instance), inspect(instance).identity[0])
+        generations = session.info.get(LOAD_GENERATIONS, {}).pop(key, None)
+        # Without the generations seen before the load, the row may already be stale
+        if generations is None:
+            return
+        # Never publish rows this transaction has written but not committed
+        if key in session.info.get(PENDING_INVALIDATIONS, ()):
+            return
+        await self._set(key, dump_entity(instance), generations)
+
+    async def invalidate(self, session: AsyncSession, model: type, ident: Any) -> None:
+        """Evict an entity now and again once the session's transaction ends."""
+        await self.invalidate_many(session, model, [ident])
+
+    async def invalidate_many(self, session: AsyncSession, model: type, idents: list[Any]) -> None:
+        """Invalidate several entities of a model with a single eviction."""
+        keys = [self.key(model, ident) for ident in idents]
+        session.info.setdefault(PENDING_INVALIDATIONS, set()).update(keys)
+        await self.evict(*keys)
+
+    async def flush_pending(self, session: AsyncSession) -> None:
+        """Repeat the evictions queued by a transaction after commit or rollback."""
+        keys = session.info.pop(PENDING_INVALIDATIONS, None)
+        if keys:
+            await self.evict(*keys)
+
+    def _on_invalidation(self, raw: str) -> None:
+        """Apply an invalidation message published by another worker."""
+        message = json.loads(raw)
+        if message.get("origin") == self.instance_id:
+            return
+        for key in message.get("keys", []):
+            self.local.delete(key)
+        self.local_generation += 1
+
+    async def _listen(self) -> None:
+        """Consume invalidation messages, resubscribing after Redis errors."""
+        while True:
+            pubsub = self.tier.client.pubsub(ignore_subscribe_messages=True)
+            try:
+                await pubsub.subscribe(settings.CACHE_INVALIDATION_CHANNEL)
+                while True:
+                    message = await pubsub.get_message(
+                        ignore_subscribe_messages=True, timeout=1.0
+                    )
+                    if message is not None:
+                        self._on_invalidation(message["data"])
+            except RedisError as exc:
+                # Messages may have been missed while disconnected
+                self._clear_local()
+                logger.warning("cache_invalidation_listener_error", error=str(exc))
+                await asyncio.sleep(settings.CACHE_REDIS_RETRY_SECONDS)
+            finally:
+                await pubsub.aclose()
+
+
+class QueryCache:
+    """Per-worker cache of list query results guarded by shared table versions."""
+
+    def __init__(self, tier: RedisTier, namespace: str = "query"):
+        self.tier = tier
+        self.namespace = namespace
+        self.local = LRUCache(
+            settings.QUERY_CACHE_MAX_ENTRIES, settings.QUERY_CACHE_TTL_SECONDS
+        )
+        tier.on_failure(self.local.clear)
+
+    def version_key(self, table: str) -> str:
+        """Build the Redis key holding a table's version counter."""
+        return f"{self.namespace}:version:{table}"
+
+    async def versions(self, session: AsyncSession, tables: tuple[str, ...]) -> tuple[int, ...] | None:
+        """Get the current versions of tables, or None when results must not be cached."""
+        if not settings.CACHE_ENABLED:
+            return None
+        # This transaction may see its own uncommitted writes
+        if session.info.get(PENDING_TABLE_BUMPS, set()) & set(tables):
+            return None
+        memo = session.info.setdefault(TABLE_VERSIONS, {})
+        if tables in memo:
+            return memo[tables]
+        redis = self.tier.available
+        if redis is None:
+            return None
+
+        keys = [self.version_key(table) for table in tables]
+        try:
+            values = await redis.mget(keys)
+            if None in values:
+                # Seed missing counters with a fresh epoch so they never repeat
+                # a value seen before Redis lost them
+                for key, value in zip(keys, values):
+                    if value is None:
+                        await redis.set(key, time.time_ns(), nx=True)
+                return None
+        except RedisError as exc:
+            self.tier.failed(exc)
+            return None
+        memo[tables] = tuple(int(value) for value in values)
+        return memo[tables]
+
+    def get(self, key: tuple, versions: tuple[int, ...]) -> Any | None:
+        """Get a cached result computed at the given table versions."""
+        return self.local.get(repr((key, versions)))
+
+    def set(self, key: tuple, versions: tuple[int, ...], value: Any) -> None:
+        """Cache a result computed at the given table versions."""
+        self.local.set(repr((key, versions)), value)
+
+    async def bump(self, session: AsyncSession, *tables: str) -> None:
+        """Bump table versions now and again once the session's transaction ends."""
+        session.info.setdefault(PENDING_TABLE_BUMPS, set()).update(tables)
+        session.info.pop(TABLE_VERSIONS, None)
+        await self._incr(*tables)
+
+    async def flush_pending(self, session: AsyncSession) -> None:
+        """Repeat the version bumps queued by a transaction after commit or rollback."""
+        tables = session.info.pop(PENDING_TABLE_BUMPS, None)
+        if tables:
+            await self._incr(*tables)
+
+    async def _incr(self, *tables: str) -> None:
+        """Increment table version counters."""
+        redis = self.tier.available
+        if redis is None:
+            return
+        try:
+            for table in tables:
+                await redis.incr(self.version_key(table))
+        except RedisError as exc:
+            self.tier.failed(exc)
+
+
+redis_tier = RedisTier()
+entity_cache = EntityCache(redis_tier)
+query_cache = QueryCache(redis_tier)
+
+
+async def flush_pending_invalidations(session: AsyncSession) -> None:
+    """Apply the cache invalidations queued by a session once its transaction ends."""
+    await entity_cache.flush_pending(session)
+    await query_cache.flush_pending(session)
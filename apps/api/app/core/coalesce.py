@@ -0,0 +1,110 @@
+"""Single-flight coalescing of identical concurrent requests."""
+import asyncio
+import functools
+from collections.abc import Awaitable, Callable
+from typing import Any, Literal
+
+from fastapi import Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.deadlines import is_timeout
+from app.core.logging import get_logger
+from app.core.responses import render, response_media_type
+
+logger = get_logger(__name__)
+
+
+class SingleFlight:
+    """Run at most one computation per key at a time, sharing its result."""
+
+    def __init__(self):
+        self._inflight: dict[str, asyncio.Future] = {}
+
+    def __len__(self) -> int:
+        return len(self._inflight)
+
+    async def do(self, key: str, compute: Callable[[], Awaitable[Any]]) -> Any:
+        """Join the in-flight computation for a key, or start it."""
+        future = self._inflight.get(key)
+        if future is not None:
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                # Only fall back to our own computation if the leader was cancelled
+                if not future.cancelled() or asyncio.current_task().cancelling():
+                    raise
+                return await self.do(key, compute)
+            except Exception as exc:
+                # The leader ran under its own deadline, which its client may have shortened
+                if not is_timeout(exc):
+                    raise
+                return await self.do(key, compute)
+
+        future = asyncio.get_running_loop().create_future()
+        # Avoid "exception was never retrieved" warnings when nobody joined
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        self._inflight[key] = future
+        try:
+            result = await compute()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as exc:
+            future.set_exception(exc)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del self._inflight[key]
+
+
+single_flight = SingleFlight()
+
+
+def _request_key(endpoint: Callable, kwargs: dict[str, Any], scope: str) -> str:
+    """Build the coalescing key from the endpoint, its parameters and the caller's scope."""
+    current_user = kwargs.get("current_user")
+    if current_user is None:
+        caller = "anonymous"
+    elif scope == "user":
+        caller = f"user:{current_user.id}"
+    else:
+        caller = f"role:{current_user.role.value}"
+
+    params = sorted(
+        (name, value)
+        for name, value in kwargs.items()
+        if name not in ("current_user", "request_info")
+        and not isinstance(value, (AsyncSession, Request))
+    )
+    return (
+        f"{endpoint.__module__}.{endpoint.__qualname__}|{response_media_type()}"
+        f"|{caller}|{params!r}"
+    )
+
+
+def coalesce(scope: Literal["role", "user"] = "role"):
+    """Decorator sharing one in-flight computation between identical GET requests.
+
+    Requests are identical when they hit the same endpoint with the same
+    parameters under the same authorization scope: the caller's role by
+    default, or the caller's identity for per-user responses. Every waiter
+    receives its own response built from the same serialized body.
+    """
+    def decorator(endpoint: Callable[..., Awaitable[Any]]):
+        @functools.wraps(endpoint)
+        async def wrapper(**kwargs: Any) -> Any:
+            if not settings.COALESCE_ENABLED:
+                return await endpoint(**kwargs)
+
+            media_type = response_media_type()
+
+            async def compute() -> bytes:
+                return render(await endpoint(**kwargs), media_type)
+
+            body = await single_flight.do(_request_key(endpoint, kwargs, scope), compute)
+            return Response(content=body, media_type=media_type)
+        return wrapper
+    return decorator
@@ -0,0 +1,223 @@
+"""Response compression middleware with encoding negotiation.
+
+Supports gzip out of the box, plus brotli and zstd when the ``brotli`` and
+``zstandard`` packages are installed. Bodies smaller than the configured
+threshold are sent as-is, streamed bodies are compressed chunk by chunk with
+a flush after each one, and the compression level is chosen per content type.
+"""
+import time
+import zlib
+from typing import Protocol
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.metrics import metrics
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+
+class Compressor(Protocol):
+    """Incremental compressor for one response body."""
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        """Compress a chunk, flushing it (or finishing the stream when final)."""
+
+
+class GzipCompressor:
+    """gzip compressor built on zlib."""
+
+    def __init__(self, level: int):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        mode = zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH
+        return self._compressor.compress(data) + self._compressor.flush(mode)
+
+
+class BrotliCompressor:
+    """Brotli compressor."""
+
+    def __init__(self, level: int):
+        self._compressor = brotli.Compressor(quality=level)
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        output = self._compressor.process(data)
+        return output + (self._compressor.finish() if final else self._compressor.flush())
+
+
+class ZstdCompressor:
+    """Zstandard compressor."""
+
+    def __init__(self, level: int):
+        self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        mode = zstandard.COMPRESSOBJ_FLUSH_FINISH if final else zstandard.COMPRESSOBJ_FLUSH_BLOCK
+        return self._compressor.compress(data) + self._compressor.flush(mode)
+
+
+COMPRESSORS: dict[str, type] = {"gzip": GzipCompressor}
+if brotli is not None:
+    COMPRESSORS["br"] = BrotliCompressor
+if zstandard is not None:
+    COMPRESSORS["zstd"] = ZstdCompressor
+
+
+def negotiate_encoding(accept_encoding: str) -> str | None:
+    """Pick the best available encoding for an Accept-Encoding header."""
+    accepted: dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.partition("=")
+            if key.strip() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        accepted[name] = quality
+
+    best, best_quality = None, 0.0
+    # Ties go to the server's preference order
+    for encoding in settings.COMPRESSION_ENCODINGS:
+        if encoding not in COMPRESSORS:
+            continue
+        quality = accepted.get(encoding, accepted.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def compression_level(content_type: str | None, encoding: str) -> int | None:
+    """Get the configured level for a content type, or None if it is not compressed."""
+    if not content_type:
+        return None
+    mime = content_type.split(";")[0].strip().lower()
+    levels = settings.COMPRESSION_LEVELS.get(mime)
+    if levels is None:
+        levels = next(
+            (
+                policy for prefix, policy in settings.COMPRESSION_LEVELS.items()
+                if prefix.endswith("/") and mime.startswith(prefix)
+            ),
+            None,
+        )
+    return levels.get(encoding) if levels else None
+
+
+class CompressionMiddleware:
+    """ASGI middleware compressing eligible responses."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] == "HEAD" or not settings.COMPRESSION_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        responder = CompressionResponder(send, encoding)
+        await self.app(scope, receive, responder.send)
+
+
+class CompressionResponder:
+    """Wraps ``send`` for one response, compressing its body if eligible."""
+
+    def __init__(self, send: Send, encoding: str):
+        self._send = send
+        self.encoding = encoding
+        self._start: Message | None = None
+        self._compressor: Compressor | None = None
+        self._passthrough = False
+        self._bytes_in = 0
+        self._bytes_out = 0
+        self._cpu_ns = 0
+
+    async def send(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            # Headers are held until the first body chunk decides the encoding
+            self._start = message
+            return
+        if message["type"] != "http.response.body" or self._passthrough:
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if self._start is not None:
+            start, self._start = self._start, None
+            if not self._begin(start, body, more_body):
+                self._passthrough = True
+                await self._send(start)
+                await self._send(message)
+                return
+            output = self._compress(body, final=not more_body)
+            headers = MutableHeaders(raw=start["headers"])
+            if more_body:
+                # Streamed: the compressed length is not known up front
+                del headers["Content-Length"]
+            else:
+                headers["Content-Length"] = str(len(output))
+            await self._send(start)
+        else:
+            output = self._compress(body, final=not more_body)
+
+        await self._send({"type": "http.response.body", "body": output, "more_body": more_body})
+        if not more_body:
+            self._record()
+
+    def _begin(self, start: Message, body: bytes, more_body: bool) -> bool:
+        """Decide whether to compress and set up the response headers."""
+        headers = MutableHeaders(raw=start["headers"])
+        level = compression_level(headers.get("content-type"), self.encoding)
+        if level is None or "content-encoding" in headers or start["status"] in (204, 304):
+            return False
+        headers.add_vary_header("Accept-Encoding")
+        if not more_body and len(body) < settings.COMPRESSION_MINIMUM_SIZE:
+            return False
+
+        self._compressor = COMPRESSORS[self.encoding](level)
+        headers["Content-Encoding"] = self.encoding
+        # The encoded body differs byte for byte from the one a strong ETag names
+        etag = headers.get("etag")
+        if etag and not etag.startswith("W/"):
+            headers["ETag"] = f"W/{etag}"
+        return True
+
+    def _compress(self, data: bytes, final: bool) -> bytes:
+        """Compress a chunk, accounting for its size and CPU cost."""
+        started = time.thread_time_ns()
+        output = self._compressor.compress(data, final)
+        self._cpu_ns += time.thread_time_ns() - started
+        self._bytes_in += len(data)
+        self._bytes_out += len(output)
+        return output
+
+    def _record(self) -> None:
+        """Report the response's compression ratio and CPU cost."""
+        prefix = f"compression.{self.encoding}"
+        metrics.increment(f"{prefix}.responses")
+        metrics.increment(f"{prefix}.bytes_in", self._bytes_in)
+        metrics.increment(f"{prefix}.bytes_out", self._bytes_out)
+        metrics.observe(f"{prefix}.cpu_ms", self._cpu_ns / 1e6)
+        if self._bytes_out:
+            metrics.observe(f"{prefix}.ratio", self._bytes_in / self._bytes_out)
@@ -4,6 +4,8 @@ from collections.abc import AsyncGenerator
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import DeclarativeBase
 
+from app.core.admission import TimedQueuePool, admission
+from app.core.cache import flush_pending_invalidations
 from app.core.config import settings
 
 
@@ -12,8 +14,11 @@ engine = create_async_engine(
     settings.DATABASE_URL,
     pool_size=settings.DATABASE_POOL_SIZE,
     max_overflow=settings.DATABASE_MAX_OVERFLOW,
+    pool_timeout=settings.DATABASE_POOL_TIMEOUT,
+    poolclass=TimedQueuePool,
     echo=settings.DEBUG,
 )
+admission.attach(engine.pool)
 
 # Session factory
 async_session_maker = async_sessionmaker(
@@ -40,4 +45,5 @@ async def get_db() -> AsyncGenerator[AsyncSession, None]:
             await session.rollback()
             raise
         finally:
+            await flush_pending_invalidations(session)
             await session.close()
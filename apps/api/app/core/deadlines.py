@@ -0,0 +1,110 @@
+"""Per-request deadlines enforced in the app and in Postgres.
+
+Each request gets a time budget from ``REQUEST_TIMEOUT_ROUTES`` (or the
+default), which a client can shorten with an ``X-Request-Timeout`` header in
+seconds. The handler is cancelled when the budget runs out, which also
+cancels a query asyncpg is waiting on, and every transaction opened for the
+request starts with ``SET LOCAL statement_timeout`` set to the time left, so
+Postgres stops work the client will no longer wait for. The handler's
+timer stops once the response starts: a 504 can no longer be sent, and a
+streamed body goes at the client's pace, bounded per transaction by the
+statement timeout instead.
+"""
+import asyncio
+import time
+from contextvars import ContextVar
+
+from sqlalchemy import event
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+
+# SQLSTATE of a statement cancelled by statement_timeout
+QUERY_CANCELED = "57014"
+
+_deadline: ContextVar[float | None] = ContextVar("request_deadline", default=None)
+
+
+class DeadlineExceeded(TimeoutError):
+    """The request's time budget ran out."""
+
+
+def remaining() -> float | None:
+    """Seconds left in the current request's budget, or None without a deadline."""
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+
+def is_timeout(exc: BaseException) -> bool:
+    """Check whether an error means a request or one of its statements ran out of time."""
+    if isinstance(exc, TimeoutError):
+        return True
+    return isinstance(exc, DBAPIError) and getattr(exc.orig, "sqlstate", None) == QUERY_CANCELED
+
+
+def request_budget(scope: Scope) -> float:
+    """Get a request's budget from its route, shortened by ``X-Request-Timeout``."""
+    budget = settings.REQUEST_TIMEOUT_ROUTES.get(
+        f"{scope['method']} {scope['path']}", settings.REQUEST_TIMEOUT_SECONDS
+    )
+    requested = Headers(scope=scope).get("x-request-timeout")
+    if requested:
+        try:
+            budget = min(budget, max(float(requested), settings.REQUEST_TIMEOUT_MIN_SECONDS))
+        except ValueError:
+            pass
+    return budget
+
+
+@event.listens_for(Session, "after_begin")
+def _apply_statement_timeout(session, transaction, connection) -> None:
+    """Cap the statements of a transaction opened during a request at its time left."""
+    left = remaining()
+    if left is None or connection.dialect.name != "postgresql":
+        return
+    if left <= 0:
+        raise DeadlineExceeded("Request deadline passed before the transaction started")
+    connection.exec_driver_sql(f"SET LOCAL statement_timeout = {max(1, int(left * 1000))}")
+
+
+class DeadlineMiddleware:
+    """Run each request under its deadline."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            scope["type"] != "http"
+            or scope["path"] in settings.REQUEST_TIMEOUT_EXEMPT_PATHS
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        budget = request_budget(scope)
+        # Requests run within another one (batch sub-requests) never outlive it
+        left = remaining()
+        if left is not None:
+            budget = max(0.0, min(budget, left))
+        token = _deadline.set(time.monotonic() + budget)
+        timeout = asyncio.timeout(budget)
+
+        async def send_started(message: Message) -> None:
+            if message["type"] == "http.response.start" and not timeout.expired():
+                timeout.reschedule(None)
+            await send(message)
+
+        try:
+            async with timeout:
+                await self.app(scope, receive, send_started)
+        except TimeoutError as exc:
+            if not timeout.expired():
+                raise
+            raise DeadlineExceeded(f"Request exceeded its {budget:g}s budget") from exc
+        finally:
+            _deadline.reset(token)
@@ -0,0 +1,98 @@
+"""ETags and conditional GET handling for API endpoints."""
+import functools
+import hashlib
+import inspect
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from fastapi import Request, Response
+
+from app.core.responses import JSON_MEDIA_TYPE, negotiated_response, response_media_type
+
+# Cache-Control policies: clients may keep private copies but must revalidate them
+REVALIDATE = "private, no-cache"
+REVALIDATE_RESOURCE = "private, max-age=0, must-revalidate"
+
+
+def make_etag(*parts: Any) -> str:
+    """Build a strong ETag from the given parts."""
+    digest = hashlib.blake2b(repr(parts).encode(), digest_size=16).hexdigest()
+    return f'"{digest}"'
+
+
+def entity_etag(*instances: Any) -> str:
+    """Build an ETag from the table, id and updated_at of ORM instances."""
+    return make_etag(*(
+        (instance.__tablename__, instance.id, instance.updated_at)
+        for instance in instances
+        if instance is not None
+    ))
+
+
+def user_etag(user: Any) -> str:
+    """Build an ETag for a user, covering last_login, which bypasses updated_at."""
+    return make_etag(entity_etag(user), user.last_login)
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Check whether the request's If-None-Match header matches an ETag."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # If-None-Match uses the weak comparison function
+    return etag in {tag.strip().removeprefix("W/") for tag in header.split(",")}
+
+
+def not_modified(etag: str, cache_control: str) -> Response:
+    """Build a 304 Not Modified response."""
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": cache_control})
+
+
+def conditional(
+    etag: Callable[..., Awaitable[str | None]],
+    cache_control: str = REVALIDATE,
+):
+    """Decorator adding ETag, Cache-Control and If-None-Match handling to a GET endpoint.
+
+    ``etag`` receives the endpoint's keyword arguments and should answer from
+    cached versions where possible, so a matching request gets its 304 before
+    the endpoint runs. When it returns None, the ETag is derived from the
+    serialized body instead.
+    """
+    def decorator(endpoint: Callable[..., Awaitable[Any]]):
+        signature = inspect.signature(endpoint)
+        wants_request = "request" in signature.parameters
+
+        @functools.wraps(endpoint)
+        async def wrapper(**kwargs: Any) -> Response:
+            request = kwargs["request"] if wants_request else kwargs.pop("request")
+
+            tag = await etag(**kwargs)
+            if tag is not None and response_media_type() != JSON_MEDIA_TYPE:
+                # Each representation needs its own strong ETag
+                tag = make_etag(tag, response_media_type())
+            if tag is not None and etag_matches(request, tag):
+                return not_modified(tag, cache_control)
+
+            response = await endpoint(**kwargs)
+            if not isinstance(response, Response):
+                response = negotiated_response(response)
+            if tag is None:
+                tag = make_etag(response.body)
+                if etag_matches(request, tag):
+                    return not_modified(tag, cache_control)
+
+            response.headers["ETag"] = tag
+            response.headers["Cache-Control"] = cache_control
+            return response
+
+        if not wants_request:
+            # Have FastAPI inject the request for the If-None-Match header
+            wrapper.__signature__ = signature.replace(parameters=[
+                *signature.parameters.values(),
+                inspect.Parameter("request", inspect.Parameter.KEYWORD_ONLY, annotation=Request),
+            ])
+        return wrapper
+    return decorator
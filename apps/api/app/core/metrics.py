@@ -0,0 +1,44 @@
+"""Lightweight in-process metrics registry."""
+from collections import defaultdict
+from typing import Any
+
+
+class Metrics:
+    """Per-worker counters and summaries, exposed as a JSON snapshot."""
+
+    def __init__(self):
+        self._counters: dict[str, float] = defaultdict(float)
+        self._summaries: dict[str, dict[str, float]] = {}
+
+    def increment(self, name: str, value: float = 1.0) -> None:
+        """Add to a counter."""
+        self._counters[name] += value
+
+    def observe(self, name: str, value: float) -> None:
+        """Record a sample in a count/sum/min/max summary."""
+        summary = self._summaries.get(name)
+        if summary is None:
+            self._summaries[name] = {"count": 1, "sum": value, "min": value, "max": value}
+            return
+        summary["count"] += 1
+        summary["sum"] += value
+        summary["min"] = min(summary["min"], value)
+        summary["max"] = max(summary["max"], value)
+
+    def snapshot(self) -> dict[str, Any]:
+        """Get the current values of all metrics."""
+        return {
+            "counters": dict(self._counters),
+            "summaries": {
+                name: {**summary, "avg": summary["sum"] / summary["count"]}
+                for name, summary in self._summaries.items()
+            },
+        }
+
+    def reset(self) -> None:
+        """Clear all metrics."""
+        self._counters.clear()
+        self._summaries.clear()
+
+
+metrics = Metrics()
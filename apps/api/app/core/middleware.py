@@ -5,9 +5,14 @@ from typing import Callable
 
 from fastapi import FastAPI, Request, Response
 from fastapi.responses import JSONResponse
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from starlette.middleware.base import BaseHTTPMiddleware
 
+from app.core.admission import service_unavailable
+from app.core.compression import CompressionMiddleware
+from app.core.deadlines import is_timeout
 from app.core.logging import bind_request_context, get_logger
+from app.services.query_guard import QueryTooExpensive
 
 logger = get_logger(__name__)
 
@@ -57,6 +62,17 @@ async def global_exception_handler(request: Request, exc: Exception) -> JSONResp
     """Global exception handler for unhandled errors."""
     request_id = getattr(request.state, "request_id", None)
     
+    # Deadline and statement timeouts are expected under load, not server bugs
+    if is_timeout(exc):
+        logger.warning("request_timed_out", error=str(exc), error_type=type(exc).__name__)
+        return JSONResponse(
+            status_code=504,
+            content={
+                "detail": "The request took too long to process",
+                "request_id": request_id,
+            },
+        )
+    
     logger.exception(
         "unhandled_exception",
         error=str(exc),
@@ -72,10 +88,24 @@ async def global_exception_handler(request: Request, exc: Exception) -> JSONResp
     )
 
 
+async def pool_timeout_handler(request: Request, exc: PoolTimeoutError) -> JSONResponse:
+    """Answer a request that timed out waiting for a DB connection with a 503."""
+    logger.warning("db_pool_timeout", error=str(exc))
+    return service_unavailable()
+
+
+async def query_too_expensive_handler(request: Request, exc: QueryTooExpensive) -> JSONResponse:
+    """Answer a list query rejected by the cost guard with a 400."""
+    return JSONResponse(status_code=400, content={"detail": str(exc)})
+
+
 def setup_middleware(app: FastAPI) -> None:
     """Configure all middleware for the application."""
+    app.add_middleware(CompressionMiddleware)
     app.add_middleware(RequestLoggingMiddleware)
     app.add_middleware(RequestIDMiddleware)
     
     # Add global exception handler
     app.add_exception_handler(Exception, global_exception_handler)
+    app.add_exception_handler(PoolTimeoutError, pool_timeout_handler)
+    app.add_exception_handler(QueryTooExpensive, query_too_expensive_handler)
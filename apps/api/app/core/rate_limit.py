@@ -0,0 +1,162 @@
+"""Cost-weighted token bucket rate limiting.
+
+Each client IP gets a bucket of cost units that refills at a steady rate;
+every request spends the cost of its route, so expensive endpoints such as
+login drain the bucket far faster than reads. Buckets live in process memory
+per worker, or in Redis when ``RATE_LIMIT_REDIS_ENABLED`` is set, falling back
+to memory while Redis is unavailable. Requests are rejected in middleware,
+before any routing, hashing or database work.
+"""
+import math
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from redis.exceptions import RedisError
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.core.metrics import metrics
+from app.core.redis import get_redis
+from app.core.responses import FastJSONResponse
+
+logger = get_logger(__name__)
+
+# Atomic token bucket update; returns seconds to wait, 0 if the cost was taken
+TOKEN_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local now = tonumber(ARGV[4])
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1]) or capacity
+local ts = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local wait = 0
+if tokens >= cost then
+    tokens = tokens - cost
+else
+    wait = (cost - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+return tostring(wait)
+"""
+
+
+@dataclass(frozen=True)
+class Limit:
+    """Bucket size (the allowed burst) and steady refill rate, in cost units."""
+    capacity: float
+    per_second: float
+
+
+class LocalBuckets:
+    """Token buckets in process memory, dropping the least recently used."""
+
+    def __init__(self, max_keys: int):
+        self.max_keys = max_keys
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def take(self, key: str, cost: float, limit: Limit) -> float:
+        """Spend ``cost`` from a bucket, returning seconds to wait if it is short."""
+        now = time.monotonic()
+        tokens, updated = self._buckets.get(key, (limit.capacity, now))
+        tokens = min(limit.capacity, tokens + (now - updated) * limit.per_second)
+        wait = 0.0
+        if tokens >= cost:
+            tokens -= cost
+        else:
+            wait = (cost - tokens) / limit.per_second
+        self._buckets[key] = (tokens, now)
+        self._buckets.move_to_end(key)
+        if len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return wait
+
+    def clear(self) -> None:
+        """Reset all buckets."""
+        self._buckets.clear()
+
+
+class RateLimiter:
+    """Token buckets shared through Redis when enabled, else per worker."""
+
+    def __init__(self):
+        self.local = LocalBuckets(settings.RATE_LIMIT_LOCAL_MAX_KEYS)
+        self._script = None
+        self._redis_down_until = 0.0
+
+    async def take(self, key: str, cost: float, limit: Limit) -> float:
+        """Spend ``cost`` from a bucket, returning seconds to wait if it is short."""
+        if cost <= 0:
+            return 0.0
+        if settings.RATE_LIMIT_REDIS_ENABLED and time.monotonic() >= self._redis_down_until:
+            if self._script is None:
+                self._script = get_redis().register_script(TOKEN_BUCKET_SCRIPT)
+            try:
+                wait = await self._script(
+                    keys=[f"ratelimit:{key}"],
+                    args=[limit.capacity, limit.per_second, cost, time.time()],
+                )
+                return float(wait)
+            except RedisError as exc:
+                # Limit per worker instead of failing requests
+                self._redis_down_until = time.monotonic() + settings.CACHE_REDIS_RETRY_SECONDS
+                logger.warning("rate_limit_redis_unavailable", error=str(exc))
+        return self.local.take(key, cost, limit)
+
+
+rate_limiter = RateLimiter()
+
+
+def route_cost(method: str, path: str) -> float:
+    """Get the cost of a request from the per-route weights, else its method."""
+    cost = settings.RATE_LIMIT_ROUTE_COSTS.get(f"{method} {path}")
+    if cost is not None:
+        return cost
+    if method in ("GET", "HEAD", "OPTIONS"):
+        return settings.RATE_LIMIT_READ_COST
+    return settings.RATE_LIMIT_WRITE_COST
+
+
+def retry_after(wait: float) -> str:
+    """Format a wait as a Retry-After header value in whole seconds."""
+    return str(max(1, math.ceil(wait)))
+
+
+def too_many_requests(wait: float) -> FastJSONResponse:
+    """Build a 429 response telling the client when to retry."""
+    return FastJSONResponse(
+        status_code=429,
+        content={"detail": "Too many requests"},
+        headers={"Retry-After": retry_after(wait)},
+    )
+
+
+class RateLimitMiddleware:
+    """Reject requests once the client IP's bucket cannot cover their cost."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self.limit = Limit(settings.RATE_LIMIT_IP_BURST, settings.RATE_LIMIT_IP_PER_SECOND)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not settings.RATE_LIMIT_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        client = scope.get("client")
+        ip = client[0] if client else "unknown"
+        cost = route_cost(scope["method"], scope["path"])
+        wait = await rate_limiter.take(f"ip:{ip}", cost, self.limit)
+        if wait > 0:
+            metrics.increment("rate_limit.rejected")
+            logger.info("rate_limited", client_ip=ip, path=scope["path"], retry_after=wait)
+            await too_many_requests(wait)(scope, receive, send)
+            return
+        await self.app(scope, receive, send)
@@ -0,0 +1,33 @@
+"""Shared Redis client management."""
+from redis.asyncio import Redis
+
+from app.core.config import settings
+
+_client: Redis | None = None
+
+
+def get_redis() -> Redis:
+    """Get the shared Redis client, creating it on first use."""
+    global _client
+    if _client is None:
+        _client = Redis.from_url(
+            settings.REDIS_URL,
+            decode_responses=True,
+            socket_timeout=settings.REDIS_SOCKET_TIMEOUT,
+            socket_connect_timeout=settings.REDIS_SOCKET_TIMEOUT,
+        )
+    return _client
+
+
+def set_redis(client: Redis | None) -> None:
+    """Replace the shared Redis client (e.g. with an in-process fake in tests)."""
+    global _client
+    _client = client
+
+
+async def close_redis() -> None:
+    """Close the shared Redis client."""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
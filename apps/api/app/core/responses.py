@@ -0,0 +1,160 @@
+"""Fast response pipeline built on precompiled Pydantic serializers.
+
+Responses are JSON by default; clients sending ``Accept: application/msgpack``
+get the same schemas encoded as MessagePack, with datetimes as timestamp
+extensions and enums as their values.
+"""
+import functools
+import inspect
+from collections.abc import Callable, Coroutine
+from contextvars import ContextVar
+from datetime import date, datetime, timezone
+from enum import Enum
+from typing import Any
+
+import msgpack
+from fastapi import Request, Response
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute
+from pydantic import TypeAdapter
+
+JSON_MEDIA_TYPE = "application/json"
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+MSGPACK_MEDIA_TYPES = (MSGPACK_MEDIA_TYPE, "application/x-msgpack", "application/vnd.msgpack")
+
+# Serializes models, containers, datetimes and enums without a jsonable pass
+_any_adapter = TypeAdapter(Any)
+
+# Media type negotiated for the current request by FastJSONRoute
+_response_media_type: ContextVar[str] = ContextVar("response_media_type", default=JSON_MEDIA_TYPE)
+
+
+def render_json(content: Any) -> bytes:
+    """Serialize a validated model (or plain data) straight to JSON bytes."""
+    return _any_adapter.dump_json(content)
+
+
+def _msgpack_default(value: Any) -> Any:
+    """Encode values msgpack has no native type for."""
+    if isinstance(value, datetime):
+        # Only aware datetimes map to timestamps; naive ones are stored as UTC
+        return value.replace(tzinfo=timezone.utc)
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, date):
+        return value.isoformat()
+    return _any_adapter.dump_python(value, mode="json")
+
+
+def render_msgpack(content: Any) -> bytes:
+    """Serialize a validated model (or plain data) to MessagePack bytes."""
+    return msgpack.packb(
+        _any_adapter.dump_python(content),
+        default=_msgpack_default,
+        datetime=True,
+    )
+
+
+def negotiate_media_type(accept: str | None) -> str:
+    """Pick JSON or MessagePack from an Accept header, preferring JSON on ties."""
+    if not accept:
+        return JSON_MEDIA_TYPE
+    qualities: dict[str, float] = {}
+    for part in accept.split(","):
+        media_type, _, params = part.partition(";")
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.partition("=")
+            if key.strip() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[media_type.strip().lower()] = quality
+
+    msgpack_quality = max((qualities.get(t, 0.0) for t in MSGPACK_MEDIA_TYPES), default=0.0)
+    json_quality = max(
+        qualities.get(t, 0.0) for t in (JSON_MEDIA_TYPE, "application/*", "*/*")
+    )
+    return MSGPACK_MEDIA_TYPE if msgpack_quality > json_quality else JSON_MEDIA_TYPE
+
+
+def response_media_type() -> str:
+    """Media type negotiated for the current request."""
+    return _response_media_type.get()
+
+
+def render(content: Any, media_type: str | None = None) -> bytes:
+    """Serialize content in the given (or the current request's) media type."""
+    if (media_type or response_media_type()) == MSGPACK_MEDIA_TYPE:
+        return render_msgpack(content)
+    return render_json(content)
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON response rendered by pydantic-core instead of the stdlib encoder."""
+
+    def render(self, content: Any) -> bytes:
+        return render_json(content)
+
+
+class MsgPackResponse(Response):
+    """MessagePack response sharing the JSON responses' schemas."""
+
+    media_type = MSGPACK_MEDIA_TYPE
+
+    def render(self, content: Any) -> bytes:
+        return render_msgpack(content)
+
+
+def negotiated_response(content: Any, status_code: int = 200) -> Response:
+    """Build a response in the current request's negotiated media type."""
+    if response_media_type() == MSGPACK_MEDIA_TYPE:
+        return MsgPackResponse(content, status_code=status_code)
+    return FastJSONResponse(content, status_code=status_code)
+
+
+class FastJSONRoute(APIRoute):
+    """Route whose endpoint results are serialized exactly once.
+
+    Endpoints already build instances of their ``response_model``, so the
+    returned model is rendered directly into a ``FastJSONResponse`` instead
+    of being dumped, re-validated and encoded again by FastAPI. The
+    ``response_model`` still documents the route in OpenAPI. Endpoints that
+    return a ``Response`` themselves are passed through unchanged.
+
+    The response media type is negotiated from the Accept header before the
+    endpoint runs, so results render as JSON or MessagePack.
+    """
+
+    def __init__(self, path: str, endpoint: Callable[..., Any], **kwargs: Any):
+        if inspect.iscoroutinefunction(endpoint) and not getattr(endpoint, "renders_once", False):
+            endpoint = _render_once(endpoint, kwargs.get("status_code") or 200)
+        super().__init__(path, endpoint, **kwargs)
+
+    def get_route_handler(self) -> Callable[[Request], Coroutine[Any, Any, Response]]:
+        handler = super().get_route_handler()
+
+        async def negotiating_handler(request: Request) -> Response:
+            token = _response_media_type.set(negotiate_media_type(request.headers.get("accept")))
+            try:
+                response = await handler(request)
+            finally:
+                _response_media_type.reset(token)
+            response.headers.add_vary_header("Accept")
+            return response
+
+        return negotiating_handler
+
+
+def _render_once(endpoint: Callable[..., Any], status_code: int) -> Callable[..., Any]:
+    """Wrap an endpoint so its result is returned as a rendered response."""
+    @functools.wraps(endpoint)
+    async def wrapper(**kwargs: Any) -> Any:
+        content = await endpoint(**kwargs)
+        if isinstance(content, Response):
+            return content
+        return negotiated_response(content, status_code=status_code)
+
+    wrapper.renders_once = True
+    return wrapper
@@ -1,11 +1,22 @@
 """Security utilities for authentication and authorization."""
+import hashlib
+import time
+import uuid
+from collections import OrderedDict
 from datetime import datetime, timedelta, timezone
-from typing import Any
+from functools import lru_cache
+from typing import Any, Protocol
 
-from jose import JWTError, jwt
+from jose import JWTError, jwk, jwt
 from passlib.context import CryptContext
 
 from app.core.config import settings
+from app.core.metrics import metrics
+
+try:
+    import jwt as pyjwt
+except ImportError:  # pragma: no cover - optional dependency
+    pyjwt = None
 
 # Password hashing
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
@@ -21,8 +32,131 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
-def create_access_token(subject: str | Any, expires_delta: timedelta | None = None) -> str:
-    """Create a JWT access token."""
+class JWTBackend(Protocol):
+    """Signs and verifies JWTs with one algorithm and prebuilt keys."""
+
+    def encode(self, claims: dict[str, Any]) -> str:
+        """Sign claims into a token."""
+
+    def decode(self, token: str) -> dict[str, Any] | None:
+        """Verify a token and get its claims, or None if it is invalid or expired."""
+
+
+class JoseBackend:
+    """JWT backend on python-jose."""
+
+    def __init__(self, algorithm: str, signing_key: str, verifying_key: str):
+        self.algorithm = algorithm
+        # Key objects skip python-jose's per-call key parsing
+        self._signing_key = jwk.construct(signing_key, algorithm)
+        self._verifying_key = jwk.construct(verifying_key, algorithm)
+
+    def encode(self, claims: dict[str, Any]) -> str:
+        return jwt.encode(claims, self._signing_key, algorithm=self.algorithm)
+
+    def decode(self, token: str) -> dict[str, Any] | None:
+        try:
+            return jwt.decode(token, self._verifying_key, algorithms=[self.algorithm])
+        except JWTError:
+            return None
+
+
+class PyJWTBackend:
+    """JWT backend on PyJWT."""
+
+    def __init__(self, algorithm: str, signing_key: str, verifying_key: str):
+        if pyjwt is None:
+            raise RuntimeError("JWT_BACKEND=pyjwt requires the PyJWT package")
+        self.algorithm = algorithm
+        # Keys are loaded once instead of on every call
+        implementation = pyjwt.get_algorithm_by_name(algorithm)
+        self._signing_key = implementation.prepare_key(signing_key)
+        self._verifying_key = implementation.prepare_key(verifying_key)
+
+    def encode(self, claims: dict[str, Any]) -> str:
+        return pyjwt.encode(claims, self._signing_key, algorithm=self.algorithm)
+
+    def decode(self, token: str) -> dict[str, Any] | None:
+        try:
+            return pyjwt.decode(token, self._verifying_key, algorithms=[self.algorithm])
+        except pyjwt.InvalidTokenError:
+            return None
+
+
+JWT_BACKENDS: dict[str, type] = {"jose": JoseBackend, "pyjwt": PyJWTBackend}
+
+
+@lru_cache
+def get_jwt_backend() -> JWTBackend:
+    """Get the configured JWT backend, building its keys on first use."""
+    if settings.ALGORITHM.startswith("HS"):
+        signing_key = verifying_key = settings.SECRET_KEY
+    else:
+        if not settings.JWT_PRIVATE_KEY or not settings.JWT_PUBLIC_KEY:
+            raise RuntimeError(
+                f"{settings.ALGORITHM} requires JWT_PRIVATE_KEY and JWT_PUBLIC_KEY"
+            )
+        signing_key, verifying_key = settings.JWT_PRIVATE_KEY, settings.JWT_PUBLIC_KEY
+    return JWT_BACKENDS[settings.JWT_BACKEND](settings.ALGORITHM, signing_key, verifying_key)
+
+
+class VerifiedTokenCache:
+    """Bounded LRU of already verified tokens.
+
+    Entries are keyed by a digest of the token, so raw credentials are not
+    held, and map to the verified claims. An entry is dropped once the
+    token's ``exp`` has passed, so a hit is as good as a fresh verification.
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._entries: OrderedDict[bytes, tuple[dict[str, Any], float]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def digest(token: str) -> bytes:
+        """Get the cache key of a token."""
+        return hashlib.blake2b(token.encode(), digest_size=16).digest()
+
+    def get(self, key: bytes) -> dict[str, Any] | None:
+        """Get the claims of a verified, unexpired token."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        payload, expires_at = entry
+        if expires_at <= time.time():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return payload
+
+    def put(self, key: bytes, payload: dict[str, Any]) -> None:
+        """Remember a verified token's claims until it expires."""
+        expires_at = payload.get("exp")
+        if self.maxsize <= 0 or not isinstance(expires_at, (int, float)):
+            return
+        self._entries[key] = (payload, expires_at)
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Forget all tokens."""
+        self._entries.clear()
+
+
+verified_tokens = VerifiedTokenCache(settings.TOKEN_CACHE_SIZE)
+
+
+def create_access_token(
+    subject: str | Any,
+    role: str,
+    token_version: int = 0,
+    expires_delta: timedelta | None = None,
+) -> str:
+    """Create a JWT access token carrying the user's role and token version."""
     if expires_delta:
         expire = datetime.now(timezone.utc) + expires_delta
     else:
@@ -30,21 +164,44 @@ def create_access_token(subject: str | Any, expires_delta: timedelta | None = No
             minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES
         )
     
-    to_encode = {"exp": expire, "sub": str(subject), "type": "access"}
-    return jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+    to_encode = {
+        "exp": expire,
+        "sub": str(subject),
+        "type": "access",
+        "role": role,
+        "ver": token_version,
+        "jti": uuid.uuid4().hex,
+    }
+    return get_jwt_backend().encode(to_encode)
 
 
-def create_refresh_token(subject: str | Any) -> str:
-    """Create a JWT refresh token."""
+def create_refresh_token(subject: str | Any, role: str, token_version: int = 0) -> str:
+    """Create a JWT refresh token carrying the user's role and token version."""
     expire = datetime.now(timezone.utc) + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
-    to_encode = {"exp": expire, "sub": str(subject), "type": "refresh"}
-    return jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+    to_encode = {
+        "exp": expire,
+        "sub": str(subject),
+        "type": "refresh",
+        "role": role,
+        "ver": token_version,
+        "jti": uuid.uuid4().hex,
+    }
+    return get_jwt_backend().encode(to_encode)
 
 
 def decode_token(token: str) -> dict[str, Any] | None:
-    """Decode and validate a JWT token."""
-    try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    """Decode and validate a JWT token.
+
+    Tokens seen before are answered from ``verified_tokens``; the returned
+    claims are shared and must not be modified.
+    """
+    key = verified_tokens.digest(token)
+    payload = verified_tokens.get(key)
+    if payload is not None:
+        metrics.increment("auth.token_cache.hits")
         return payload
-    except JWTError:
-        return None
+    metrics.increment("auth.token_cache.misses")
+    payload = get_jwt_backend().decode(token)
+    if payload is not None:
+        verified_tokens.put(key, payload)
+    return payload
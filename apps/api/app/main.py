@@ -1,14 +1,29 @@
 """FastAPI application entry point."""
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
+from app.api.deps import require_metrics_access
 from app.api.v1.router import api_router
+from app.core.admission import AdmissionMiddleware
+from app.core.cache import entity_cache
 from app.core.config import settings
+from app.core.deadlines import DeadlineMiddleware
 from app.core.logging import get_logger, setup_logging
+from app.core.metrics import metrics
 from app.core.middleware import setup_middleware
+from app.core.rate_limit import RateLimitMiddleware
+from app.core.redis import close_redis
+from app.core.responses import FastJSONResponse
 from app.schemas.common import HealthResponse
+from app.services.audit_archive import audit_archive
+from app.services.audit_stream import audit_stream
+from app.services.last_login import last_login_buffer
+from app.services.token_revocations import token_revocations
+from app.services.token_versions import token_versions
+from app.services.user_deletion import user_deletions
+from app.services.user_transfer import password_hasher
 
 # Setup logging on module load
 setup_logging()
@@ -24,7 +39,22 @@ async def lifespan(app: FastAPI):
         version=settings.APP_VERSION,
         environment=settings.ENVIRONMENT,
     )
+    await entity_cache.start()
+    last_login_buffer.start()
+    await token_versions.start()
+    await token_revocations.start()
+    audit_archive.start()
+    user_deletions.start()
     yield
+    await user_deletions.stop()
+    await audit_archive.stop()
+    password_hasher.stop()
+    await token_revocations.stop()
+    await token_versions.stop()
+    await last_login_buffer.stop()
+    await audit_stream.stop()
+    await entity_cache.stop()
+    await close_redis()
     logger.info("application_shutdown")
 
 
@@ -38,8 +68,15 @@ def create_application() -> FastAPI:
         docs_url=f"{settings.API_V1_PREFIX}/docs",
         redoc_url=f"{settings.API_V1_PREFIX}/redoc",
         lifespan=lifespan,
+        default_response_class=FastJSONResponse,
     )
     
+    # Deadlines start once a request is admitted; admission control and rate limiting
+    # sit inside CORS so their 503/429 responses carry CORS headers
+    app.add_middleware(DeadlineMiddleware)
+    app.add_middleware(AdmissionMiddleware)
+    app.add_middleware(RateLimitMiddleware)
+    
     # Setup CORS
     app.add_middleware(
         CORSMiddleware,
@@ -65,6 +102,11 @@ def create_application() -> FastAPI:
             environment=settings.ENVIRONMENT,
         )
     
+    @app.get("/metrics", tags=["Health"], dependencies=[Depends(require_metrics_access)])
+    async def metrics_snapshot():
+        """In-process metrics for this worker (admins or ``METRICS_TOKEN`` only)."""
+        return metrics.snapshot()
+    
     return app
 
 
@@ -1,14 +1,26 @@
 """Database models."""
-from app.models.audit_log import AuditAction, AuditLog
+from app.models.audit_archive_file import AuditArchiveFile
+from app.models.audit_log import AuditAction, AuditLog, AuditResourceType
 from app.models.project import Project, ProjectPriority, ProjectStatus
+from app.models.revoked_token import RevokedToken
+from app.models.tombstone import Tombstone
 from app.models.user import User, UserRole
+from app.models.user_agent import UserAgent
+from app.models.user_deletion import UserDeletion, UserDeletionStatus
 
 __all__ = [
     "User",
     "UserRole",
+    "UserDeletion",
+    "UserDeletionStatus",
     "Project",
     "ProjectStatus",
     "ProjectPriority",
     "AuditLog",
     "AuditAction",
+    "AuditResourceType",
+    "UserAgent",
+    "AuditArchiveFile",
+    "Tombstone",
+    "RevokedToken",
 ]
@@ -0,0 +1,39 @@
+"""Manifest of audit log archive files."""
+from datetime import date, datetime
+
+from sqlalchemy import ARRAY, BigInteger, Date, DateTime, Index, Integer, String, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.database import Base
+
+
+class AuditArchiveFile(Base):
+    """One compressed file of archived audit logs, all created on the same day.
+    
+    The actions and resource types present are recorded so scans can skip
+    files that cannot match a filter without reading them.
+    """
+    
+    __tablename__ = "audit_archive_files"
+    __table_args__ = (
+        Index("ix_audit_archive_files_created_range", "min_created_at", "max_created_at"),
+    )
+    
+    id: Mapped[int] = mapped_column(primary_key=True)
+    # Storage key, relative to the archive root
+    path: Mapped[str] = mapped_column(String(512), unique=True, nullable=False)
+    day: Mapped[date] = mapped_column(Date, nullable=False)
+    first_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    last_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    row_count: Mapped[int] = mapped_column(Integer, nullable=False)
+    size_bytes: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    min_created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    max_created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    actions: Mapped[list[str]] = mapped_column(ARRAY(String(32)), nullable=False)
+    resource_types: Mapped[list[str]] = mapped_column(ARRAY(String(16)), nullable=False)
+    archived_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
+    
+    def __repr__(self) -> str:
+        return f"<AuditArchiveFile {self.path}>"
@@ -1,12 +1,14 @@
 """Audit log model for tracking sensitive actions."""
 import enum
+import ipaddress
 from datetime import datetime
 
-from sqlalchemy import DateTime, Enum, ForeignKey, Integer, String, Text, func
-from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy import DateTime, Enum, ForeignKey, Index, Integer, String, TypeDecorator, func
+from sqlalchemy.dialects.postgresql import INET, JSONB
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.core.database import Base
+from app.models.user_agent import UserAgent
 
 
 class AuditAction(str, enum.Enum):
@@ -30,24 +32,58 @@ class AuditAction(str, enum.Enum):
     project_status_change = "project_status_change"
 
 
+class AuditResourceType(str, enum.Enum):
+    """Kinds of resource an audit log refers to."""
+    auth = "auth"
+    user = "user"
+    project = "project"
+
+
+class IPAddress(TypeDecorator):
+    """IP address stored as ``INET`` and read back as a string."""
+    impl = INET
+    cache_ok = True
+    
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        try:
+            return str(ipaddress.ip_address(value))
+        except ValueError:
+            # Not an IP, e.g. a test client or Unix socket peer name
+            return None
+    
+    def process_result_value(self, value, dialect):
+        return None if value is None else str(value)
+
+
 class AuditLog(Base):
     """Audit log for tracking all sensitive actions."""
     
     __tablename__ = "audit_logs"
+    __table_args__ = (
+        # List filters, newest first
+        Index("ix_audit_logs_user_id_created_at", "user_id", "created_at"),
+        Index("ix_audit_logs_action_created_at", "action", "created_at"),
+        Index("ix_audit_logs_resource_type_created_at", "resource_type", "created_at"),
+    )
     
-    id: Mapped[int] = mapped_column(primary_key=True, index=True)
+    id: Mapped[int] = mapped_column(primary_key=True)
     user_id: Mapped[int | None] = mapped_column(
-        ForeignKey("users.id", ondelete="SET NULL"), nullable=True, index=True
+        ForeignKey("users.id", ondelete="SET NULL"), nullable=True
     )
     action: Mapped[AuditAction] = mapped_column(
         Enum(AuditAction, values_callable=lambda x: [e.value for e in x]), 
-        nullable=False, index=True
+        nullable=False
+    )
+    resource_type: Mapped[AuditResourceType] = mapped_column(
+        Enum(AuditResourceType, values_callable=lambda x: [e.value for e in x]), 
+        nullable=False
     )
-    resource_type: Mapped[str] = mapped_column(String(50), nullable=False, index=True)
     resource_id: Mapped[int | None] = mapped_column(Integer, nullable=True)
     details: Mapped[dict | None] = mapped_column(JSONB, nullable=True)
-    ip_address: Mapped[str | None] = mapped_column(String(45), nullable=True)
-    user_agent: Mapped[str | None] = mapped_column(Text, nullable=True)
+    ip_address: Mapped[str | None] = mapped_column(IPAddress, nullable=True)
+    user_agent_id: Mapped[int | None] = mapped_column(ForeignKey("user_agents.id"), nullable=True)
     request_id: Mapped[str | None] = mapped_column(String(36), nullable=True, index=True)
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), server_default=func.now(), nullable=False, index=True
@@ -55,6 +91,13 @@ class AuditLog(Base):
     
     # Relationships
     user: Mapped["User | None"] = relationship("User", back_populates="audit_logs", lazy="selectin")
+    # Read-only; set user_agent_id from AuditService when writing
+    agent: Mapped[UserAgent | None] = relationship(lazy="joined", viewonly=True)
+    
+    @property
+    def user_agent(self) -> str | None:
+        """The User-Agent string, from the joined ``user_agents`` row."""
+        return self.agent.value if self.agent is not None else None
     
     def __repr__(self) -> str:
         return f"<AuditLog {self.action} by user {self.user_id}>"
@@ -2,7 +2,19 @@
 import enum
 from datetime import datetime
 
-from sqlalchemy import DateTime, Enum, ForeignKey, Integer, String, Text, func
+from sqlalchemy import (
+    BigInteger,
+    DateTime,
+    Enum,
+    FetchedValue,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    Text,
+    func,
+    text,
+)
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.core.database import Base
@@ -29,8 +41,17 @@ class Project(Base):
     """Project model for managing projects."""
     
     __tablename__ = "projects"
+    __table_args__ = (
+        # Sorting by last update, and change feed ordering
+        Index("ix_projects_updated_at_id", "updated_at", "id"),
+        Index("ix_projects_change_xid_id", "change_xid", "id"),
+        # Default list order, alone and after the status and owner filters
+        Index("ix_projects_created_at", "created_at"),
+        Index("ix_projects_status_created_at", "status", "created_at"),
+        Index("ix_projects_owner_id_created_at", "owner_id", "created_at"),
+    )
     
-    id: Mapped[int] = mapped_column(primary_key=True, index=True)
+    id: Mapped[int] = mapped_column(primary_key=True)
     name: Mapped[str] = mapped_column(String(255), nullable=False, index=True)
     description: Mapped[str | None] = mapped_column(Text, nullable=True)
     status: Mapped[ProjectStatus] = mapped_column(
@@ -45,7 +66,7 @@ class Project(Base):
     start_date: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
     end_date: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
     owner_id: Mapped[int] = mapped_column(
-        ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True
+        ForeignKey("users.id", ondelete="CASCADE"), nullable=False
     )
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), server_default=func.now(), nullable=False
@@ -53,6 +74,15 @@ class Project(Base):
     updated_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False
     )
+    # Writing transaction's ID, stamped by a trigger on insert and update; orders change
+    # feeds, which read a transaction's rows once it has committed. Deferred: only feeds use it
+    change_xid: Mapped[int] = mapped_column(
+        BigInteger,
+        server_default=text("pg_current_xact_id()::text::bigint"),
+        server_onupdate=FetchedValue(),
+        nullable=False,
+        deferred=True,
+    )
     
     # Relationships
     owner: Mapped["User"] = relationship("User", back_populates="projects", lazy="selectin")
@@ -0,0 +1,30 @@
+"""Tombstone model recording deleted rows for change feeds."""
+from datetime import datetime
+
+from sqlalchemy import BigInteger, DateTime, Index, Integer, String, func, text
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.database import Base
+
+
+class Tombstone(Base):
+    """Deleted row, written by an AFTER DELETE trigger on each synced table."""
+    
+    __tablename__ = "tombstones"
+    __table_args__ = (
+        Index("ix_tombstones_resource_type_change_xid_id", "resource_type", "change_xid", "id"),
+    )
+    
+    id: Mapped[int] = mapped_column(primary_key=True)
+    resource_type: Mapped[str] = mapped_column(String(50), nullable=False)  # Table name
+    resource_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    deleted_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
+    # Deleting transaction's ID; orders change feeds like the synced tables' change_xid
+    change_xid: Mapped[int] = mapped_column(
+        BigInteger, server_default=text("pg_current_xact_id()::text::bigint"), nullable=False
+    )
+    
+    def __repr__(self) -> str:
+        return f"<Tombstone {self.resource_type} {self.resource_id}>"
@@ -2,7 +2,18 @@
 import enum
 from datetime import datetime
 
-from sqlalchemy import Boolean, DateTime, Enum, String, func
+from sqlalchemy import (
+    BigInteger,
+    Boolean,
+    DateTime,
+    Enum,
+    FetchedValue,
+    Index,
+    Integer,
+    String,
+    func,
+    text,
+)
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.core.database import Base
@@ -19,30 +30,58 @@ class User(Base):
     """User model for authentication and authorization."""
     
     __tablename__ = "users"
+    __table_args__ = (
+        # Sorting by last update, and change feed ordering
+        Index("ix_users_updated_at_id", "updated_at", "id"),
+        Index("ix_users_change_xid_id", "change_xid", "id"),
+        # Token revocation refresh
+        Index(
+            "ix_users_revoked_token_version",
+            "id",
+            "token_version",
+            postgresql_where=text("token_version > 0"),
+        ),
+        # Default list order, alone and after the role filter
+        Index("ix_users_created_at", "created_at"),
+        Index("ix_users_role_created_at", "role", "created_at"),
+    )
     
-    id: Mapped[int] = mapped_column(primary_key=True, index=True)
+    id: Mapped[int] = mapped_column(primary_key=True)
     email: Mapped[str] = mapped_column(String(255), unique=True, index=True, nullable=False)
-    hashed_password: Mapped[str] = mapped_column(String(255), nullable=False)
+    # Secret columns are left out of cached snapshots
+    hashed_password: Mapped[str] = mapped_column(String(255), nullable=False, info={"secret": True})
     full_name: Mapped[str] = mapped_column(String(255), nullable=False)
     role: Mapped[UserRole] = mapped_column(
         Enum(UserRole, values_callable=lambda x: [e.value for e in x]), 
         default=UserRole.viewer, nullable=False
     )
     is_active: Mapped[bool] = mapped_column(Boolean, default=True, nullable=False)
+    # Bumped to revoke all issued tokens, e.g. on role change or deactivation
+    token_version: Mapped[int] = mapped_column(Integer, default=0, server_default="0", nullable=False)
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), server_default=func.now(), nullable=False
     )
     updated_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False
     )
+    # Writing transaction's ID, stamped by a trigger on insert and update; orders change
+    # feeds, which read a transaction's rows once it has committed. Deferred: only feeds use it
+    change_xid: Mapped[int] = mapped_column(
+        BigInteger,
+        server_default=text("pg_current_xact_id()::text::bigint"),
+        server_onupdate=FetchedValue(),
+        nullable=False,
+        deferred=True,
+    )
     last_login: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
     
-    # Relationships
+    # Relationships; never loaded implicitly, and removed by the database's
+    # ON DELETE rules (see UserDeletion) rather than row by row by the ORM
     projects: Mapped[list["Project"]] = relationship(
-        "Project", back_populates="owner", lazy="selectin"
+        "Project", back_populates="owner", lazy="raise", passive_deletes=True
     )
     audit_logs: Mapped[list["AuditLog"]] = relationship(
-        "AuditLog", back_populates="user", lazy="selectin"
+        "AuditLog", back_populates="user", lazy="raise", passive_deletes=True
     )
     
     def __repr__(self) -> str:
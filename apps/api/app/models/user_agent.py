@@ -0,0 +1,26 @@
+"""Interned User-Agent strings referenced by audit logs."""
+import hashlib
+import uuid
+
+from sqlalchemy import Text, Uuid
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.database import Base
+
+
+def user_agent_digest(value: str) -> uuid.UUID:
+    """Hash a User-Agent for deduplication; equal to Postgres ``md5(value)::uuid``."""
+    return uuid.UUID(bytes=hashlib.md5(value.encode()).digest())
+
+
+class UserAgent(Base):
+    """Distinct User-Agent string, stored once however many audit logs share it."""
+    
+    __tablename__ = "user_agents"
+    
+    id: Mapped[int] = mapped_column(primary_key=True)
+    digest: Mapped[uuid.UUID] = mapped_column(Uuid, unique=True, nullable=False)
+    value: Mapped[str] = mapped_column(Text, nullable=False)
+    
+    def __repr__(self) -> str:
+        return f"<UserAgent {self.value[:40]}>"
@@ -0,0 +1,66 @@
+"""Background user deletion jobs."""
+import enum
+from datetime import datetime
+
+from sqlalchemy import DateTime, Enum, Index, Integer, String, Text, func, text
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.database import Base
+
+
+class UserDeletionStatus(str, enum.Enum):
+    """User deletion job states."""
+    pending = "pending"
+    running = "running"
+    completed = "completed"
+    failed = "failed"
+
+
+class UserDeletion(Base):
+    """Deletion of a user whose dependent rows are removed in batches.
+    
+    The user is deactivated when the job is created; projects are deleted
+    (or reassigned) and audit logs detached a batch at a time before the
+    user row itself goes. User IDs are plain columns, not foreign keys, so
+    the job outlives the user it deleted.
+    """
+    
+    __tablename__ = "user_deletions"
+    __table_args__ = (
+        # Unfinished jobs, polled by workers; one per user at a time
+        Index(
+            "ix_user_deletions_unfinished_user_id",
+            "user_id",
+            unique=True,
+            postgresql_where=text("status IN ('pending', 'running')"),
+        ),
+    )
+    
+    id: Mapped[int] = mapped_column(primary_key=True)
+    user_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    email: Mapped[str] = mapped_column(String(255), nullable=False)
+    requested_by_id: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    # Projects go to this user instead of being deleted
+    reassign_to_id: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    status: Mapped[UserDeletionStatus] = mapped_column(
+        Enum(UserDeletionStatus, values_callable=lambda x: [e.value for e in x]),
+        default=UserDeletionStatus.pending, nullable=False
+    )
+    projects_total: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    projects_done: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    audit_logs_total: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    audit_logs_done: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    # Last error; running jobs are retried with backoff, failed ones are not
+    error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    # Failed runs since the job last made progress
+    attempts: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False
+    )
+    completed_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    
+    def __repr__(self) -> str:
+        return f"<UserDeletion {self.user_id} {self.status.value}>"
@@ -1,22 +1,42 @@
 """Pydantic schemas for API validation."""
-from app.schemas.auth import AuthResponse, LoginRequest, RefreshTokenRequest, TokenResponse
+from app.schemas.auth import (
+    AuthResponse,
+    LoginRequest,
+    LogoutRequest,
+    RefreshTokenRequest,
+    TokenPrincipal,
+    TokenResponse,
+)
 from app.schemas.audit_log import AuditLogFilter, AuditLogListResponse, AuditLogResponse
+from app.schemas.batch import BatchRequest, BatchResponse, BatchSubRequest, BatchSubResponse
 from app.schemas.common import (
     ErrorResponse,
     HealthResponse,
     MessageResponse,
     PaginationParams,
     SortParams,
+    SparseFieldset,
+    SparseListResponse,
     StatsResponse,
 )
 from app.schemas.project import (
+    ProjectBulkChanges,
+    ProjectBulkDelete,
+    ProjectBulkResponse,
+    ProjectBulkResult,
+    ProjectBulkUpdate,
+    ProjectChangesResponse,
     ProjectCreate,
     ProjectListResponse,
     ProjectResponse,
     ProjectUpdate,
 )
 from app.schemas.user import (
+    UserChangesResponse,
     UserCreate,
+    UserDeletionResponse,
+    UserImportError,
+    UserImportResponse,
     UserListResponse,
     UserPasswordUpdate,
     UserResponse,
@@ -26,27 +46,46 @@ from app.schemas.user import (
 __all__ = [
     # Auth
     "LoginRequest",
+    "LogoutRequest",
     "TokenResponse",
     "RefreshTokenRequest",
     "AuthResponse",
+    "TokenPrincipal",
     # User
     "UserCreate",
     "UserUpdate",
     "UserPasswordUpdate",
     "UserResponse",
     "UserListResponse",
+    "UserChangesResponse",
+    "UserDeletionResponse",
+    "UserImportError",
+    "UserImportResponse",
     # Project
     "ProjectCreate",
     "ProjectUpdate",
     "ProjectResponse",
     "ProjectListResponse",
+    "ProjectChangesResponse",
+    "ProjectBulkChanges",
+    "ProjectBulkUpdate",
+    "ProjectBulkDelete",
+    "ProjectBulkResult",
+    "ProjectBulkResponse",
     # Audit
     "AuditLogResponse",
     "AuditLogListResponse",
     "AuditLogFilter",
+    # Batch
+    "BatchSubRequest",
+    "BatchRequest",
+    "BatchSubResponse",
+    "BatchResponse",
     # Common
     "PaginationParams",
     "SortParams",
+    "SparseFieldset",
+    "SparseListResponse",
     "MessageResponse",
     "ErrorResponse",
     "HealthResponse",
@@ -4,7 +4,7 @@ from typing import Any
 
 from pydantic import BaseModel, ConfigDict
 
-from app.models.audit_log import AuditAction
+from app.models.audit_log import AuditAction, AuditResourceType
 
 
 # Response schemas
@@ -13,7 +13,7 @@ class AuditLogResponse(BaseModel):
     id: int
     user_id: int | None
     action: AuditAction
-    resource_type: str
+    resource_type: AuditResourceType
     resource_id: int | None
     details: dict[str, Any] | None
     ip_address: str | None
@@ -32,6 +32,8 @@ class AuditLogListResponse(BaseModel):
     page: int
     page_size: int
     pages: int
+    # Set when the total is the query planner's estimate instead of an exact count
+    total_estimated: bool = False
 
 
 # Filter schemas
@@ -39,7 +41,7 @@ class AuditLogFilter(BaseModel):
     """Filter options for audit logs."""
     user_id: int | None = None
     action: AuditAction | None = None
-    resource_type: str | None = None
+    resource_type: AuditResourceType | None = None
     start_date: datetime | None = None
     end_date: datetime | None = None
     search: str | None = None
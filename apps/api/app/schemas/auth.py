@@ -1,6 +1,10 @@
 """Authentication schemas."""
-from pydantic import BaseModel, EmailStr
+from datetime import datetime
+from typing import Any
 
+from pydantic import BaseModel, ConfigDict, EmailStr
+
+from app.models.user import UserRole
 from app.schemas.user import UserResponse
 
 
@@ -22,7 +26,34 @@ class RefreshTokenRequest(BaseModel):
     refresh_token: str
 
 
+class LogoutRequest(BaseModel):
+    """Logout request schema; the refresh token is revoked along with the access token."""
+    refresh_token: str
+
+
 class AuthResponse(BaseModel):
     """Authentication response with user and tokens."""
     user: UserResponse
     tokens: TokenResponse
+
+
+class TokenPrincipal(BaseModel):
+    """Caller identity and role taken from a verified token."""
+    id: int
+    role: UserRole
+    token_version: int = 0
+    jti: str
+    expires_at: datetime
+    
+    model_config = ConfigDict(frozen=True)
+    
+    @classmethod
+    def from_claims(cls, claims: dict[str, Any]) -> "TokenPrincipal":
+        """Build from verified token claims (raises KeyError or ValidationError)."""
+        return cls(
+            id=claims["sub"],
+            role=claims["role"],
+            token_version=claims["ver"],
+            jti=claims["jti"],
+            expires_at=claims["exp"],
+        )
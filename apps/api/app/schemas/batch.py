@@ -0,0 +1,31 @@
+"""Batch request schemas."""
+from typing import Any
+
+from pydantic import BaseModel, Field
+
+from app.core.config import settings
+
+
+class BatchSubRequest(BaseModel):
+    """A GET request run as part of a batch."""
+    id: str | None = None  # Echoed back to match responses to requests
+    path: str = Field(..., min_length=1, max_length=2048)  # e.g. "/api/v1/projects?page=2"
+
+
+class BatchRequest(BaseModel):
+    """Batch of GET sub-requests sharing one authentication."""
+    requests: list[BatchSubRequest] = Field(..., min_length=1, max_length=settings.BATCH_MAX_REQUESTS)
+
+
+class BatchSubResponse(BaseModel):
+    """Result of one sub-request."""
+    id: str | None = None
+    path: str
+    status: int
+    etag: str | None = None
+    body: Any = None
+
+
+class BatchResponse(BaseModel):
+    """Results of a batch, in request order."""
+    responses: list[BatchSubResponse]
@@ -1,5 +1,5 @@
 """Common schemas used across the application."""
-from typing import Generic, TypeVar
+from typing import Any, Generic, TypeVar
 
 from pydantic import BaseModel, Field
 
@@ -30,6 +30,24 @@ class SortParams(BaseModel):
     sort_order: str = Field("desc", pattern="^(asc|desc)$")
 
 
+class SparseFieldset(BaseModel):
+    """Requested subset of item fields and related resources to expand."""
+    fields: list[str]
+    expand: list[str] = []
+
+
+class SparseListResponse(BaseModel):
+    """Paginated list of partial items with expanded resources keyed by ID."""
+    items: list[dict[str, Any]]
+    included: dict[str, dict[int, Any]] = {}
+    total: int
+    page: int
+    page_size: int
+    pages: int
+    # Set when the total is the query planner's estimate instead of an exact count
+    total_estimated: bool = False
+
+
 class MessageResponse(BaseModel):
     """Simple message response."""
     message: str
@@ -1,8 +1,10 @@
 """Project schemas for request/response validation."""
 from datetime import datetime
+from typing import Literal
 
-from pydantic import BaseModel, ConfigDict, Field
+from pydantic import BaseModel, ConfigDict, Field, field_validator
 
+from app.core.config import settings
 from app.models.project import ProjectPriority, ProjectStatus
 from app.schemas.user import UserResponse
 
@@ -36,6 +38,32 @@ class ProjectUpdate(BaseModel):
     owner_id: int | None = None
 
 
+class ProjectBulkChanges(BaseModel):
+    """Changes applied to every project of a bulk update."""
+    status: ProjectStatus | None = None
+    priority: ProjectPriority | None = None
+    owner_id: int | None = None
+    
+    @field_validator("status", "priority", "owner_id", mode="before")
+    @classmethod
+    def not_null(cls, value):
+        """Reject explicit nulls; a field is left unchanged by omitting it."""
+        if value is None:
+            raise ValueError("Cannot be null; omit the field to leave it unchanged")
+        return value
+
+
+class ProjectBulkUpdate(BaseModel):
+    """Schema for updating many projects at once."""
+    ids: list[int] = Field(..., min_length=1, max_length=settings.BULK_MAX_IDS)
+    changes: ProjectBulkChanges
+
+
+class ProjectBulkDelete(BaseModel):
+    """Schema for deleting many projects at once."""
+    ids: list[int] = Field(..., min_length=1, max_length=settings.BULK_MAX_IDS)
+
+
 # Response schemas
 class ProjectResponse(ProjectBase):
     """Project response schema."""
@@ -55,3 +83,25 @@ class ProjectListResponse(BaseModel):
     page: int
     page_size: int
     pages: int
+    # Set when the total is the query planner's estimate instead of an exact count
+    total_estimated: bool = False
+
+
+class ProjectChangesResponse(BaseModel):
+    """Projects created, updated or deleted since a change token."""
+    items: list[ProjectResponse]
+    deleted: list[int]
+    next_token: str
+    has_more: bool
+
+
+class ProjectBulkResult(BaseModel):
+    """Outcome of a bulk operation for one project ID."""
+    id: int
+    status: Literal["updated", "deleted", "not_found", "forbidden"]
+
+
+class ProjectBulkResponse(BaseModel):
+    """Per-ID outcomes of a bulk operation, in request order."""
+    results: list[ProjectBulkResult]
+    succeeded: int
@@ -4,6 +4,7 @@ from datetime import datetime
 from pydantic import BaseModel, ConfigDict, EmailStr, Field
 
 from app.models.user import UserRole
+from app.models.user_deletion import UserDeletionStatus
 
 
 # Base schemas
@@ -52,3 +53,47 @@ class UserListResponse(BaseModel):
     page: int
     page_size: int
     pages: int
+    # Set when the total is the query planner's estimate instead of an exact count
+    total_estimated: bool = False
+
+
+class UserImportError(BaseModel):
+    """An import row that was not created."""
+    line: int  # Line number in the uploaded file
+    email: str | None = None
+    error: str
+
+
+class UserImportResponse(BaseModel):
+    """Outcome of a bulk user import."""
+    created: int
+    errors: list[UserImportError]
+
+
+class UserDeletionResponse(BaseModel):
+    """Progress of a background user deletion."""
+    id: int
+    user_id: int
+    email: str
+    reassign_to_id: int | None = None
+    status: UserDeletionStatus
+    # Totals are counted when the job starts running
+    projects_total: int | None = None
+    projects_done: int
+    audit_logs_total: int | None = None
+    audit_logs_done: int
+    error: str | None = None
+    attempts: int
+    created_at: datetime
+    updated_at: datetime
+    completed_at: datetime | None = None
+    
+    model_config = ConfigDict(from_attributes=True)
+
+
+class UserChangesResponse(BaseModel):
+    """Users created, updated or deleted since a change token."""
+    items: list[UserResponse]
+    deleted: list[int]
+    next_token: str
+    has_more: bool
@@ -0,0 +1,355 @@
+"""Archival of old audit logs to compressed NDJSON files.
+
+Audit logs older than ``AUDIT_ARCHIVE_AFTER_DAYS`` are moved out of the
+``audit_logs`` table into files partitioned by day (``date=YYYY-MM-DD/``),
+one JSON object per line, compressed with zstd when ``zstandard`` is
+installed and gzip otherwise. Each file is recorded in the
+``audit_archive_files`` manifest in the same transaction that deletes its
+rows, so a row is either in the table or in a file the manifest lists.
+Scans prune files by the manifest's date range, actions and resource types
+before reading any of them, then read the rest newest first only until the
+requested number of matches is certain.
+"""
+import asyncio
+import gzip
+import heapq
+import json
+import os
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+from itertools import groupby
+from pathlib import Path
+from typing import Any, Protocol
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import async_session_maker
+from app.core.logging import get_logger
+from app.core.metrics import metrics
+from app.models.audit_archive_file import AuditArchiveFile
+from app.models.audit_log import AuditAction, AuditLog, AuditResourceType
+from app.models.user import User
+from app.models.user_agent import UserAgent
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+logger = get_logger(__name__)
+
+# Key for the advisory lock that keeps one worker archiving at a time
+ARCHIVE_LOCK_ID = 0x61756469
+
+# Columns written to archive files, in order
+ARCHIVED_COLUMNS = (
+    AuditLog.id,
+    AuditLog.user_id,
+    AuditLog.action,
+    AuditLog.resource_type,
+    AuditLog.resource_id,
+    AuditLog.details,
+    AuditLog.ip_address,
+    UserAgent.value.label("user_agent"),
+    AuditLog.request_id,
+    AuditLog.created_at,
+)
+
+
+def _compress(data: bytes) -> tuple[bytes, str]:
+    """Compress a file body, returning it and the file extension."""
+    if zstandard is not None:
+        compressor = zstandard.ZstdCompressor(level=settings.AUDIT_ARCHIVE_COMPRESSION_LEVEL)
+        return compressor.compress(data), ".ndjson.zst"
+    return gzip.compress(data, compresslevel=min(settings.AUDIT_ARCHIVE_COMPRESSION_LEVEL, 9)), ".ndjson.gz"
+
+
+def _decompress(path: str, data: bytes) -> bytes:
+    """Decompress a file body by its extension."""
+    if path.endswith(".zst"):
+        if zstandard is None:
+            raise RuntimeError(f"Reading {path} requires the zstandard package")
+        return zstandard.ZstdDecompressor().decompressobj().decompress(data)
+    return gzip.decompress(data)
+
+
+class ArchiveStorage(Protocol):
+    """Object-style storage of archive files by key."""
+
+    def write(self, key: str, data: bytes) -> None:
+        """Store a file, replacing any previous one under the key."""
+
+    def read(self, key: str) -> bytes:
+        """Read a file."""
+
+    def delete(self, key: str) -> None:
+        """Remove a file if it exists."""
+
+
+class LocalArchiveStorage:
+    """Archive files under a local directory, with keys as relative paths."""
+
+    def __init__(self, root: str):
+        self.root = Path(root)
+
+    def write(self, key: str, data: bytes) -> None:
+        path = self.root / key
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write then rename, so readers never see a partial file
+        tmp = path.with_name(path.name + ".tmp")
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+
+    def read(self, key: str) -> bytes:
+        return (self.root / key).read_bytes()
+
+    def delete(self, key: str) -> None:
+        (self.root / key).unlink(missing_ok=True)
+
+
+archive_storage: ArchiveStorage = LocalArchiveStorage(settings.AUDIT_ARCHIVE_PATH)
+
+
+@dataclass
+class ArchivedAuditLog:
+    """Audit log read back from an archive file, shaped like an ``AuditLog``."""
+    id: int
+    user_id: int | None
+    action: AuditAction
+    resource_type: AuditResourceType
+    resource_id: int | None
+    details: dict[str, Any] | None
+    ip_address: str | None
+    user_agent: str | None
+    request_id: str | None
+    created_at: datetime
+    user: User | None = None
+
+    @classmethod
+    def from_record(cls, record: dict[str, Any]) -> "ArchivedAuditLog":
+        """Build from one decoded NDJSON line."""
+        return cls(
+            **{
+                **record,
+                "action": AuditAction(record["action"]),
+                "resource_type": AuditResourceType(record["resource_type"]),
+                "created_at": datetime.fromisoformat(record["created_at"]),
+            }
+        )
+
+
+@dataclass(frozen=True)
+class ArchiveFilters:
+    """List filters applied to archived audit logs."""
+    user_id: int | None = None
+    action: AuditAction | None = None
+    resource_type: AuditResourceType | None = None
+    start_date: datetime | None = None
+    end_date: datetime | None = None
+    search: str | None = None
+
+    def matches(self, log: ArchivedAuditLog) -> bool:
+        """Check a record against the filters, as ``AuditService`` filters rows."""
+        return (
+            (not self.user_id or log.user_id == self.user_id)
+            and (not self.action or log.action == self.action)
+            and (not self.resource_type or log.resource_type == self.resource_type)
+            and (not self.start_date or log.created_at >= self.start_date)
+            and (not self.end_date or log.created_at <= self.end_date)
+            and (not self.search or self.search.lower() in (log.request_id or "").lower())
+        )
+
+
+@dataclass
+class ArchiveScan:
+    """Newest archived matches found by a scan and the number of matches overall."""
+    logs: list[ArchivedAuditLog]
+    total: int
+    estimated: bool
+
+
+def _encode(rows: list) -> bytes:
+    """Serialize archived rows as NDJSON."""
+    lines = []
+    for row in rows:
+        record = dict(row._mapping)
+        record["action"] = record["action"].value
+        record["resource_type"] = record["resource_type"].value
+        record["created_at"] = record["created_at"].isoformat()
+        lines.append(json.dumps(record, separators=(",", ":")))
+    return ("\n".join(lines) + "\n").encode()
+
+
+def _read_file(path: str, filters: ArchiveFilters) -> list[ArchivedAuditLog]:
+    """Read one archive file and keep the records matching the filters."""
+    data = _decompress(path, archive_storage.read(path))
+    logs = []
+    for line in data.splitlines():
+        if line:
+            log = ArchivedAuditLog.from_record(json.loads(line))
+            if filters.matches(log):
+                logs.append(log)
+    return logs
+
+
+class AuditArchive:
+    """Moves old audit logs into archive files and scans them back."""
+
+    def __init__(self):
+        self._task: asyncio.Task | None = None
+
+    async def scan(self, db: AsyncSession, filters: ArchiveFilters, limit: int) -> ArchiveScan:
+        """Get the ``limit`` newest archived audit logs matching the filters, newest first.
+
+        The manifest narrows the scan to files whose date range, actions and
+        resource types can match. Those are read newest first, stopping once
+        ``limit`` matches are newer than anything in the remaining files.
+        Without filters the total is the manifest's row count; otherwise it
+        is extrapolated from the files read unless all of them were.
+        """
+        query = select(
+            AuditArchiveFile.path, AuditArchiveFile.row_count, AuditArchiveFile.max_created_at
+        )
+        if filters.start_date:
+            query = query.where(AuditArchiveFile.max_created_at >= filters.start_date)
+        if filters.end_date:
+            query = query.where(AuditArchiveFile.min_created_at <= filters.end_date)
+        if filters.action:
+            query = query.where(AuditArchiveFile.actions.contains([filters.action.value]))
+        if filters.resource_type:
+            query = query.where(
+                AuditArchiveFile.resource_types.contains([filters.resource_type.value])
+            )
+        query = query.order_by(AuditArchiveFile.max_created_at.desc())
+        files = (await db.execute(query)).all()
+
+        # Min-heap of the newest matches so far, keyed by (created_at, id)
+        newest: list[tuple[tuple[datetime, int], ArchivedAuditLog]] = []
+        files_read = rows_read = matched = 0
+        for file in files:
+            if len(newest) >= limit and newest[0][0][0] > file.max_created_at:
+                break
+            logs = await asyncio.to_thread(_read_file, file.path, filters)
+            files_read += 1
+            rows_read += file.row_count
+            matched += len(logs)
+            for log in logs:
+                item = ((log.created_at, log.id), log)
+                if len(newest) < limit:
+                    heapq.heappush(newest, item)
+                elif item[0] > newest[0][0]:
+                    heapq.heapreplace(newest, item)
+        metrics.increment("audit_archive.files_scanned", files_read)
+        logs = [log for _, log in sorted(newest, key=lambda item: item[0], reverse=True)]
+
+        total_rows = sum(file.row_count for file in files)
+        if filters == ArchiveFilters():
+            return ArchiveScan(logs, total_rows, False)
+        if files_read == len(files):
+            return ArchiveScan(logs, matched, False)
+        unread = total_rows - rows_read
+        return ArchiveScan(logs, matched + round(unread * matched / rows_read), True)
+
+    async def archive_batch(self) -> int:
+        """Move one batch of the oldest due audit logs into files, returning rows moved."""
+        cutoff = datetime.now(timezone.utc) - timedelta(days=settings.AUDIT_ARCHIVE_AFTER_DAYS)
+        written: list[str] = []
+        async with async_session_maker() as session:
+            try:
+                locked = await session.execute(
+                    select(func.pg_try_advisory_xact_lock(ARCHIVE_LOCK_ID))
+                )
+                if not locked.scalar_one():
+                    return 0
+                rows = (
+                    await session.execute(
+                        select(*ARCHIVED_COLUMNS)
+                        .select_from(AuditLog)
+                        .outerjoin(AuditLog.agent)
+                        .where(AuditLog.created_at < cutoff)
+                        .order_by(AuditLog.created_at, AuditLog.id)
+                        .limit(settings.AUDIT_ARCHIVE_BATCH_SIZE)
+                    )
+                ).all()
+                if not rows:
+                    return 0
+
+                for day, day_rows in groupby(rows, key=lambda row: _day(row.created_at)):
+                    day_rows = list(day_rows)
+                    entry = await self._write_file(day, day_rows)
+                    written.append(entry.path)
+                    session.add(entry)
+                await session.execute(
+                    delete(AuditLog).where(AuditLog.id.in_([row.id for row in rows]))
+                )
+                await session.commit()
+            except Exception:
+                await session.rollback()
+                # Files not in a committed manifest are unreferenced; drop them
+                for path in written:
+                    await asyncio.to_thread(archive_storage.delete, path)
+                raise
+
+        metrics.increment("audit_archive.rows", len(rows))
+        logger.info("audit_logs_archived", rows=len(rows), files=len(written))
+        return len(rows)
+
+    async def _write_file(self, day: date, rows: list) -> AuditArchiveFile:
+        """Compress and store one day's rows, returning their manifest entry."""
+        data, extension = await asyncio.to_thread(lambda: _compress(_encode(rows)))
+        path = f"date={day.isoformat()}/audit-{rows[0].id}-{rows[-1].id}{extension}"
+        await asyncio.to_thread(archive_storage.write, path, data)
+        return AuditArchiveFile(
+            path=path,
+            day=day,
+            first_id=min(row.id for row in rows),
+            last_id=max(row.id for row in rows),
+            row_count=len(rows),
+            size_bytes=len(data),
+            min_created_at=rows[0].created_at,
+            max_created_at=rows[-1].created_at,
+            actions=sorted({row.action.value for row in rows}),
+            resource_types=sorted({row.resource_type.value for row in rows}),
+        )
+
+    async def archive_due(self) -> int:
+        """Archive batches until no due audit logs are left, returning rows moved."""
+        total = 0
+        while True:
+            moved = await self.archive_batch()
+            total += moved
+            if moved < settings.AUDIT_ARCHIVE_BATCH_SIZE:
+                return total
+
+    def start(self) -> None:
+        """Start the periodic archival task if enabled."""
+        if settings.AUDIT_ARCHIVE_ENABLED and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the archival task."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.archive_due()
+            except Exception as exc:
+                logger.warning("audit_archive_failed", error=str(exc))
+            await asyncio.sleep(settings.AUDIT_ARCHIVE_INTERVAL_SECONDS)
+
+
+def _day(created_at: datetime) -> date:
+    """Get the UTC day an audit log is partitioned under."""
+    return created_at.astimezone(timezone.utc).date()
+
+
+audit_archive = AuditArchive()
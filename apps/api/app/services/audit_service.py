@@ -1,13 +1,28 @@
 """Audit log service for tracking sensitive actions."""
+import heapq
+from collections.abc import Callable
 from datetime import datetime
+from itertools import islice
 from typing import Any
 
-from sqlalchemy import func, select
+from sqlalchemy import Select, func, insert, select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
+from sqlalchemy.orm.attributes import set_committed_value
 
-from app.models.audit_log import AuditAction, AuditLog
+from app.models.audit_log import AuditAction, AuditLog, AuditResourceType
 from app.models.user import User
+from app.models.user_agent import UserAgent
+from app.services.audit_archive import (
+    ArchivedAuditLog,
+    ArchiveFilters,
+    ArchiveScan,
+    audit_archive,
+)
+from app.services.pagination import order_and_paginate
+from app.services.query_guard import QueryCostGuard
+from app.services.user_agents import user_agents
+from app.services.user_service import UserService
 
 
 class AuditService:
@@ -19,7 +34,7 @@ class AuditService:
     async def log(
         self,
         action: AuditAction,
-        resource_type: str,
+        resource_type: AuditResourceType,
         user_id: int | None = None,
         resource_id: int | None = None,
         details: dict[str, Any] | None = None,
@@ -35,67 +50,240 @@ class AuditService:
             resource_id=resource_id,
             details=details,
             ip_address=ip_address,
-            user_agent=user_agent,
+            user_agent_id=await user_agents.get_id(self.db, user_agent),
             request_id=request_id,
         )
         self.db.add(audit_log)
         await self.db.flush()
+        agent = None
+        if audit_log.user_agent_id is not None:
+            agent = UserAgent(id=audit_log.user_agent_id, value=user_agents.clean(user_agent))
+        set_committed_value(audit_log, "agent", agent)
         return audit_log
     
-    async def get_list(
+    async def log_many(
         self,
-        page: int = 1,
-        page_size: int = 20,
+        resource_type: AuditResourceType,
+        entries: list[tuple[AuditAction, int | None, dict[str, Any] | None]],
         user_id: int | None = None,
-        action: AuditAction | None = None,
-        resource_type: str | None = None,
-        start_date: datetime | None = None,
-        end_date: datetime | None = None,
-        search: str | None = None,
-    ) -> tuple[list[AuditLog], int]:
-        """Get paginated list of audit logs with filters."""
-        query = select(AuditLog).options(selectinload(AuditLog.user))
-        count_query = select(func.count(AuditLog.id))
-        
-        # Apply filters
+        ip_address: str | None = None,
+        user_agent: str | None = None,
+        request_id: str | None = None,
+    ) -> None:
+        """Create one audit log entry per ``(action, resource_id, details)`` in a single insert."""
+        if not entries:
+            return
+        user_agent_id = await user_agents.get_id(self.db, user_agent)
+        await self.db.execute(
+            insert(AuditLog),
+            [
+                {
+                    "user_id": user_id,
+                    "action": action,
+                    "resource_type": resource_type,
+                    "resource_id": resource_id,
+                    "details": details,
+                    "ip_address": ip_address,
+                    "user_agent_id": user_agent_id,
+                    "request_id": request_id,
+                }
+                for action, resource_id, details in entries
+            ],
+        )
+    
+    def _filter(
+        self,
+        query: Select,
+        user_id: int | None,
+        action: AuditAction | None,
+        resource_type: AuditResourceType | None,
+        start_date: datetime | None,
+        end_date: datetime | None,
+        search: str | None,
+    ) -> Select:
+        """Apply list filters to a query."""
         if user_id:
             query = query.where(AuditLog.user_id == user_id)
-            count_query = count_query.where(AuditLog.user_id == user_id)
         
         if action:
             query = query.where(AuditLog.action == action)
-            count_query = count_query.where(AuditLog.action == action)
         
         if resource_type:
             query = query.where(AuditLog.resource_type == resource_type)
-            count_query = count_query.where(AuditLog.resource_type == resource_type)
         
         if start_date:
             query = query.where(AuditLog.created_at >= start_date)
-            count_query = count_query.where(AuditLog.created_at >= start_date)
         
         if end_date:
             query = query.where(AuditLog.created_at <= end_date)
-            count_query = count_query.where(AuditLog.created_at <= end_date)
         
         if search:
             # Search in request_id or details
             search_filter = f"%{search}%"
             query = query.where(AuditLog.request_id.ilike(search_filter))
-            count_query = count_query.where(AuditLog.request_id.ilike(search_filter))
         
-        # Order by newest first
-        query = query.order_by(AuditLog.created_at.desc())
+        return query
+    
+    async def _count(self, page_query: Select, filters: tuple) -> tuple[int, bool]:
+        """Count list matches, returning the total and whether it is an estimate."""
+        user_id, search = filters[0], filters[-1]
+        if search or not user_id:
+            # The table grows without bound; only a user filter keeps counts reliably small
+            match_query = self._filter(select(AuditLog.id), *filters)
+            return await QueryCostGuard(self.db).count(page_query, match_query)
+        count_query = self._filter(select(func.count(AuditLog.id)), *filters)
+        return (await self.db.execute(count_query)).scalar_one(), False
+    
+    async def get_list(
+        self,
+        page: int = 1,
+        page_size: int = 20,
+        user_id: int | None = None,
+        action: AuditAction | None = None,
+        resource_type: AuditResourceType | None = None,
+        start_date: datetime | None = None,
+        end_date: datetime | None = None,
+        search: str | None = None,
+        include_archived: bool = False,
+    ) -> tuple[list[AuditLog | ArchivedAuditLog], int, bool]:
+        """Get a page of audit logs with filters, the total and whether it is estimated.
         
-        # Apply pagination
-        offset = (page - 1) * page_size
-        query = query.offset(offset).limit(page_size)
+        With ``include_archived``, matching logs from archive files are merged in.
+        """
+        filters = (user_id, action, resource_type, start_date, end_date, search)
+        query = self._filter(select(AuditLog).options(selectinload(AuditLog.user)), *filters)
+        if include_archived:
+            # Both sources may hold any of the newest matches; take a full window from each,
+            # ordered like the merge
+            query = order_and_paginate(
+                query, AuditLog.created_at, "desc", 1, page * page_size, tiebreaker=AuditLog.id
+            )
+        else:
+            # Order by newest first
+            query = order_and_paginate(query, AuditLog.created_at, "desc", page, page_size)
         
-        # Execute queries
+        # Execute queries; counting first lets the cost guard reject before any scan
+        total, estimated = await self._count(query, filters)
         result = await self.db.execute(query)
-        count_result = await self.db.execute(count_query)
+        logs = list(result.scalars().all())
+        if not include_archived:
+            return logs, total, estimated
         
-        return list(result.scalars().all()), count_result.scalar_one()
+        archived = await self._scan_archive(filters, page * page_size)
+        page_logs = self._merge_page(logs, archived.logs, _log_sort_key, page, page_size)
+        return page_logs, total + archived.total, estimated or archived.estimated
+    
+    async def get_partial_list(
+        self,
+        columns: list[str],
+        page: int = 1,
+        page_size: int = 20,
+        user_id: int | None = None,
+        action: AuditAction | None = None,
+        resource_type: AuditResourceType | None = None,
+        start_date: datetime | None = None,
+        end_date: datetime | None = None,
+        search: str | None = None,
+        include_archived: bool = False,
+    ) -> tuple[list[dict[str, Any]], int, bool]:
+        """Get a page of audit logs selecting only the given columns."""
+        filters = (user_id, action, resource_type, start_date, end_date, search)
+        selected = [
+            UserAgent.value.label(column) if column == "user_agent" else getattr(AuditLog, column)
+            for column in columns
+        ]
+        if not include_archived:
+            query = self._filter(_select_columns(columns, *selected), *filters)
+            query = order_and_paginate(query, AuditLog.created_at, "desc", page, page_size)
+            total, estimated = await self._count(query, filters)
+            result = await self.db.execute(query)
+            return [dict(row) for row in result.mappings()], total, estimated
+        
+        # Carry the sort key alongside the requested columns for the merge
+        query = self._filter(
+            _select_columns(
+                columns,
+                *selected,
+                AuditLog.created_at.label("_created_at"),
+                AuditLog.id.label("_id"),
+            ),
+            *filters,
+        )
+        query = order_and_paginate(
+            query, AuditLog.created_at, "desc", 1, page * page_size, tiebreaker=AuditLog.id
+        )
+        total, estimated = await self._count(query, filters)
+        rows = [dict(row) for row in (await self.db.execute(query)).mappings()]
+        archived = await self._scan_archive(filters, page * page_size)
+        archived_rows = [
+            {
+                **{column: getattr(log, column) for column in columns},
+                "_created_at": log.created_at,
+                "_id": log.id,
+            }
+            for log in archived.logs
+        ]
+        page_rows = self._merge_page(
+            rows, archived_rows, lambda row: (row["_created_at"], row["_id"]), page, page_size
+        )
+        for row in page_rows:
+            del row["_created_at"], row["_id"]
+        return page_rows, total + archived.total, estimated or archived.estimated
+    
+    async def _scan_archive(self, filters: tuple, limit: int) -> ArchiveScan:
+        """Scan archive files for matches, with users deleted since treated as unset.
+        
+        Deleting a user detaches its logs in the table but leaves archive files
+        untouched, so the same is done here when reading them back.
+        """
+        user_id = filters[0]
+        user_service = UserService(self.db)
+        if user_id and await user_service.get_by_id(user_id) is None:
+            # Its logs in the table no longer match either
+            return ArchiveScan(logs=[], total=0, estimated=False)
+        archived = await audit_archive.scan(self.db, ArchiveFilters(*filters), limit)
+        users = await user_service.get_many({log.user_id for log in archived.logs if log.user_id})
+        by_id = {user.id: user for user in users}
+        for log in archived.logs:
+            log.user = by_id.get(log.user_id)
+            if log.user is None:
+                log.user_id = None
+        return archived
+    
+    @staticmethod
+    def _merge_page(
+        live: list, archived: list, key: Callable[[Any], Any], page: int, page_size: int
+    ) -> list:
+        """Merge newest-first live and archived results and cut out one page."""
+        newest = heapq.merge(live, archived, key=key, reverse=True)
+        start = (page - 1) * page_size
+        return list(islice(newest, start, start + page_size))
+    
+    async def get_by_ids(self, ids: list[int]) -> list[AuditLog]:
+        """Get audit logs by ID, oldest first."""
+        result = await self.db.execute(
+            select(AuditLog)
+            .options(selectinload(AuditLog.user))
+            .where(AuditLog.id.in_(ids))
+            .order_by(AuditLog.id)
+        )
+        return list(result.scalars().all())
+    
+    async def get_after(
+        self,
+        after_id: int,
+        limit: int,
+        user_id: int | None = None,
+        action: AuditAction | None = None,
+        resource_type: AuditResourceType | None = None,
+    ) -> list[AuditLog]:
+        """Get audit logs newer than an ID, oldest first."""
+        query = self._filter(
+            select(AuditLog).options(selectinload(AuditLog.user)).where(AuditLog.id > after_id),
+            user_id, action, resource_type, None, None, None,
+        )
+        result = await self.db.execute(query.order_by(AuditLog.id).limit(limit))
+        return list(result.scalars().all())
     
     async def count_recent(self, hours: int = 24) -> int:
         """Get count of audit logs in the last N hours."""
@@ -105,3 +293,16 @@ class AuditService:
             select(func.count(AuditLog.id)).where(AuditLog.created_at >= cutoff)
         )
         return result.scalar_one()
+
+
+def _select_columns(columns: list[str], *selected: Any) -> Select:
+    """Select audit log columns, joining ``user_agents`` only when its value is asked for."""
+    query = select(*selected).select_from(AuditLog)
+    if "user_agent" in columns:
+        query = query.outerjoin(AuditLog.agent)
+    return query
+
+
+def _log_sort_key(log: AuditLog | ArchivedAuditLog) -> tuple[datetime, int]:
+    """Order audit logs by creation time, then ID."""
+    return log.created_at, log.id
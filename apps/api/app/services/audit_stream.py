@@ -0,0 +1,229 @@
+"""Live audit events fanned out from one shared Postgres LISTEN connection."""
+import asyncio
+import contextvars
+from collections.abc import AsyncIterator
+
+import asyncpg
+
+from app.core.config import settings
+from app.core.database import async_session_maker
+from app.core.logging import get_logger
+from app.core.responses import render_json
+from app.models.audit_log import AuditAction, AuditLog, AuditResourceType
+from app.schemas.audit_log import AuditLogResponse
+from app.services.audit_service import AuditService
+
+logger = get_logger(__name__)
+
+# Notifications fetched together in one query
+DISPATCH_BATCH_SIZE = 100
+
+
+def sse_event(log: AuditLog) -> bytes:
+    """Render an audit log as a Server-Sent Events frame."""
+    item = AuditLogResponse.model_validate(log)
+    item.user_email = log.user.email if log.user else None
+    return b"id: %d\nevent: audit\ndata: %s\n\n" % (log.id, render_json(item))
+
+
+class AuditSubscriber:
+    """One stream's filters and bounded event queue."""
+
+    def __init__(
+        self,
+        user_id: int | None = None,
+        action: AuditAction | None = None,
+        resource_type: AuditResourceType | None = None,
+    ):
+        self.user_id = user_id
+        self.action = action
+        self.resource_type = resource_type
+        # (event ID, frame) pairs; None ends the stream
+        self.queue: asyncio.Queue[tuple[int, bytes] | None] = asyncio.Queue(
+            settings.AUDIT_STREAM_QUEUE_SIZE
+        )
+
+    def matches(self, log: AuditLog) -> bool:
+        """Check whether an audit log passes this subscriber's filters."""
+        return (
+            (self.user_id is None or log.user_id == self.user_id)
+            and (self.action is None or log.action == self.action)
+            and (self.resource_type is None or log.resource_type == self.resource_type)
+        )
+
+    def offer(self, event_id: int, frame: bytes) -> bool:
+        """Queue an event, closing the stream instead if the consumer has fallen behind."""
+        try:
+            self.queue.put_nowait((event_id, frame))
+            return True
+        except asyncio.QueueFull:
+            self.close()
+            return False
+
+    def close(self) -> None:
+        """End the stream; the client resumes with Last-Event-ID."""
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.queue.put_nowait(None)
+
+
+class AuditStreamHub:
+    """Per-worker fan-out of new audit logs to SSE subscribers.
+
+    A single LISTEN connection is held while anyone is subscribed. Each
+    notification carries a new row's ID; rows are fetched in batches, rendered
+    once and queued to every matching subscriber.
+    """
+
+    def __init__(self):
+        self._subscribers: set[AuditSubscriber] = set()
+        self._pending: asyncio.Queue[int] = asyncio.Queue()
+        self._task: asyncio.Task | None = None
+
+    def __len__(self) -> int:
+        return len(self._subscribers)
+
+    def subscribe(self, subscriber: AuditSubscriber) -> None:
+        """Register a subscriber, starting the listener if needed."""
+        self._subscribers.add(subscriber)
+        if self._task is None or self._task.done():
+            self._pending = asyncio.Queue()
+            # Not the subscribing request's context: its deadline would end the listener's queries
+            self._task = asyncio.create_task(self._run(), context=contextvars.Context())
+
+    def unsubscribe(self, subscriber: AuditSubscriber) -> None:
+        """Remove a subscriber; the listener stops with the last one."""
+        self._subscribers.discard(subscriber)
+
+    async def stop(self) -> None:
+        """End all streams and close the listener."""
+        for subscriber in self._subscribers:
+            subscriber.close()
+        self._subscribers.clear()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def stream(
+        self,
+        after_id: int | None = None,
+        user_id: int | None = None,
+        action: AuditAction | None = None,
+        resource_type: AuditResourceType | None = None,
+    ) -> AsyncIterator[bytes]:
+        """Yield SSE frames, replaying events after ``after_id`` before going live.
+
+        Live events already sent by the replay are skipped by ID. A live event
+        with a lower ID than the replay reached is still sent: its row was
+        inserted earlier but committed after the replay read past it.
+        """
+        subscriber = AuditSubscriber(user_id=user_id, action=action, resource_type=resource_type)
+        # Subscribe before replaying so nothing committed in between is missed
+        self.subscribe(subscriber)
+        try:
+            last_id = after_id or 0
+            replayed: set[int] = set()
+            while after_id is not None:
+                async with async_session_maker() as session:
+                    logs = await AuditService(session).get_after(
+                        last_id,
+                        settings.AUDIT_STREAM_REPLAY_LIMIT,
+                        user_id=user_id,
+                        action=action,
+                        resource_type=resource_type,
+                    )
+                for log in logs:
+                    yield sse_event(log)
+                    replayed.add(log.id)
+                    last_id = log.id
+                if len(logs) < settings.AUDIT_STREAM_REPLAY_LIMIT:
+                    break
+
+            while True:
+                try:
+                    event = await asyncio.wait_for(
+                        subscriber.queue.get(), settings.AUDIT_STREAM_HEARTBEAT_SECONDS
+                    )
+                except asyncio.TimeoutError:
+                    yield b": keep-alive\n\n"
+                    continue
+                if event is None:
+                    return
+                event_id, frame = event
+                if event_id in replayed:
+                    # Each event is notified once, so the ID is not needed again
+                    replayed.discard(event_id)
+                    continue
+                yield frame
+        finally:
+            self.unsubscribe(subscriber)
+
+    async def _run(self) -> None:
+        """Hold the LISTEN connection while anyone is subscribed."""
+        dispatcher = asyncio.create_task(self._dispatch())
+        try:
+            while self._subscribers:
+                try:
+                    await self._listen()
+                except (OSError, asyncpg.PostgresError) as exc:
+                    logger.warning("audit_stream_listen_failed", error=str(exc))
+                    self._close_all()
+                    await asyncio.sleep(settings.AUDIT_STREAM_RECONNECT_SECONDS)
+        finally:
+            dispatcher.cancel()
+
+    def _close_all(self) -> None:
+        """End every stream after events may have been missed; clients replay from Last-Event-ID."""
+        for subscriber in self._subscribers:
+            subscriber.close()
+        self._subscribers.clear()
+
+    async def _listen(self) -> None:
+        """Listen for notifications until the connection drops or nobody is subscribed."""
+        connection = await asyncpg.connect(settings.DATABASE_URL.replace("+asyncpg", ""))
+        lost = asyncio.Event()
+        connection.add_termination_listener(lambda _: lost.set())
+        try:
+            await connection.add_listener(settings.AUDIT_STREAM_CHANNEL, self._on_notify)
+            while self._subscribers:
+                try:
+                    await asyncio.wait_for(lost.wait(), settings.AUDIT_STREAM_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    continue
+                raise ConnectionError("LISTEN connection lost")
+        finally:
+            if not connection.is_closed():
+                await connection.close()
+
+    def _on_notify(self, connection, pid: int, channel: str, payload: str) -> None:
+        self._pending.put_nowait(int(payload))
+
+    async def _dispatch(self) -> None:
+        """Fetch notified rows in batches and fan them out to subscribers."""
+        while True:
+            ids = [await self._pending.get()]
+            while not self._pending.empty() and len(ids) < DISPATCH_BATCH_SIZE:
+                ids.append(self._pending.get_nowait())
+
+            try:
+                async with async_session_maker() as session:
+                    logs = await AuditService(session).get_by_ids(ids)
+            except Exception as exc:
+                logger.warning("audit_stream_fetch_failed", error=str(exc), count=len(ids))
+                # Any subscriber may have matched the lost events
+                self._close_all()
+                continue
+
+            for log in logs:
+                frame = sse_event(log)
+                for subscriber in list(self._subscribers):
+                    if subscriber.matches(log) and not subscriber.offer(log.id, frame):
+                        self._subscribers.discard(subscriber)
+                        logger.info("audit_stream_consumer_dropped", event_id=log.id)
+
+
+audit_stream = AuditStreamHub()
@@ -0,0 +1,94 @@
+"""Buffered last-login tracking, written back in periodic bulk updates."""
+import asyncio
+from datetime import datetime, timezone
+
+from sqlalchemy import DateTime, Integer, column, or_, update, values
+
+from app.core.cache import entity_cache, flush_pending_invalidations, query_cache
+from app.core.config import settings
+from app.core.database import async_session_maker
+from app.core.logging import get_logger
+from app.models.user import User
+
+logger = get_logger(__name__)
+
+
+class LastLoginBuffer:
+    """Per-worker buffer of login times.
+
+    Logins only record a timestamp in memory; a background task writes all
+    buffered timestamps with one UPDATE every ``LAST_LOGIN_FLUSH_SECONDS``.
+    The write leaves ``updated_at`` alone and never moves ``last_login``
+    backwards, so buffers of several workers can flush in any order.
+    """
+
+    def __init__(self):
+        self._pending: dict[int, datetime] = {}
+        self._task: asyncio.Task | None = None
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def record(self, user_id: int) -> datetime:
+        """Buffer a login for a user and return its timestamp."""
+        logged_in_at = datetime.now(timezone.utc)
+        self._pending[user_id] = logged_in_at
+        return logged_in_at
+
+    def start(self) -> None:
+        """Start the periodic flush task."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the flush task and write out what is left."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    async def flush(self) -> int:
+        """Write all buffered logins in one UPDATE, returning how many were written."""
+        if not self._pending:
+            return 0
+        pending, self._pending = self._pending, {}
+
+        logins = values(
+            column("id", Integer),
+            column("last_login", DateTime(timezone=True)),
+            name="logins",
+        ).data(list(pending.items()))
+        stmt = (
+            update(User)
+            .where(User.id == logins.c.id)
+            .where(or_(User.last_login.is_(None), User.last_login < logins.c.last_login))
+            # Not a profile change; keep updated_at from firing
+            .values(last_login=logins.c.last_login, updated_at=User.updated_at)
+            .execution_options(synchronize_session=False)
+        )
+        try:
+            async with async_session_maker() as session:
+                await session.execute(stmt)
+                await entity_cache.invalidate_many(session, User, list(pending))
+                await query_cache.bump(session, User.__tablename__)
+                await session.commit()
+                await flush_pending_invalidations(session)
+        except Exception as exc:
+            logger.warning("last_login_flush_failed", error=str(exc), count=len(pending))
+            # Retry with the next flush, unless a newer login was buffered meanwhile
+            for user_id, logged_in_at in pending.items():
+                self._pending.setdefault(user_id, logged_in_at)
+            return 0
+        return len(pending)
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(settings.LAST_LOGIN_FLUSH_SECONDS)
+            await self.flush()
+
+
+last_login_buffer = LastLoginBuffer()
@@ -0,0 +1,21 @@
+"""Shared sorting and pagination for list queries."""
+from sqlalchemy import Select
+from sqlalchemy.orm import InstrumentedAttribute
+
+
+def order_and_paginate(
+    query: Select,
+    sort_column: InstrumentedAttribute,
+    sort_order: str,
+    page: int,
+    page_size: int,
+    tiebreaker: InstrumentedAttribute | None = None,
+) -> Select:
+    """Apply sorting, with an optional tiebreaker column, and pagination to a list query."""
+    columns = [sort_column] if tiebreaker is None else [sort_column, tiebreaker]
+    if sort_order == "desc":
+        query = query.order_by(*(column.desc() for column in columns))
+    else:
+        query = query.order_by(*(column.asc() for column in columns))
+    offset = (page - 1) * page_size
+    return query.offset(offset).limit(page_size)
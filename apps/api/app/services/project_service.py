@@ -1,11 +1,46 @@
 """Project service for business logic."""
-from sqlalchemy import func, select
+from dataclasses import dataclass, field
+from typing import Any
+
+from sqlalchemy import Integer, Row, Select, any_, delete, func, inspect, literal, select, update
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
+from sqlalchemy.orm.attributes import set_committed_value
 
+from app.core.cache import attach_entity, dump_entity, entity_cache, query_cache
+from app.core.http_cache import make_etag
 from app.models.project import Project, ProjectStatus
 from app.models.user import User
-from app.schemas.project import ProjectCreate, ProjectUpdate
+from app.schemas.project import ProjectBulkChanges, ProjectCreate, ProjectUpdate
+from app.services.change_feed import ChangeCursor, ChangeFeedService, ChangeSet
+from app.services.pagination import order_and_paginate
+from app.services.query_guard import QueryCostGuard
+from app.services.user_service import UserService
+
+# Tables read by the project list, including the embedded owner
+LIST_TABLES = (Project.__tablename__, User.__tablename__)
+
+# Columns lists may be sorted by; the rest are unindexed
+PROJECT_SORT_COLUMNS = {
+    "created_at": Project.created_at,
+    "updated_at": Project.updated_at,
+    "name": Project.name,
+    "id": Project.id,
+}
+
+
+@dataclass
+class BulkResult:
+    """Outcome of a bulk write: the rows it returned and the IDs it skipped."""
+    rows: list[Row]
+    not_found: list[int] = field(default_factory=list)
+    forbidden: list[int] = field(default_factory=list)
+
+
+def _id_array(ids: list[int]):
+    """Bind IDs as one array parameter, for ``id = ANY(...)``."""
+    return any_(literal(ids, ARRAY(Integer)))
 
 
 class ProjectService:
@@ -14,64 +49,171 @@ class ProjectService:
     def __init__(self, db: AsyncSession):
         self.db = db
     
+    async def _invalidate(self, project: Project) -> None:
+        """Drop cached copies of a project and of project lists after a write."""
+        await entity_cache.invalidate(self.db, Project, project.id)
+        await query_cache.bump(self.db, Project.__tablename__)
+    
     async def get_by_id(self, project_id: int, include_owner: bool = True) -> Project | None:
-        """Get project by ID."""
-        query = select(Project).where(Project.id == project_id)
-        if include_owner:
-            query = query.options(selectinload(Project.owner))
-        result = await self.db.execute(query)
-        return result.scalar_one_or_none()
+        """Get project by ID, served from the entity cache when possible."""
+        project = await entity_cache.load(self.db, Project, project_id)
+        if project is None:
+            query = select(Project).where(Project.id == project_id)
+            if include_owner:
+                query = query.options(selectinload(Project.owner))
+            result = await self.db.execute(query)
+            project = result.scalar_one_or_none()
+            if project is not None:
+                await entity_cache.store(self.db, project)
+            return project
+        
+        # Cached snapshots hold columns only; the owner comes from the user cache
+        if include_owner and "owner" in inspect(project).unloaded:
+            owner = await UserService(self.db).get_by_id(project.owner_id)
+            set_committed_value(project, "owner", owner)
+        return project
     
-    async def get_list(
+    def _filter(
         self,
-        page: int = 1,
-        page_size: int = 20,
-        sort_by: str = "created_at",
-        sort_order: str = "desc",
-        search: str | None = None,
-        status: ProjectStatus | None = None,
-        owner_id: int | None = None,
-    ) -> tuple[list[Project], int]:
-        """Get paginated list of projects with filters."""
-        query = select(Project).options(selectinload(Project.owner))
-        count_query = select(func.count(Project.id))
-        
-        # Apply filters
+        query: Select,
+        search: str | None,
+        status: ProjectStatus | None,
+        owner_id: int | None,
+    ) -> Select:
+        """Apply list filters to a query."""
         if search:
             search_filter = f"%{search}%"
             query = query.where(
                 (Project.name.ilike(search_filter)) | 
                 (Project.description.ilike(search_filter))
             )
-            count_query = count_query.where(
-                (Project.name.ilike(search_filter)) | 
-                (Project.description.ilike(search_filter))
-            )
         
         if status:
             query = query.where(Project.status == status)
-            count_query = count_query.where(Project.status == status)
         
         if owner_id:
             query = query.where(Project.owner_id == owner_id)
-            count_query = count_query.where(Project.owner_id == owner_id)
         
-        # Apply sorting
-        sort_column = getattr(Project, sort_by, Project.created_at)
-        if sort_order == "desc":
-            query = query.order_by(sort_column.desc())
-        else:
-            query = query.order_by(sort_column.asc())
+        return query
+    
+    async def _count(
+        self,
+        page_query: Select,
+        search: str | None,
+        status: ProjectStatus | None,
+        owner_id: int | None,
+    ) -> tuple[int, bool]:
+        """Count list matches, returning the total and whether it is an estimate."""
+        if search:
+            # ILIKE '%...%' cannot use an index; check the planner's estimate before scanning
+            match_query = self._filter(select(Project.id), search, status, owner_id)
+            return await QueryCostGuard(self.db).count(page_query, match_query)
+        count_query = self._filter(select(func.count(Project.id)), search, status, owner_id)
+        return (await self.db.execute(count_query)).scalar_one(), False
+    
+    def _list_cache_key(
+        self,
+        page: int,
+        page_size: int,
+        sort_by: str,
+        sort_order: str,
+        search: str | None,
+        status: ProjectStatus | None,
+        owner_id: int | None,
+    ) -> tuple:
+        """Normalize list parameters into a query cache key."""
+        sort_column = PROJECT_SORT_COLUMNS.get(sort_by, Project.created_at)
+        return (
+            Project.__tablename__, page, page_size, sort_column.key, sort_order,
+            search or None, status.value if status else None, owner_id,
+        )
+    
+    async def list_etag(
+        self,
+        page: int = 1,
+        page_size: int = 20,
+        sort_by: str = "created_at",
+        sort_order: str = "desc",
+        search: str | None = None,
+        status: ProjectStatus | None = None,
+        owner_id: int | None = None,
+    ) -> str | None:
+        """Get a list page's ETag from table versions, without running the query."""
+        versions = await query_cache.versions(self.db, LIST_TABLES)
+        if versions is None:
+            return None
+        cache_key = self._list_cache_key(
+            page, page_size, sort_by, sort_order, search, status, owner_id
+        )
+        return make_etag(cache_key, versions)
+    
+    async def get_list(
+        self,
+        page: int = 1,
+        page_size: int = 20,
+        sort_by: str = "created_at",
+        sort_order: str = "desc",
+        search: str | None = None,
+        status: ProjectStatus | None = None,
+        owner_id: int | None = None,
+    ) -> tuple[list[Project], int, bool]:
+        """Get a page of projects with filters, the total and whether it is estimated.
+        
+        Results are cached per table version.
+        """
+        sort_column = PROJECT_SORT_COLUMNS.get(sort_by, Project.created_at)
+        cache_key = self._list_cache_key(
+            page, page_size, sort_by, sort_order, search, status, owner_id
+        )
+        versions = await query_cache.versions(self.db, LIST_TABLES)
+        if versions is not None:
+            cached = query_cache.get(cache_key, versions)
+            if cached is not None:
+                rows, total, estimated = cached
+                projects = []
+                for project_data, owner_data in rows:
+                    project = await attach_entity(self.db, Project, project_data)
+                    owner = await attach_entity(self.db, User, owner_data)
+                    set_committed_value(project, "owner", owner)
+                    projects.append(project)
+                return projects, total, estimated
         
-        # Apply pagination
-        offset = (page - 1) * page_size
-        query = query.offset(offset).limit(page_size)
+        query = self._filter(
+            select(Project).options(selectinload(Project.owner)), search, status, owner_id
+        )
+        query = order_and_paginate(query, sort_column, sort_order, page, page_size)
         
-        # Execute queries
+        # Execute queries; counting first lets the cost guard reject before any scan
+        total, estimated = await self._count(query, search, status, owner_id)
         result = await self.db.execute(query)
-        count_result = await self.db.execute(count_query)
+        projects = list(result.scalars().all())
+        
+        if versions is not None:
+            rows = [(dump_entity(p), dump_entity(p.owner)) for p in projects]
+            query_cache.set(cache_key, versions, (rows, total, estimated))
+        return projects, total, estimated
+    
+    async def get_partial_list(
+        self,
+        columns: list[str],
+        page: int = 1,
+        page_size: int = 20,
+        sort_by: str = "created_at",
+        sort_order: str = "desc",
+        search: str | None = None,
+        status: ProjectStatus | None = None,
+        owner_id: int | None = None,
+    ) -> tuple[list[dict[str, Any]], int, bool]:
+        """Get a page of projects selecting only the given columns."""
+        sort_column = PROJECT_SORT_COLUMNS.get(sort_by, Project.created_at)
+        query = self._filter(
+            select(*(getattr(Project, column) for column in columns)), search, status, owner_id
+        )
+        query = order_and_paginate(query, sort_column, sort_order, page, page_size)
         
-        return list(result.scalars().all()), count_result.scalar_one()
+        total, estimated = await self._count(query, search, status, owner_id)
+        result = await self.db.execute(query)
+        return [dict(row) for row in result.mappings()], total, estimated
     
     async def create(self, data: ProjectCreate, owner_id: int) -> Project:
         """Create a new project."""
@@ -87,6 +229,7 @@ class ProjectService:
         )
         self.db.add(project)
         await self.db.flush()
+        await query_cache.bump(self.db, Project.__tablename__)
         await self.db.refresh(project)
         return project
     
@@ -96,6 +239,7 @@ class ProjectService:
         for field, value in update_data.items():
             setattr(project, field, value)
         await self.db.flush()
+        await self._invalidate(project)
         await self.db.refresh(project)
         return project
     
@@ -103,6 +247,79 @@ class ProjectService:
         """Delete a project."""
         await self.db.delete(project)
         await self.db.flush()
+        await self._invalidate(project)
+    
+    async def bulk_update(
+        self, ids: list[int], changes: ProjectBulkChanges, owner_id: int | None = None
+    ) -> BulkResult:
+        """Apply the same changes to many projects in one statement.
+        
+        With ``owner_id``, only that user's projects are changed. Returned rows
+        hold each changed project's ID and its status before the update.
+        """
+        # Lock the rows first so the joined status is the one being replaced
+        old = select(Project.id, Project.status).where(Project.id == _id_array(ids))
+        if owner_id is not None:
+            old = old.where(Project.owner_id == owner_id)
+        old = old.with_for_update().subquery("old")
+        # Core table statement: the ORM drops RETURNING columns of the joined subquery
+        projects = Project.__table__
+        query = (
+            update(projects)
+            .where(projects.c.id == old.c.id)
+            .values(**changes.model_dump(exclude_unset=True))
+            .returning(projects.c.id, old.c.status.label("old_status"))
+        )
+        rows = list((await self.db.execute(query)).all())
+        result = await self._bulk_result(ids, rows, owner_id)
+        await self._invalidate_many([row.id for row in rows])
+        return result
+    
+    async def bulk_delete(self, ids: list[int], owner_id: int | None = None) -> BulkResult:
+        """Delete many projects in one statement, only ``owner_id``'s when given.
+        
+        Returned rows hold each deleted project's ID and name.
+        """
+        query = (
+            delete(Project)
+            .where(Project.id == _id_array(ids))
+            .returning(Project.id, Project.name)
+            .execution_options(synchronize_session=False)
+        )
+        if owner_id is not None:
+            query = query.where(Project.owner_id == owner_id)
+        rows = list((await self.db.execute(query)).all())
+        result = await self._bulk_result(ids, rows, owner_id)
+        await self._invalidate_many([row.id for row in rows])
+        return result
+    
+    async def _bulk_result(
+        self, ids: list[int], rows: list[Row], owner_id: int | None
+    ) -> BulkResult:
+        """Sort the IDs a bulk write skipped into missing and not owned."""
+        matched = {row.id for row in rows}
+        skipped = [project_id for project_id in ids if project_id not in matched]
+        if not skipped or owner_id is None:
+            return BulkResult(rows, not_found=skipped)
+        result = await self.db.execute(select(Project.id).where(Project.id == _id_array(skipped)))
+        existing = set(result.scalars().all())
+        return BulkResult(
+            rows,
+            not_found=[project_id for project_id in skipped if project_id not in existing],
+            forbidden=[project_id for project_id in skipped if project_id in existing],
+        )
+    
+    async def _invalidate_many(self, project_ids: list[int]) -> None:
+        """Drop cached copies of many projects and of project lists after a bulk write."""
+        if project_ids:
+            await entity_cache.invalidate_many(self.db, Project, project_ids)
+            await query_cache.bump(self.db, Project.__tablename__)
+    
+    async def get_changes(self, since: ChangeCursor | None, limit: int) -> ChangeSet:
+        """Get projects changed and deleted since a change cursor."""
+        return await ChangeFeedService(self.db).get_changes(
+            Project, since, limit, options=(selectinload(Project.owner),)
+        )
     
     async def count(self, status: ProjectStatus | None = None) -> int:
         """Get project count, optionally filtered by status."""
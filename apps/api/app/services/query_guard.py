@@ -0,0 +1,82 @@
+"""Planner cost guard for list queries with user-supplied filters."""
+import json
+from dataclasses import dataclass
+
+from sqlalchemy import Select, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.base import Executable
+from sqlalchemy.sql.elements import ClauseElement
+
+from app.core.config import settings
+from app.core.metrics import metrics
+
+
+class QueryTooExpensive(Exception):
+    """A list query is estimated to cost more than ``QUERY_GUARD_MAX_COST``."""
+
+
+@dataclass(frozen=True)
+class PlanEstimate:
+    """Planner estimate for a query: total cost and rows returned."""
+    cost: float
+    rows: int
+
+
+class Explain(Executable, ClauseElement):
+    """``EXPLAIN (FORMAT JSON)`` of a statement, with its parameters bound as usual."""
+    inherit_cache = False
+
+    def __init__(self, statement: Select):
+        self.statement = statement
+
+
+@compiles(Explain, "postgresql")
+def _compile_explain(element: Explain, compiler, **kw) -> str:
+    return "EXPLAIN (FORMAT JSON) " + compiler.process(element.statement, **kw)
+
+
+class QueryCostGuard:
+    """Estimate list queries with the planner before running them.
+
+    A page whose plan is too expensive is rejected, and when counting every
+    match would be expensive the planner's row estimate is used as the total
+    instead. Only Postgres is estimated; elsewhere queries run unguarded.
+    """
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def estimate(self, query: Select) -> PlanEstimate | None:
+        """Get the planner's estimate for a query without running it."""
+        if self.db.get_bind().dialect.name != "postgresql":
+            return None
+        plan = (await self.db.execute(Explain(query))).scalar_one()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        root = plan[0]["Plan"]
+        return PlanEstimate(cost=root["Total Cost"], rows=int(root["Plan Rows"]))
+
+    async def count(self, page_query: Select, match_query: Select) -> tuple[int, bool]:
+        """Check a page query's cost, then count its matches exactly or by estimate.
+
+        ``match_query`` selects the matching rows without ordering or paging.
+        Returns the total and whether it is an estimate; raises
+        ``QueryTooExpensive`` if the page itself is over the limit.
+        """
+        count_query = select(func.count()).select_from(match_query.subquery())
+        if not settings.QUERY_GUARD_ENABLED:
+            return (await self.db.execute(count_query)).scalar_one(), False
+
+        page = await self.estimate(page_query)
+        if page is not None and page.cost > settings.QUERY_GUARD_MAX_COST:
+            metrics.increment("query_guard.rejected")
+            raise QueryTooExpensive(
+                "This combination of filters is too expensive; narrow the search or date range"
+            )
+
+        matches = await self.estimate(match_query)
+        if matches is not None and matches.cost > settings.QUERY_GUARD_EXACT_COUNT_MAX_COST:
+            metrics.increment("query_guard.estimated_counts")
+            return matches.rows, True
+        return (await self.db.execute(count_query)).scalar_one(), False
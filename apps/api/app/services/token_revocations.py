@@ -0,0 +1,137 @@
+"""Logout revocation list, mirrored into a per-worker Bloom filter."""
+import asyncio
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.bloom import BloomFilter
+from app.core.config import settings
+from app.core.database import async_session_maker
+from app.core.logging import get_logger
+from app.core.metrics import metrics
+from app.models.revoked_token import RevokedToken
+
+logger = get_logger(__name__)
+
+# Incremental refreshes re-read this much before the last one, covering late commits
+REFRESH_OVERLAP = timedelta(seconds=60)
+
+
+class TokenRevocationList:
+    """Per-worker view of revoked token IDs (``jti`` claims).
+
+    Live ``revoked_tokens`` rows are mirrored into a Bloom filter, reading
+    only rows revoked since the previous refresh. A token missing from the
+    filter is known not to be revoked, so most requests never touch the
+    database; filter hits are confirmed with a lookup by ``jti``. The filter
+    is rebuilt from unexpired rows every ``REVOKED_TOKENS_REBUILD_SECONDS``,
+    which is also when expired rows are purged.
+    """
+
+    def __init__(self):
+        self._filter = self._new_filter(0)
+        # Database time of the previous refresh; None until the first rebuild
+        self._since: datetime | None = None
+        self._rebuilt_at = 0.0
+        # Revoked by this worker since the last refresh, carried into a rebuilt filter
+        self._local: list[str] = []
+        self._task: asyncio.Task | None = None
+
+    @staticmethod
+    def _new_filter(count: int) -> BloomFilter:
+        return BloomFilter(
+            max(settings.REVOKED_TOKENS_BLOOM_CAPACITY, 2 * count),
+            settings.REVOKED_TOKENS_BLOOM_ERROR_RATE,
+        )
+
+    def may_be_revoked(self, jti: str) -> bool:
+        """Check the Bloom filter alone; False means the token is certainly not revoked."""
+        return jti in self._filter
+
+    async def is_revoked(self, jti: str) -> bool:
+        """Check whether a token ID was revoked, querying only on a filter hit."""
+        if jti not in self._filter:
+            return False
+        metrics.increment("auth.revocation.filter_hits")
+        try:
+            async with async_session_maker() as session:
+                result = await session.execute(
+                    select(RevokedToken.id).where(RevokedToken.jti == jti)
+                )
+                return result.first() is not None
+        except Exception as exc:
+            # Fail closed: a filter hit is far more likely a real revocation than a false positive
+            logger.warning("token_revocation_check_failed", error=str(exc))
+            return True
+
+    async def revoke(self, db: AsyncSession, jti: str, expires_at: datetime) -> None:
+        """Revoke a token in the caller's transaction; this worker rejects it at once."""
+        await db.execute(
+            insert(RevokedToken)
+            .values(jti=jti, expires_at=expires_at)
+            .on_conflict_do_nothing(index_elements=[RevokedToken.jti])
+        )
+        self._filter.add(jti)
+        self._local.append(jti)
+
+    async def refresh(self) -> None:
+        """Add newly revoked tokens to the filter, or rebuild it when due."""
+        rebuild = (
+            self._since is None
+            or time.monotonic() - self._rebuilt_at >= settings.REVOKED_TOKENS_REBUILD_SECONDS
+        )
+        try:
+            async with async_session_maker() as session:
+                now = (await session.execute(select(func.now()))).scalar_one()
+                query = select(RevokedToken.jti).where(RevokedToken.expires_at > now)
+                if not rebuild:
+                    query = query.where(RevokedToken.revoked_at > self._since - REFRESH_OVERLAP)
+                jtis = (await session.execute(query)).scalars().all()
+                if rebuild:
+                    await session.execute(
+                        delete(RevokedToken).where(RevokedToken.expires_at <= now)
+                    )
+                    await session.commit()
+        except Exception as exc:
+            logger.warning("token_revocation_refresh_failed", error=str(exc))
+            return
+
+        if rebuild:
+            bloom = self._new_filter(len(jtis))
+            # Local revocations may have committed after the query; later refreshes re-read them
+            for jti in (*jtis, *self._local):
+                bloom.add(jti)
+            self._filter = bloom
+            self._rebuilt_at = time.monotonic()
+        else:
+            for jti in jtis:
+                self._filter.add(jti)
+        self._local.clear()
+        self._since = now
+
+    async def start(self) -> None:
+        """Load the filter and keep refreshing it in the background."""
+        await self.refresh()
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop refreshing."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(settings.REVOKED_TOKENS_REFRESH_SECONDS)
+            await self.refresh()
+
+
+token_revocations = TokenRevocationList()
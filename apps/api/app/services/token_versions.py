@@ -0,0 +1,126 @@
+"""In-memory token revocation state, refreshed from users.token_version."""
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import async_session_maker
+from app.core.logging import get_logger
+from app.models.tombstone import Tombstone
+from app.models.user import User
+
+logger = get_logger(__name__)
+
+# Session.info key holding revocations applied once the transaction commits
+PENDING_REVOCATIONS = "token_versions_pending"
+
+
+class TokenVersionRegistry:
+    """Per-worker view of which token versions are still valid.
+
+    Only users whose ``token_version`` was ever bumped, and users deleted
+    within the refresh token lifetime, are held in memory, so checking a
+    token costs a dict lookup. Changes made by this worker apply at once;
+    changes made elsewhere apply within ``TOKEN_VERSION_REFRESH_SECONDS``.
+    """
+
+    def __init__(self):
+        self._versions: dict[int, int] = {}
+        self._deleted: set[int] = set()
+        # Local changes not yet confirmed by a refresh; a refresh query may predate their commit
+        self._marked_versions: dict[int, int] = {}
+        self._marked_deleted: set[int] = set()
+        self._task: asyncio.Task | None = None
+
+    def is_current(self, user_id: int, token_version: int) -> bool:
+        """Check whether a token version issued to a user is still valid."""
+        return user_id not in self._deleted and token_version >= self._versions.get(user_id, 0)
+
+    def revoke(self, user_id: int, token_version: int) -> None:
+        """Reject a user's tokens older than ``token_version`` on this worker now."""
+        self._versions[user_id] = max(self._versions.get(user_id, 0), token_version)
+        self._marked_versions[user_id] = self._versions[user_id]
+
+    def revoke_on_commit(self, session: AsyncSession, user_id: int, token_version: int) -> None:
+        """Revoke on this worker once the session's transaction commits; dropped on rollback."""
+        pending = session.info.setdefault(PENDING_REVOCATIONS, {})
+        pending[user_id] = max(pending.get(user_id, 0), token_version)
+
+    def revoke_user(self, user_id: int) -> None:
+        """Reject all tokens of a deleted user on this worker now."""
+        self._deleted.add(user_id)
+        self._marked_deleted.add(user_id)
+
+    async def refresh(self) -> None:
+        """Reload revoked versions and deleted users from the database."""
+        marked_versions, self._marked_versions = self._marked_versions, {}
+        marked_deleted, self._marked_deleted = self._marked_deleted, set()
+        cutoff = datetime.now(timezone.utc) - timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+        try:
+            async with async_session_maker() as session:
+                versions = await session.execute(
+                    select(User.id, User.token_version).where(User.token_version > 0)
+                )
+                deleted = await session.execute(
+                    select(Tombstone.resource_id)
+                    .where(Tombstone.resource_type == User.__tablename__)
+                    .where(Tombstone.deleted_at >= cutoff)
+                )
+                versions, deleted = dict(versions.tuples().all()), set(deleted.scalars().all())
+        except Exception as exc:
+            logger.warning("token_version_refresh_failed", error=str(exc))
+            self._marked_versions = {**marked_versions, **self._marked_versions}
+            self._marked_deleted |= marked_deleted
+            return
+
+        # Local changes may have committed after the query ran; keep them for this round
+        for user_id, token_version in (*marked_versions.items(), *self._marked_versions.items()):
+            versions[user_id] = max(versions.get(user_id, 0), token_version)
+        self._versions = versions
+        self._deleted = deleted | marked_deleted | self._marked_deleted
+
+    async def start(self) -> None:
+        """Load the current state and keep refreshing it in the background."""
+        await self.refresh()
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop refreshing."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(settings.TOKEN_VERSION_REFRESH_SECONDS)
+            await self.refresh()
+
+
+token_versions = TokenVersionRegistry()
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_pending_revocations(session) -> None:
+    """Apply the revocations queued by a transaction that committed."""
+    # Also fired for savepoints, which settle nothing
+    if session.in_nested_transaction():
+        return
+    for user_id, token_version in session.info.pop(PENDING_REVOCATIONS, {}).items():
+        token_versions.revoke(user_id, token_version)
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_pending_revocations(session) -> None:
+    """Forget the revocations queued by a transaction that rolled back."""
+    # Also fired for savepoints, which settle nothing
+    if session.in_nested_transaction():
+        return
+    session.info.pop(PENDING_REVOCATIONS, None)
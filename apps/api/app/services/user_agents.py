@@ -0,0 +1,134 @@
+"""Interning of User-Agent strings for audit logs."""
+import time
+from collections import OrderedDict
+
+from sqlalchemy import event, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.core.metrics import metrics
+from app.models.user_agent import UserAgent, user_agent_digest
+
+logger = get_logger(__name__)
+
+# Session.info key holding agents interned by a transaction, cached once it commits
+PENDING_USER_AGENTS = "user_agents_pending"
+
+
+class UserAgentInterner:
+    """Map User-Agent strings to ``user_agents`` row IDs, creating rows as needed.
+    
+    A handful of distinct agents covers nearly all requests, so IDs are kept
+    in a per-worker LRU and the table is only touched for agents not seen
+    recently. New rows are written in a savepoint on the caller's connection
+    and only cached once its transaction commits, so a cached ID never
+    points at a rolled back row. Values are truncated, and at most
+    ``AUDIT_USER_AGENT_INTERN_PER_MINUTE`` new agents are interned per
+    worker, so random User-Agent headers cannot grow the table unchecked.
+    """
+    
+    def __init__(self, max_entries: int, max_length: int, per_minute: int):
+        self.max_entries = max_entries
+        self.max_length = max_length
+        self.per_minute = per_minute
+        self._ids: OrderedDict[str, int] = OrderedDict()
+        self._window_start = 0.0
+        self._window_count = 0
+    
+    def clean(self, value: str | None) -> str | None:
+        """Truncate a User-Agent to the stored length."""
+        return value[:self.max_length] if value else None
+    
+    async def get_id(self, db: AsyncSession, value: str | None) -> int | None:
+        """Get the ID of a User-Agent string, interning it in ``db``'s transaction on first use."""
+        value = self.clean(value)
+        if not value:
+            return None
+        agent_id = self._ids.get(value)
+        if agent_id is not None:
+            self._ids.move_to_end(value)
+            return agent_id
+        pending = db.info.setdefault(PENDING_USER_AGENTS, {})
+        if value in pending:
+            return pending[value]
+        if not self._take_intern_slot():
+            metrics.increment("audit.user_agent.skipped")
+            return None
+        agent_id = await self._intern(db, value)
+        if agent_id is not None:
+            pending[value] = agent_id
+        return agent_id
+    
+    def remember(self, value: str, agent_id: int) -> None:
+        """Cache the ID of a committed User-Agent row."""
+        self._ids[value] = agent_id
+        self._ids.move_to_end(value)
+        if len(self._ids) > self.max_entries:
+            self._ids.popitem(last=False)
+    
+    def _take_intern_slot(self) -> bool:
+        """Count a new agent against this minute's budget."""
+        now = time.monotonic()
+        if now - self._window_start >= 60:
+            self._window_start, self._window_count = now, 0
+        if self._window_count >= self.per_minute:
+            return False
+        self._window_count += 1
+        return True
+    
+    async def _intern(self, db: AsyncSession, value: str) -> int | None:
+        digest = user_agent_digest(value)
+        try:
+            # A failure here must not abort the caller's transaction
+            async with db.begin_nested():
+                result = await db.execute(
+                    insert(UserAgent)
+                    .values(digest=digest, value=value)
+                    .on_conflict_do_nothing(index_elements=[UserAgent.digest])
+                    .returning(UserAgent.id)
+                )
+                agent_id = result.scalar_one_or_none()
+                if agent_id is None:
+                    # Another transaction interned it first
+                    result = await db.execute(
+                        select(UserAgent.id).where(UserAgent.digest == digest)
+                    )
+                    agent_id = result.scalar_one()
+        except SQLAlchemyError as exc:
+            logger.warning("user_agent_intern_failed", error=str(exc))
+            return None
+        return agent_id
+    
+    def clear(self) -> None:
+        """Forget all cached IDs."""
+        self._ids.clear()
+
+
+user_agents = UserAgentInterner(
+    settings.AUDIT_USER_AGENT_CACHE_SIZE,
+    settings.AUDIT_USER_AGENT_MAX_LENGTH,
+    settings.AUDIT_USER_AGENT_INTERN_PER_MINUTE,
+)
+
+
+@event.listens_for(Session, "after_commit")
+def _remember_pending_user_agents(session) -> None:
+    """Cache the agents interned by a transaction that committed."""
+    # Also fired for savepoints, which settle nothing
+    if session.in_nested_transaction():
+        return
+    for value, agent_id in session.info.pop(PENDING_USER_AGENTS, {}).items():
+        user_agents.remember(value, agent_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_pending_user_agents(session) -> None:
+    """Forget the agents interned by a transaction that rolled back."""
+    # Also fired for savepoints, which settle nothing
+    if session.in_nested_transaction():
+        return
+    session.info.pop(PENDING_USER_AGENTS, None)
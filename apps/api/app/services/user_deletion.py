@@ -0,0 +1,251 @@
+"""Background worker removing deleted users and their rows in batches."""
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import delete, exists, func, or_, select, update
+from sqlalchemy.exc import IntegrityError
+
+from app.core.cache import entity_cache, flush_pending_invalidations, query_cache
+from app.core.config import settings
+from app.core.database import async_session_maker, engine
+from app.core.logging import get_logger
+from app.core.metrics import metrics
+from app.models.audit_log import AuditLog
+from app.models.project import Project
+from app.models.user import User
+from app.models.user_deletion import UserDeletion, UserDeletionStatus
+from app.services.token_versions import token_versions
+
+logger = get_logger(__name__)
+
+# First key of the advisory locks that keep each job on one worker
+USER_DELETION_LOCK_ID = 0x75736572
+
+UNFINISHED = (UserDeletionStatus.pending, UserDeletionStatus.running)
+
+
+class UserDeletionWorker:
+    """Runs ``UserDeletion`` jobs.
+
+    Each batch is its own short transaction: up to ``USER_DELETION_BATCH_SIZE``
+    of the user's projects are deleted (or reassigned), then their audit logs
+    are detached, with the job's progress counters updated alongside. Once
+    nothing references the user, the user row is deleted. Batches only
+    touch rows that still reference the user, so a job interrupted by a
+    restart or an error resumes where it stopped. A job that keeps failing
+    is retried with growing waits and marked failed after
+    ``USER_DELETION_MAX_ATTEMPTS`` runs without progress.
+    """
+
+    def __init__(self):
+        self._task: asyncio.Task | None = None
+        self._wake = asyncio.Event()
+
+    def start(self) -> None:
+        """Start the background task."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the background task; unfinished jobs resume on the next start."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def notify(self) -> None:
+        """Look for jobs now instead of at the next poll."""
+        self._wake.set()
+
+    async def run_pending(self) -> int:
+        """Run every unfinished job no other worker holds, returning how many completed."""
+        async with async_session_maker() as session:
+            result = await session.execute(
+                select(UserDeletion.id, UserDeletion.attempts, UserDeletion.updated_at)
+                .where(UserDeletion.status.in_(UNFINISHED))
+                .order_by(UserDeletion.id)
+            )
+            now = datetime.now(timezone.utc)
+            job_ids = [job.id for job in result if _retry_due(job.attempts, job.updated_at, now)]
+        if not job_ids:
+            return 0
+
+        completed = 0
+        # Session-level locks live on their own connection and end with it if the worker dies
+        async with engine.connect() as connection:
+            lock = await connection.execution_options(isolation_level="AUTOCOMMIT")
+            for job_id in job_ids:
+                claimed = await lock.scalar(
+                    select(func.pg_try_advisory_lock(USER_DELETION_LOCK_ID, job_id))
+                )
+                if not claimed:
+                    continue
+                try:
+                    completed += await self._run_job(job_id)
+                except Exception as exc:
+                    # One failing job must not hold up the jobs queued after it
+                    logger.warning("user_deletion_job_failed", deletion_id=job_id, error=str(exc))
+                    await self._record_error(job_id, exc)
+                finally:
+                    await lock.execute(
+                        select(func.pg_advisory_unlock(USER_DELETION_LOCK_ID, job_id))
+                    )
+        return completed
+
+    async def _run_job(self, job_id: int) -> bool:
+        """Run one job to completion, returning whether it completed."""
+        async with async_session_maker() as session:
+            job = await session.get(UserDeletion, job_id)
+            # Another worker may have finished it since the job list was read
+            if job is None or job.status not in UNFINISHED:
+                return False
+            if job.status == UserDeletionStatus.pending:
+                reassign_to = job.reassign_to_id
+                if reassign_to is not None and await session.get(User, reassign_to) is None:
+                    job.status = UserDeletionStatus.failed
+                    job.error = "Reassignment target no longer exists"
+                    await session.commit()
+                    return False
+                job.projects_total = await session.scalar(
+                    select(func.count(Project.id)).where(Project.owner_id == job.user_id)
+                )
+                job.audit_logs_total = await session.scalar(
+                    select(func.count(AuditLog.id)).where(AuditLog.user_id == job.user_id)
+                )
+                job.status = UserDeletionStatus.running
+                await session.commit()
+            user_id, reassign_to_id = job.user_id, job.reassign_to_id
+
+        while True:
+            while await self._step(job_id, user_id, reassign_to_id):
+                await asyncio.sleep(settings.USER_DELETION_BATCH_PAUSE_SECONDS)
+            if await self._finish(job_id, user_id):
+                return True
+
+    async def _step(self, job_id: int, user_id: int, reassign_to_id: int | None) -> bool:
+        """Remove one batch of the user's dependent rows; False once none are left."""
+        batch = settings.USER_DELETION_BATCH_SIZE
+        async with async_session_maker() as session:
+            try:
+                projects = select(Project.id).where(Project.owner_id == user_id).limit(batch)
+                if reassign_to_id is None:
+                    query = delete(Project).where(Project.id.in_(projects))
+                else:
+                    query = (
+                        update(Project)
+                        .where(Project.id.in_(projects))
+                        .values(owner_id=reassign_to_id)
+                    )
+                result = await session.execute(
+                    query.returning(Project.id).execution_options(synchronize_session=False)
+                )
+                project_ids = list(result.scalars().all())
+
+                audit_logs = 0
+                if not project_ids:
+                    logs = select(AuditLog.id).where(AuditLog.user_id == user_id).limit(batch)
+                    result = await session.execute(
+                        update(AuditLog)
+                        .where(AuditLog.id.in_(logs))
+                        .values(user_id=None)
+                        .execution_options(synchronize_session=False)
+                    )
+                    audit_logs = result.rowcount
+
+                await session.execute(
+                    update(UserDeletion)
+                    .where(UserDeletion.id == job_id)
+                    .values(
+                        projects_done=UserDeletion.projects_done + len(project_ids),
+                        audit_logs_done=UserDeletion.audit_logs_done + audit_logs,
+                        error=None,
+                        attempts=0,
+                    )
+                )
+                if project_ids:
+                    await entity_cache.invalidate_many(session, Project, project_ids)
+                    await query_cache.bump(session, Project.__tablename__)
+                await session.commit()
+            finally:
+                await flush_pending_invalidations(session)
+
+        metrics.increment("user_deletion.rows", len(project_ids) + audit_logs)
+        return bool(project_ids) or audit_logs > 0
+
+    async def _finish(self, job_id: int, user_id: int) -> bool:
+        """Delete the user row and complete the job; False if rows referencing it appeared since."""
+        async with async_session_maker() as session:
+            try:
+                # New rows referencing the user wait on this lock, so the check below stays true
+                await session.execute(select(User.id).where(User.id == user_id).with_for_update())
+                referenced = await session.scalar(
+                    select(
+                        or_(
+                            exists().where(Project.owner_id == user_id),
+                            exists().where(AuditLog.user_id == user_id),
+                        )
+                    )
+                )
+                if referenced:
+                    await session.rollback()
+                    return False
+                await session.execute(delete(User).where(User.id == user_id))
+                await session.execute(
+                    update(UserDeletion)
+                    .where(UserDeletion.id == job_id)
+                    .values(status=UserDeletionStatus.completed, completed_at=func.now())
+                )
+                await entity_cache.invalidate(session, User, user_id)
+                await query_cache.bump(session, User.__tablename__)
+                await session.commit()
+            except IntegrityError:
+                # A row referencing the user slipped in; remove it with another batch
+                await session.rollback()
+                return False
+            finally:
+                await flush_pending_invalidations(session)
+        token_versions.revoke_user(user_id)
+        logger.info("user_deleted", user_id=user_id, deletion_id=job_id)
+        return True
+
+    async def _record_error(self, job_id: int, exc: Exception) -> None:
+        """Store a job's error, failing it once out of attempts.
+
+        Constraint violations will not go away on retry, so they fail it at once.
+        """
+        async with async_session_maker() as session:
+            job = await session.get(UserDeletion, job_id)
+            if job is None:
+                return
+            job.error = str(exc)[:2000]
+            job.attempts += 1
+            out_of_attempts = job.attempts >= settings.USER_DELETION_MAX_ATTEMPTS
+            if isinstance(exc, IntegrityError) or out_of_attempts:
+                job.status = UserDeletionStatus.failed
+            await session.commit()
+
+    async def _run(self) -> None:
+        while True:
+            self._wake.clear()
+            try:
+                await self.run_pending()
+            except Exception as exc:
+                logger.warning("user_deletion_failed", error=str(exc))
+            try:
+                await asyncio.wait_for(self._wake.wait(), settings.USER_DELETION_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+
+
+def _retry_due(attempts: int, updated_at: datetime, now: datetime) -> bool:
+    """Check whether a job's wait since its last failed run is over."""
+    if not attempts:
+        return True
+    wait = settings.USER_DELETION_POLL_SECONDS * 2 ** (attempts - 1)
+    return now >= updated_at + timedelta(seconds=wait)
+
+
+user_deletions = UserDeletionWorker()
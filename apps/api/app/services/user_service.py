@@ -1,12 +1,61 @@
 """User service for business logic."""
-from datetime import datetime, timezone
+from collections.abc import Iterable
+from datetime import datetime
+from typing import Any
 
-from sqlalchemy import func, select
+from sqlalchemy import (
+    Column,
+    MetaData,
+    Row,
+    Select,
+    String,
+    Table,
+    any_,
+    cast,
+    func,
+    inspect,
+    literal,
+    select,
+    true,
+)
+from sqlalchemy.dialects.postgresql import ARRAY, insert
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.schema import CreateTable
 
+from app.core.cache import attach_entity, dump_entity, entity_cache, query_cache
+from app.core.database import async_session_maker
+from app.core.http_cache import make_etag
 from app.core.security import get_password_hash, verify_password
 from app.models.user import User, UserRole
-from app.schemas.user import UserCreate, UserUpdate
+from app.models.user_deletion import UserDeletion, UserDeletionStatus
+from app.schemas.user import UserCreate, UserImportError, UserUpdate
+from app.services.change_feed import ChangeCursor, ChangeFeedService, ChangeSet
+from app.services.last_login import last_login_buffer
+from app.services.pagination import order_and_paginate
+from app.services.query_guard import QueryCostGuard
+from app.services.token_versions import token_versions
+from app.services.user_transfer import password_hasher
+
+# Columns lists may be sorted by; the rest are unindexed
+USER_SORT_COLUMNS = {
+    "created_at": User.created_at,
+    "updated_at": User.updated_at,
+    "email": User.email,
+    "id": User.id,
+}
+
+# Transaction-local table bulk imports are copied into before the merge
+IMPORT_STAGING = Table(
+    "user_import",
+    MetaData(),
+    Column("email", String),
+    Column("hashed_password", String),
+    Column("full_name", String),
+    Column("role", String),
+    prefixes=["TEMPORARY"],
+    postgresql_on_commit="DROP",
+)
 
 
 class UserService:
@@ -15,64 +64,179 @@ class UserService:
     def __init__(self, db: AsyncSession):
         self.db = db
     
+    async def _invalidate(self, user: User) -> None:
+        """Drop cached copies of a user and of user lists after a write."""
+        await entity_cache.invalidate(self.db, User, user.id)
+        await query_cache.bump(self.db, User.__tablename__)
+    
     async def get_by_id(self, user_id: int) -> User | None:
-        """Get user by ID."""
+        """Get user by ID, served from the entity cache when possible."""
+        user = await entity_cache.load(self.db, User, user_id)
+        if user is not None:
+            return user
+        
         result = await self.db.execute(select(User).where(User.id == user_id))
-        return result.scalar_one_or_none()
+        user = result.scalar_one_or_none()
+        if user is not None:
+            await entity_cache.store(self.db, user)
+        return user
+    
+    async def get_many(self, user_ids: Iterable[int]) -> list[User]:
+        """Get users by ID, querying only those missing from the entity cache."""
+        users = []
+        missing = []
+        for user_id in set(user_ids):
+            user = await entity_cache.load(self.db, User, user_id)
+            if user is None:
+                missing.append(user_id)
+            else:
+                users.append(user)
+        
+        if missing:
+            result = await self.db.execute(select(User).where(User.id.in_(missing)))
+            for user in result.scalars():
+                await entity_cache.store(self.db, user)
+                users.append(user)
+        return users
     
     async def get_by_email(self, email: str) -> User | None:
         """Get user by email."""
         result = await self.db.execute(select(User).where(User.email == email))
         return result.scalar_one_or_none()
     
-    async def get_list(
+    def _filter(
         self,
-        page: int = 1,
-        page_size: int = 20,
-        sort_by: str = "created_at",
-        sort_order: str = "desc",
-        search: str | None = None,
-        role: UserRole | None = None,
-        is_active: bool | None = None,
-    ) -> tuple[list[User], int]:
-        """Get paginated list of users with filters."""
-        query = select(User)
-        count_query = select(func.count(User.id))
-        
-        # Apply filters
+        query: Select,
+        search: str | None,
+        role: UserRole | None,
+        is_active: bool | None,
+    ) -> Select:
+        """Apply list filters to a query."""
         if search:
             search_filter = f"%{search}%"
             query = query.where(
                 (User.email.ilike(search_filter)) | (User.full_name.ilike(search_filter))
             )
-            count_query = count_query.where(
-                (User.email.ilike(search_filter)) | (User.full_name.ilike(search_filter))
-            )
         
         if role:
             query = query.where(User.role == role)
-            count_query = count_query.where(User.role == role)
         
         if is_active is not None:
             query = query.where(User.is_active == is_active)
-            count_query = count_query.where(User.is_active == is_active)
         
-        # Apply sorting
-        sort_column = getattr(User, sort_by, User.created_at)
-        if sort_order == "desc":
-            query = query.order_by(sort_column.desc())
-        else:
-            query = query.order_by(sort_column.asc())
+        return query
+    
+    async def _count(
+        self,
+        page_query: Select,
+        search: str | None,
+        role: UserRole | None,
+        is_active: bool | None,
+    ) -> tuple[int, bool]:
+        """Count list matches, returning the total and whether it is an estimate."""
+        if search:
+            # ILIKE '%...%' cannot use an index; check the planner's estimate before scanning
+            match_query = self._filter(select(User.id), search, role, is_active)
+            return await QueryCostGuard(self.db).count(page_query, match_query)
+        count_query = self._filter(select(func.count(User.id)), search, role, is_active)
+        return (await self.db.execute(count_query)).scalar_one(), False
+    
+    def _list_cache_key(
+        self,
+        page: int,
+        page_size: int,
+        sort_by: str,
+        sort_order: str,
+        search: str | None,
+        role: UserRole | None,
+        is_active: bool | None,
+    ) -> tuple:
+        """Normalize list parameters into a query cache key."""
+        sort_column = USER_SORT_COLUMNS.get(sort_by, User.created_at)
+        return (
+            User.__tablename__, page, page_size, sort_column.key, sort_order,
+            search or None, role.value if role else None, is_active,
+        )
+    
+    async def list_etag(
+        self,
+        page: int = 1,
+        page_size: int = 20,
+        sort_by: str = "created_at",
+        sort_order: str = "desc",
+        search: str | None = None,
+        role: UserRole | None = None,
+        is_active: bool | None = None,
+    ) -> str | None:
+        """Get a list page's ETag from table versions, without running the query."""
+        versions = await query_cache.versions(self.db, (User.__tablename__,))
+        if versions is None:
+            return None
+        cache_key = self._list_cache_key(
+            page, page_size, sort_by, sort_order, search, role, is_active
+        )
+        return make_etag(cache_key, versions)
+    
+    async def get_list(
+        self,
+        page: int = 1,
+        page_size: int = 20,
+        sort_by: str = "created_at",
+        sort_order: str = "desc",
+        search: str | None = None,
+        role: UserRole | None = None,
+        is_active: bool | None = None,
+    ) -> tuple[list[User], int, bool]:
+        """Get a page of users with filters, the total and whether it is estimated.
         
-        # Apply pagination
-        offset = (page - 1) * page_size
-        query = query.offset(offset).limit(page_size)
+        Results are cached per table version.
+        """
+        sort_column = USER_SORT_COLUMNS.get(sort_by, User.created_at)
+        cache_key = self._list_cache_key(
+            page, page_size, sort_by, sort_order, search, role, is_active
+        )
+        versions = await query_cache.versions(self.db, (User.__tablename__,))
+        if versions is not None:
+            cached = query_cache.get(cache_key, versions)
+            if cached is not None:
+                rows, total, estimated = cached
+                users = [await attach_entity(self.db, User, row) for row in rows]
+                return users, total, estimated
+        
+        query = self._filter(select(User), search, role, is_active)
+        query = order_and_paginate(query, sort_column, sort_order, page, page_size)
         
-        # Execute queries
+        # Execute queries; counting first lets the cost guard reject before any scan
+        total, estimated = await self._count(query, search, role, is_active)
         result = await self.db.execute(query)
-        count_result = await self.db.execute(count_query)
+        users = list(result.scalars().all())
+        
+        if versions is not None:
+            rows = [dump_entity(u) for u in users]
+            query_cache.set(cache_key, versions, (rows, total, estimated))
+        return users, total, estimated
+    
+    async def get_partial_list(
+        self,
+        columns: list[str],
+        page: int = 1,
+        page_size: int = 20,
+        sort_by: str = "created_at",
+        sort_order: str = "desc",
+        search: str | None = None,
+        role: UserRole | None = None,
+        is_active: bool | None = None,
+    ) -> tuple[list[dict[str, Any]], int, bool]:
+        """Get a page of users selecting only the given columns."""
+        sort_column = USER_SORT_COLUMNS.get(sort_by, User.created_at)
+        query = self._filter(
+            select(*(getattr(User, column) for column in columns)), search, role, is_active
+        )
+        query = order_and_paginate(query, sort_column, sort_order, page, page_size)
         
-        return list(result.scalars().all()), count_result.scalar_one()
+        total, estimated = await self._count(query, search, role, is_active)
+        result = await self.db.execute(query)
+        return [dict(row) for row in result.mappings()], total, estimated
     
     async def create(self, data: UserCreate) -> User:
         """Create a new user."""
@@ -84,35 +248,171 @@ class UserService:
         )
         self.db.add(user)
         await self.db.flush()
+        await query_cache.bump(self.db, User.__tablename__)
         await self.db.refresh(user)
         return user
     
+    async def import_users(
+        self, rows: list[tuple[int, UserCreate]]
+    ) -> tuple[list[Row], list[UserImportError]]:
+        """Create users from validated import rows with set-based statements.
+        
+        Emails repeated in the import or already registered are reported as
+        errors rather than created; one query on a short-lived session checks
+        every email, so no transaction is held open while passwords are
+        hashed across worker processes. The rows are then loaded into a
+        staging table with COPY and merged into ``users`` in one INSERT.
+        Returns the created users' ``(id, email, role)`` and the errors.
+        """
+        errors = []
+        pending: dict[str, tuple[int, UserCreate]] = {}
+        for line, data in rows:
+            if data.email in pending:
+                errors.append(
+                    UserImportError(line=line, email=data.email, error="Duplicate email in import")
+                )
+            else:
+                pending[data.email] = (line, data)
+        
+        if pending:
+            # Not self.db: its transaction would sit idle through the hashing below
+            async with async_session_maker() as session:
+                result = await session.execute(
+                    select(User.email).where(
+                        User.email == any_(literal(list(pending), ARRAY(String)))
+                    )
+                )
+                registered = result.scalars().all()
+            for email in registered:
+                line, _ = pending.pop(email)
+                errors.append(
+                    UserImportError(line=line, email=email, error="Email already registered")
+                )
+        if not pending:
+            return [], errors
+        
+        hashes = await password_hasher.hash_many([data.password for _, data in pending.values()])
+        await self.db.execute(CreateTable(IMPORT_STAGING))
+        connection = await (await self.db.connection()).get_raw_connection()
+        await connection.driver_connection.copy_records_to_table(
+            IMPORT_STAGING.name,
+            records=[
+                (data.email, hashed, data.full_name, data.role.value)
+                for (_, data), hashed in zip(pending.values(), hashes)
+            ],
+            columns=[column.name for column in IMPORT_STAGING.columns],
+        )
+        staged = IMPORT_STAGING.c
+        result = await self.db.execute(
+            insert(User)
+            .from_select(
+                ["email", "hashed_password", "full_name", "role", "is_active"],
+                select(
+                    staged.email,
+                    staged.hashed_password,
+                    staged.full_name,
+                    cast(staged.role, User.role.type),
+                    true(),
+                ),
+            )
+            # Emails registered since the check above lose to the existing user
+            .on_conflict_do_nothing(index_elements=[User.email])
+            .returning(User.id, User.email, User.role)
+        )
+        created = list(result.all())
+        for row in created:
+            del pending[row.email]
+        errors.extend(
+            UserImportError(line=line, email=email, error="Email already registered")
+            for email, (line, _) in pending.items()
+        )
+        if created:
+            await query_cache.bump(self.db, User.__tablename__)
+        return created, errors
+    
     async def update(self, user: User, data: UserUpdate) -> User:
-        """Update a user."""
+        """Update a user, revoking their tokens if the role or active flag changes."""
         update_data = data.model_dump(exclude_unset=True)
+        revoke = any(
+            getattr(user, field) != update_data[field]
+            for field in ("role", "is_active")
+            if field in update_data
+        )
         for field, value in update_data.items():
             setattr(user, field, value)
+        if revoke:
+            user.token_version = User.token_version + 1
         await self.db.flush()
+        await self._invalidate(user)
         await self.db.refresh(user)
+        if revoke:
+            token_versions.revoke_on_commit(self.db, user.id, user.token_version)
         return user
     
+    async def check_password(self, user: User, password: str) -> bool:
+        """Check a user's password; users served from the cache are loaded without the hash."""
+        if "hashed_password" in inspect(user).unloaded:
+            await self.db.refresh(user, ["hashed_password"])
+        return verify_password(password, user.hashed_password)
+    
     async def update_password(self, user: User, new_password: str) -> User:
         """Update user password."""
         user.hashed_password = get_password_hash(new_password)
         await self.db.flush()
+        await self._invalidate(user)
         await self.db.refresh(user)
         return user
     
-    async def update_last_login(self, user: User) -> User:
-        """Update last login timestamp."""
-        user.last_login = datetime.now(timezone.utc)
-        await self.db.flush()
-        return user
+    async def update_last_login(self, user: User) -> datetime:
+        """Record a login; the timestamp is written back later in bulk."""
+        return last_login_buffer.record(user.id)
     
-    async def delete(self, user: User) -> None:
-        """Delete a user."""
-        await self.db.delete(user)
+    async def request_deletion(
+        self, user: User, requested_by_id: int, reassign_to_id: int | None = None
+    ) -> UserDeletion | None:
+        """Deactivate a user and queue the deletion of their rows.
+        
+        The user is locked out by revoking their tokens once this commits; the
+        ``UserDeletionWorker`` removes their projects (or gives them to
+        ``reassign_to_id``), detaches their audit logs and deletes the user
+        in batches after this transaction commits. Returns None if the user
+        already has an unfinished deletion.
+        """
+        deletion = UserDeletion(
+            user_id=user.id,
+            email=user.email,
+            requested_by_id=requested_by_id,
+            reassign_to_id=reassign_to_id,
+        )
+        try:
+            # The unique index on unfinished jobs settles concurrent requests for one user
+            async with self.db.begin_nested():
+                self.db.add(deletion)
+                await self.db.flush()
+        except IntegrityError:
+            return None
+        user.is_active = False
+        user.token_version = User.token_version + 1
         await self.db.flush()
+        await self._invalidate(user)
+        await self.db.refresh(user)
+        await self.db.refresh(deletion)
+        token_versions.revoke_on_commit(self.db, user.id, user.token_version)
+        return deletion
+    
+    async def get_deletion(self, deletion_id: int) -> UserDeletion | None:
+        """Get a user deletion job by ID."""
+        return await self.db.get(UserDeletion, deletion_id)
+    
+    async def get_unfinished_deletion(self, user_id: int) -> UserDeletion | None:
+        """Get a user's pending or running deletion job, if any."""
+        result = await self.db.execute(
+            select(UserDeletion).where(
+                UserDeletion.user_id == user_id,
+                UserDeletion.status.in_([UserDeletionStatus.pending, UserDeletionStatus.running]),
+            )
+        )
+        return result.scalars().first()
     
     async def authenticate(self, email: str, password: str) -> User | None:
         """Authenticate user by email and password."""
@@ -125,6 +425,10 @@ class UserService:
             return None
         return user
     
+    async def get_changes(self, since: ChangeCursor | None, limit: int) -> ChangeSet:
+        """Get users changed and deleted since a change cursor."""
+        return await ChangeFeedService(self.db).get_changes(User, since, limit)
+    
     async def count(self) -> int:
         """Get total user count."""
         result = await self.db.execute(select(func.count(User.id)))
@@ -0,0 +1 @@
+"""Standalone micro-benchmarks for API hot paths."""
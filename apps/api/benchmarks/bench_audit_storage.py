@@ -0,0 +1,245 @@
+"""Storage size and insert throughput of the audit_logs layouts.
+
+Builds the original layout (free-text user agent, ``varchar`` IP and
+resource type) and the compact one (interned user agents, ``INET``,
+enum resource type, full fillfactor) side by side in two schemas of a
+disposable Postgres database. Both get the same generated rows and
+indexes. The benchmark reports heap, index and TOAST sizes, then times
+single-row inserts in batched transactions the way requests write.
+
+Run from ``apps/api`` against a database you can discard; it drops and
+recreates the ``bench_wide`` and ``bench_compact`` schemas::
+
+    python -m benchmarks.bench_audit_storage postgresql+asyncpg://localhost/bench --rows 2000000
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.models.audit_log import AuditAction, AuditResourceType
+
+# Distinct user agents in the generated data; real traffic has few
+AGENTS = 200
+INSERT_BATCH = 500
+
+ACTIONS = ", ".join(f"'{action.value}'" for action in AuditAction)
+RESOURCE_TYPES = ", ".join(f"'{kind.value}'" for kind in AuditResourceType)
+
+INDEXES = [
+    "CREATE INDEX ix_audit_logs_user_id_created_at ON audit_logs (user_id, created_at)",
+    "CREATE INDEX ix_audit_logs_action_created_at ON audit_logs (action, created_at)",
+    "CREATE INDEX ix_audit_logs_resource_type_created_at ON audit_logs (resource_type, created_at)",
+    "CREATE INDEX ix_audit_logs_request_id ON audit_logs (request_id)",
+]
+
+SCHEMA_SQL = {
+    "bench_wide": [
+        f"CREATE TYPE auditaction AS ENUM ({ACTIONS})",
+        """
+        CREATE TABLE audit_logs (
+            id serial PRIMARY KEY,
+            user_id integer,
+            action auditaction NOT NULL,
+            resource_type varchar(50) NOT NULL,
+            resource_id integer,
+            details jsonb,
+            ip_address varchar(45),
+            user_agent text,
+            request_id varchar(36),
+            created_at timestamptz NOT NULL DEFAULT now()
+        )
+        """,
+        "CREATE INDEX ix_audit_logs_created_at ON audit_logs (created_at)",
+        *INDEXES,
+    ],
+    "bench_compact": [
+        f"CREATE TYPE auditaction AS ENUM ({ACTIONS})",
+        f"CREATE TYPE auditresourcetype AS ENUM ({RESOURCE_TYPES})",
+        """
+        CREATE TABLE user_agents (
+            id serial PRIMARY KEY,
+            digest uuid NOT NULL UNIQUE,
+            value text NOT NULL
+        )
+        """,
+        """
+        CREATE TABLE audit_logs (
+            id serial PRIMARY KEY WITH (fillfactor = 100),
+            user_id integer,
+            action auditaction NOT NULL,
+            resource_type auditresourcetype NOT NULL,
+            resource_id integer,
+            details jsonb,
+            ip_address inet,
+            user_agent_id integer REFERENCES user_agents (id),
+            request_id varchar(36),
+            created_at timestamptz NOT NULL DEFAULT now()
+        ) WITH (fillfactor = 100, toast_tuple_target = 256)
+        """,
+        "CREATE INDEX ix_audit_logs_created_at ON audit_logs (created_at) WITH (fillfactor = 100)",
+        *INDEXES,
+        """
+        INSERT INTO user_agents (id, digest, value)
+        SELECT id, md5(value)::uuid, value FROM pg_temp.bench_agents
+        """,
+    ],
+}
+
+AGENTS_SQL = """
+    CREATE TEMP TABLE bench_agents ON COMMIT DROP AS
+    SELECT i AS id,
+           'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) '
+           || 'Chrome/' || (100 + i % 30) || '.0.' || (6000 + i) || '.' || (i * 7 % 200)
+           || ' Safari/537.36' AS value
+    FROM generate_series(1, :agents) i
+"""
+
+# Generated resource type and IP, as text
+RESOURCE_TYPE_SQL = "(ARRAY['auth', 'user', 'project'])[1 + g % 3]"
+IP_SQL = "'10.' || (g % 256) || '.' || (g / 256 % 256) || '.' || (1 + g % 250)"
+
+# Layout-specific column and expressions for the resource type, IP and user agent
+LAYOUT_COLUMNS = {
+    "bench_wide": ("user_agent", "{resource_type}", "{ip}", "a.value"),
+    "bench_compact": ("user_agent_id", "({resource_type})::auditresourcetype", "({ip})::inet", "a.id"),
+}
+
+FILL_SQL = """
+    INSERT INTO audit_logs (user_id, action, resource_type, resource_id, details,
+                            ip_address, {agent_column}, request_id, created_at)
+    SELECT 1 + g % 5000,
+           (enum_range(NULL::auditaction))[1 + g % 12],
+           {resource_type},
+           g % 10000,
+           jsonb_build_object('name', 'Project ' || g % 10000, 'status', 'active'),
+           {ip},
+           {agent},
+           md5(g::text),
+           now() - (:rows - g) * interval '1 second'
+    FROM generate_series(1, :rows) g
+    JOIN pg_temp.bench_agents a ON a.id = 1 + g % :agents
+"""
+
+INSERT_SQL = """
+    INSERT INTO audit_logs (user_id, action, resource_type, resource_id, details,
+                            ip_address, {agent_column}, request_id)
+    VALUES (:user_id, :action, {resource_type}, :resource_id, CAST(:details AS jsonb),
+            {ip}, :agent, :request_id)
+"""
+
+SIZES_SQL = """
+    SELECT pg_relation_size('audit_logs'),
+           pg_indexes_size('audit_logs'),
+           coalesce(pg_total_relation_size(nullif(reltoastrelid, 0)), 0),
+           pg_total_relation_size('audit_logs')
+             + coalesce(pg_total_relation_size(to_regclass('user_agents')), 0)
+    FROM pg_class WHERE oid = 'audit_logs'::regclass
+"""
+
+
+def layout_sql(schema: str, template: str) -> str:
+    """Fill in a layout's user agent column and typed expressions."""
+    agent_column, resource_type, ip, agent = LAYOUT_COLUMNS[schema]
+    return template.format(
+        agent_column=agent_column,
+        resource_type=resource_type.format(resource_type=RESOURCE_TYPE_SQL),
+        ip=ip.format(ip=IP_SQL),
+        agent=agent,
+    )
+
+
+def insert_sql(schema: str) -> str:
+    """Build a layout's single-row insert as the app issues it."""
+    agent_column, resource_type, ip, _ = LAYOUT_COLUMNS[schema]
+    return INSERT_SQL.format(
+        agent_column=agent_column,
+        resource_type=resource_type.format(resource_type="CAST(:resource_type AS text)"),
+        ip=ip.format(ip="CAST(:ip_address AS text)"),
+    )
+
+
+def agent_value(i: int) -> str:
+    """Build the same User-Agent string as ``AGENTS_SQL``."""
+    return (
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) "
+        f"Chrome/{100 + i % 30}.0.{6000 + i}.{i * 7 % 200} Safari/537.36"
+    )
+
+
+def insert_rows(schema: str, count: int) -> list[dict]:
+    """Generate request-like rows; the compact layout gets interned agent IDs."""
+    rows = []
+    for i in range(count):
+        agent = 1 + i % AGENTS
+        rows.append({
+            "user_id": 1 + i % 5000,
+            "action": list(AuditAction)[i % len(AuditAction)].value,
+            "resource_type": ("auth", "user", "project")[i % 3],
+            "resource_id": i,
+            "details": json.dumps({"name": f"Project {i}", "status": "active"}),
+            "ip_address": f"203.0.{i % 256}.{1 + i % 250}",
+            "agent": agent if schema == "bench_compact" else agent_value(agent),
+            "request_id": f"{i:032x}",
+        })
+    return rows
+
+
+async def bench(engine, schema: str, rows: int, inserts: int) -> None:
+    """Build one layout, report its size, then time request-style inserts."""
+    async with engine.begin() as conn:
+        await conn.execute(text(f"DROP SCHEMA IF EXISTS {schema} CASCADE"))
+        await conn.execute(text(f"CREATE SCHEMA {schema}"))
+        await conn.execute(text(f"SET LOCAL search_path TO {schema}"))
+        await conn.execute(text(AGENTS_SQL), {"agents": AGENTS})
+        for statement in SCHEMA_SQL[schema]:
+            await conn.execute(text(statement))
+        started = time.perf_counter()
+        await conn.execute(text(layout_sql(schema, FILL_SQL)), {"rows": rows, "agents": AGENTS})
+        load = time.perf_counter() - started
+
+    autocommit = engine.execution_options(isolation_level="AUTOCOMMIT")
+    async with autocommit.connect() as conn:
+        await conn.execute(text(f"VACUUM ANALYZE {schema}.audit_logs"))
+
+    async with engine.connect() as conn:
+        await conn.execute(text(f"SET search_path TO {schema}"))
+        heap, indexes, toast, total = (await conn.execute(text(SIZES_SQL))).one()
+        await conn.commit()
+
+        batch = insert_rows(schema, inserts)
+        statement = text(insert_sql(schema))
+        started = time.perf_counter()
+        for offset in range(0, inserts, INSERT_BATCH):
+            async with conn.begin():
+                for row in batch[offset:offset + INSERT_BATCH]:
+                    await conn.execute(statement, row)
+        elapsed = time.perf_counter() - started
+
+    mb = 1024 * 1024
+    print(
+        f"{schema:<14} heap {heap / mb:8.1f} MB  indexes {indexes / mb:8.1f} MB  "
+        f"toast {toast / mb:6.1f} MB  total {total / mb:8.1f} MB  "
+        f"load {rows / load:9.0f} rows/s  insert {inserts / elapsed:7.0f} rows/s"
+    )
+
+
+async def main(database_url: str, rows: int, inserts: int) -> None:
+    engine = create_async_engine(database_url)
+    try:
+        for schema in SCHEMA_SQL:
+            await bench(engine, schema, rows, inserts)
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("database_url", help="async URL of a disposable Postgres database")
+    parser.add_argument("--rows", type=int, default=2_000_000, help="generated rows per layout")
+    parser.add_argument("--inserts", type=int, default=20_000, help="single-row inserts timed")
+    args = parser.parse_args()
+    asyncio.run(main(args.database_url, args.rows, args.inserts))
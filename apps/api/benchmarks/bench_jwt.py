@@ -0,0 +1,74 @@
+"""Throughput of issuing and verifying access tokens.
+
+Times ``create_access_token`` and ``decode_token`` for each installed JWT
+backend with HS256 and ES256 keys, verifying with and without the verified
+token cache.
+
+Run from ``apps/api``::
+
+    python -m benchmarks.bench_jwt
+"""
+import timeit
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+
+from app.core import security
+from app.core.config import settings
+
+ROUNDS = 2000
+
+
+def es256_keys() -> tuple[str, str]:
+    """Generate a throwaway P-256 key pair as PEM strings."""
+    private_key = ec.generate_private_key(ec.SECP256R1())
+    private_pem = private_key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    )
+    public_pem = private_key.public_key().public_bytes(
+        serialization.Encoding.PEM,
+        serialization.PublicFormat.SubjectPublicKeyInfo,
+    )
+    return private_pem.decode(), public_pem.decode()
+
+
+def configure(backend: str, algorithm: str, keys: tuple[str, str] | None) -> None:
+    """Point the security module at a backend and algorithm."""
+    settings.JWT_BACKEND = backend
+    settings.ALGORITHM = algorithm
+    settings.JWT_PRIVATE_KEY, settings.JWT_PUBLIC_KEY = keys or (None, None)
+    security.get_jwt_backend.cache_clear()
+    security.verified_tokens.clear()
+
+
+def rate(func) -> float:
+    """Get the best operations per second over a few repeats."""
+    return ROUNDS / min(timeit.repeat(func, number=ROUNDS, repeat=5))
+
+
+def bench(backend: str, algorithm: str, keys: tuple[str, str] | None = None) -> None:
+    """Time token creation, uncached verification and cached verification."""
+    configure(backend, algorithm, keys)
+    token = security.create_access_token(1, "admin", 0)
+
+    def decode_uncached():
+        security.verified_tokens.clear()
+        security.decode_token(token)
+
+    create = rate(lambda: security.create_access_token(1, "admin", 0))
+    uncached = rate(decode_uncached)
+    cached = rate(lambda: security.decode_token(token))
+    print(
+        f"{backend:<6} {algorithm:<6} create {create:9.0f}/s  "
+        f"decode {uncached:9.0f}/s  decode (cached) {cached:9.0f}/s"
+    )
+
+
+if __name__ == "__main__":
+    backends = ["jose"] + (["pyjwt"] if security.pyjwt is not None else [])
+    keys = es256_keys()
+    for backend in backends:
+        bench(backend, "HS256")
+        bench(backend, "ES256", keys)
@@ -0,0 +1,38 @@
+"""Payload size and encode/decode cost of JSON vs MessagePack responses.
+
+Renders the same 100-row project and audit log pages used by
+``bench_serialization`` through both response encodings.
+
+Run from ``apps/api``::
+
+    python -m benchmarks.bench_msgpack
+"""
+import json
+import timeit
+
+import msgpack
+
+from app.core.responses import render_json, render_msgpack
+from benchmarks.bench_serialization import ROUNDS, ROWS, audit_page, project_page
+
+
+def bench(name: str, page) -> None:
+    """Time encoding and client-side decoding for both media types."""
+    encoded = {"json": render_json(page), "msgpack": render_msgpack(page)}
+    encoders = {"json": lambda: render_json(page), "msgpack": lambda: render_msgpack(page)}
+    decoders = {
+        "json": lambda: json.loads(encoded["json"]),
+        "msgpack": lambda: msgpack.unpackb(encoded["msgpack"], timestamp=3),
+    }
+    for label in ("json", "msgpack"):
+        encode = min(timeit.repeat(encoders[label], number=ROUNDS, repeat=5)) / ROUNDS
+        decode = min(timeit.repeat(decoders[label], number=ROUNDS, repeat=5)) / ROUNDS
+        print(
+            f"{name:<10} {label:<8} {len(encoded[label]):8d} bytes  "
+            f"encode {encode * 1e6 / ROWS:6.2f} us/item  decode {decode * 1e6 / ROWS:6.2f} us/item"
+        )
+
+
+if __name__ == "__main__":
+    bench("projects", project_page())
+    bench("audit", audit_page())
@@ -0,0 +1,94 @@
+"""Per-item serialization cost of 100-row project and audit log pages.
+
+Compares FastAPI's default path (dump, re-validate against
+``response_model``, jsonable pass, stdlib ``json``) with the
+``FastJSONRoute`` pipeline, which renders the validated model once.
+
+Run from ``apps/api``::
+
+    python -m benchmarks.bench_serialization
+"""
+import asyncio
+import timeit
+from datetime import datetime, timezone
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from app.core.responses import render_json
+from app.models.audit_log import AuditAction
+from app.models.project import ProjectPriority, ProjectStatus
+from app.models.user import UserRole
+from app.schemas.audit_log import AuditLogListResponse, AuditLogResponse
+from app.schemas.project import ProjectListResponse, ProjectResponse
+from app.schemas.user import UserResponse
+
+ROWS = 100
+ROUNDS = 200
+
+
+def project_page() -> ProjectListResponse:
+    """Build a page of projects, each embedding its owner."""
+    now = datetime.now(timezone.utc)
+    owners = [
+        UserResponse(
+            id=i, email=f"owner{i}@example.com", full_name=f"Owner {i}",
+            role=UserRole.manager, is_active=True, created_at=now, updated_at=now,
+            last_login=now,
+        )
+        for i in range(5)
+    ]
+    items = [
+        ProjectResponse(
+            id=i, name=f"Project {i}", description="Quarterly roadmap work " * 4,
+            status=ProjectStatus.active, priority=ProjectPriority.high, budget=1_000_000,
+            start_date=now, end_date=now, owner_id=i % 5, created_at=now, updated_at=now,
+            owner=owners[i % 5],
+        )
+        for i in range(ROWS)
+    ]
+    return ProjectListResponse(items=items, total=ROWS, page=1, page_size=ROWS, pages=1)
+
+
+def audit_page() -> AuditLogListResponse:
+    """Build a page of audit logs with JSONB details and user agents."""
+    now = datetime.now(timezone.utc)
+    items = [
+        AuditLogResponse(
+            id=i, user_id=1, action=AuditAction.project_update, resource_type="project",
+            resource_id=i, details={"name": f"Project {i}", "status": "active", "budget": i},
+            ip_address="203.0.113.7",
+            user_agent="Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 Chrome/120.0",
+            request_id="8d5e2c1a-4b7f-4e0a-9c3d-2f1e6a7b8c9d", created_at=now,
+            user_email="admin@example.com",
+        )
+        for i in range(ROWS)
+    ]
+    return AuditLogListResponse(items=items, total=ROWS, page=1, page_size=ROWS, pages=1)
+
+
+def bench(name: str, page, response_model) -> None:
+    """Time both serialization paths for one page type."""
+    field = create_response_field(name=f"Response_{name}", type_=response_model)
+    loop = asyncio.new_event_loop()
+
+    def default_path() -> bytes:
+        content = loop.run_until_complete(
+            serialize_response(field=field, response_content=page, is_coroutine=True)
+        )
+        return JSONResponse(content).body
+
+    def fast_path() -> bytes:
+        return render_json(page)
+
+    assert len(default_path()) == len(fast_path())
+    for label, fn in (("default", default_path), ("fast", fast_path)):
+        seconds = min(timeit.repeat(fn, number=ROUNDS, repeat=5)) / ROUNDS
+        print(f"{name:<10} {label:<8} {seconds * 1e6 / ROWS:8.2f} us/item  {seconds * 1e3:7.3f} ms/page")
+    loop.close()
+
+
+if __name__ == "__main__":
+    bench("projects", project_page(), ProjectListResponse)
+    bench("audit", audit_page(), AuditLogListResponse)
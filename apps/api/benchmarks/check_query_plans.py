@@ -0,0 +1,236 @@
+"""Plan regression check for the queries services run.
+
+Loads a generated dataset into a disposable Postgres database, runs each
+service call below while capturing the SQL it issues, and EXPLAINs every
+captured statement. A case fails when a plan sequentially scans a large
+table to filter or order rows, or stops using an index the case expects.
+Unfiltered counts may still scan, and search cases are exempt since
+``ILIKE '%...%'`` cannot use a B-tree index.
+
+The schema is created from the models, so it matches the latest migration.
+Run from ``apps/api`` against an empty database; it exits non-zero on any
+failure::
+
+    python -m benchmarks.check_query_plans postgresql+asyncpg://localhost/plan_check
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import event, func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.core.config import settings
+from app.core.database import Base
+from app.models import AuditAction, AuditResourceType, ProjectStatus, User, UserRole
+from app.services.audit_service import AuditService
+from app.services.project_service import ProjectService
+from app.services.user_service import UserService
+
+# Tables generated large enough that scanning them is a regression
+CHECKED_TABLES = {"users", "projects", "audit_logs"}
+
+# Rows per table at scale 1
+USERS = 20_000
+PROJECTS = 100_000
+AUDIT_LOGS = 1_000_000
+
+SEED_SQL = [
+    """
+    INSERT INTO users (email, hashed_password, full_name, role, is_active, created_at, updated_at)
+    SELECT 'user' || g || '@example.com', 'x', 'User ' || g,
+           (CASE WHEN g % 100 = 0 THEN 'admin' WHEN g % 10 = 0 THEN 'manager' ELSE 'viewer' END)::userrole,
+           g % 20 <> 0,
+           now() - (:users - g) * interval '1 hour',
+           now() - (:users - g) * interval '1 hour'
+    FROM generate_series(1, :users) g
+    """,
+    """
+    INSERT INTO projects (name, description, status, priority, budget, owner_id, created_at, updated_at)
+    SELECT 'Project ' || g, md5(g::text),
+           (ARRAY['draft', 'active', 'active', 'on_hold', 'completed', 'completed', 'archived'])[1 + g % 7]::projectstatus,
+           (ARRAY['low', 'medium', 'medium', 'high', 'critical'])[1 + g % 5]::projectpriority,
+           (g % 1000) * 10000,
+           1 + (g * 7919) % :users,
+           now() - (:projects - g) * interval '5 minutes',
+           now() - (:projects - g) * interval '5 minutes'
+    FROM generate_series(1, :projects) g
+    """,
+    """
+    INSERT INTO audit_logs (user_id, action, resource_type, resource_id, request_id, created_at)
+    SELECT CASE WHEN g % 20 = 0 THEN NULL ELSE 1 + (g * 31) % :users END,
+           (enum_range(NULL::auditaction))[1 + g % 12],
+           (ARRAY['user', 'project', 'auth'])[1 + g % 3]::auditresourcetype,
+           g % 1000,
+           md5(g::text),
+           now() - (:audit_logs - g) * interval '1 second'
+    FROM generate_series(1, :audit_logs) g
+    """,
+]
+
+
+@dataclass
+class Case:
+    """A service call whose queries must keep using the expected indexes."""
+    name: str
+    call: Callable[[AsyncSession], Awaitable[object]]
+    expect: tuple[str, ...] = ()
+    allow_seq_scan: bool = False
+
+
+@dataclass
+class PlanSummary:
+    """Indexes used and offending scans across one case's statements."""
+    indexes: set[str] = field(default_factory=set)
+    seq_scans: list[str] = field(default_factory=list)
+    cost: float = 0.0
+
+
+def hours_ago(hours: int) -> datetime:
+    """Get the time a number of hours before now."""
+    return datetime.now(timezone.utc) - timedelta(hours=hours)
+
+
+CASES = [
+    Case("projects: default list", lambda db: ProjectService(db).get_list(),
+         expect=("ix_projects_created_at",)),
+    Case("projects: status filter", lambda db: ProjectService(db).get_list(status=ProjectStatus.on_hold),
+         expect=("ix_projects_status_created_at",)),
+    Case("projects: owner filter", lambda db: ProjectService(db).get_list(owner_id=42),
+         expect=("ix_projects_owner_id_created_at",)),
+    Case("projects: sort by name", lambda db: ProjectService(db).get_list(sort_by="name", sort_order="asc"),
+         expect=("ix_projects_name",)),
+    Case("projects: sort by updated_at", lambda db: ProjectService(db).get_list(sort_by="updated_at"),
+         expect=("ix_projects_updated_at_id",)),
+    Case("projects: count active", lambda db: ProjectService(db).count_active(),
+         expect=("ix_projects_status_created_at",)),
+    Case("projects: search", lambda db: ProjectService(db).get_list(search="Project 4242"),
+         allow_seq_scan=True),
+    Case("projects: change feed", lambda db: ProjectService(db).get_changes(None, 100),
+         expect=("ix_projects_change_xid_id",)),
+    Case("users: default list", lambda db: UserService(db).get_list(),
+         expect=("ix_users_created_at",)),
+    Case("users: role filter", lambda db: UserService(db).get_list(role=UserRole.manager),
+         expect=("ix_users_role_created_at",)),
+    Case("users: by email", lambda db: UserService(db).get_by_email("user4242@example.com"),
+         expect=("ix_users_email",)),
+    Case("users: search", lambda db: UserService(db).get_list(search="user4242"),
+         allow_seq_scan=True),
+    Case("audit: default list", lambda db: AuditService(db).get_list(),
+         expect=("ix_audit_logs_created_at",)),
+    Case("audit: user filter", lambda db: AuditService(db).get_list(user_id=42),
+         expect=("ix_audit_logs_user_id_created_at",)),
+    Case("audit: action filter", lambda db: AuditService(db).get_list(action=AuditAction.user_role_change),
+         expect=("ix_audit_logs_action_created_at",)),
+    Case("audit: resource filter",
+         lambda db: AuditService(db).get_list(resource_type=AuditResourceType.project),
+         expect=("ix_audit_logs_resource_type_created_at",)),
+    Case("audit: user and date range",
+         lambda db: AuditService(db).get_list(user_id=42, start_date=hours_ago(72), end_date=hours_ago(1)),
+         expect=("ix_audit_logs_user_id_created_at",)),
+    Case("audit: date range", lambda db: AuditService(db).get_list(start_date=hours_ago(2)),
+         expect=("ix_audit_logs_created_at",)),
+    Case("audit: count recent", lambda db: AuditService(db).count_recent(hours=24),
+         expect=("ix_audit_logs_created_at",)),
+    Case("audit: stream catch-up", lambda db: AuditService(db).get_after(AUDIT_LOGS - 500, 100),
+         expect=("audit_logs_pkey",)),
+]
+
+
+def walk(node: dict, summary: PlanSummary, under_limit: bool = False) -> None:
+    """Collect index names and disallowed sequential scans from a plan tree."""
+    if "Index Name" in node:
+        summary.indexes.add(node["Index Name"])
+    if node["Node Type"] == "Seq Scan" and node.get("Relation Name") in CHECKED_TABLES:
+        # Full scans for unfiltered counts are fine; filtering or sorting by scanning is not
+        if "Filter" in node or under_limit:
+            summary.seq_scans.append(node["Relation Name"])
+    under_limit = under_limit or node["Node Type"] == "Limit"
+    for child in node.get("Plans", ()):
+        walk(child, summary, under_limit)
+
+
+async def seed(engine, scale: float) -> None:
+    """Create the schema and load the generated dataset if it is empty."""
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        if (await conn.execute(select(func.count()).select_from(User))).scalar_one():
+            return
+        counts = {
+            "users": int(USERS * scale),
+            "projects": int(PROJECTS * scale),
+            "audit_logs": int(AUDIT_LOGS * scale),
+        }
+        for statement in SEED_SQL:
+            started = time.perf_counter()
+            await conn.execute(text(statement), counts)
+            print(f"seeded in {time.perf_counter() - started:.1f}s: {statement.split()[2]}")
+    autocommit = engine.execution_options(isolation_level="AUTOCOMMIT")
+    async with autocommit.connect() as conn:
+        await conn.execute(text("VACUUM ANALYZE"))
+
+
+async def check(engine, case: Case) -> PlanSummary:
+    """Run a case, then EXPLAIN every statement it issued."""
+    captured: list[tuple[str, object]] = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if not statement.lstrip().upper().startswith(("EXPLAIN", "SET")):
+            captured.append((statement, parameters))
+
+    event.listen(engine.sync_engine, "before_cursor_execute", capture)
+    try:
+        async with async_sessionmaker(engine, expire_on_commit=False)() as session:
+            await case.call(session)
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", capture)
+
+    summary = PlanSummary()
+    async with engine.connect() as conn:
+        for statement, parameters in captured:
+            result = await conn.exec_driver_sql("EXPLAIN (FORMAT JSON) " + statement, parameters)
+            plan = result.scalar_one()
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            root = plan[0]["Plan"]
+            summary.cost = max(summary.cost, root["Total Cost"])
+            walk(root, summary)
+    return summary
+
+
+async def main(database_url: str, scale: float) -> int:
+    # Every call must reach the database for its plan to be checked
+    settings.CACHE_ENABLED = False
+    engine = create_async_engine(database_url)
+    failures = 0
+    try:
+        await seed(engine, scale)
+        for case in CASES:
+            summary = await check(engine, case)
+            problems = [f"missing index {name}" for name in case.expect if name not in summary.indexes]
+            if not case.allow_seq_scan:
+                problems += [f"seq scan on {table}" for table in summary.seq_scans]
+            failures += bool(problems)
+            print(
+                f"{'FAIL' if problems else 'ok':<5}{case.name:<32} cost {summary.cost:>12.1f}  "
+                f"{', '.join(sorted(summary.indexes)) or '-'}"
+            )
+            for problem in problems:
+                print(f"     {problem}")
+    finally:
+        await engine.dispose()
+    print(f"{len(CASES) - failures}/{len(CASES)} cases passed")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("database_url", help="async URL of an empty, disposable Postgres database")
+    parser.add_argument("--scale", type=float, default=1.0, help="dataset size multiplier")
+    args = parser.parse_args()
+    sys.exit(asyncio.run(main(args.database_url, args.scale)))
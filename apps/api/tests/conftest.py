@@ -0,0 +1,71 @@
+"""Shared test setup.
+
+Database tests run against the Postgres database named by
+``TEST_DATABASE_URL``, migrated to head and emptied before each test, and
+are skipped when it is not set::
+
+    TEST_DATABASE_URL=postgresql+asyncpg://localhost/admin_panel_test python -m pytest
+"""
+import asyncio
+import os
+from collections.abc import Awaitable, Callable
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+TEST_DATABASE_URL = os.environ.get("TEST_DATABASE_URL")
+if TEST_DATABASE_URL:
+    # Read when app.core.config is first imported, which happens after this module
+    os.environ["DATABASE_URL"] = TEST_DATABASE_URL
+
+API_ROOT = Path(__file__).resolve().parent.parent
+
+_migrated = False
+
+
+def _migrate() -> None:
+    """Bring the test database to the latest migration, once per run."""
+    global _migrated
+    if _migrated:
+        return
+    from alembic import command
+    from alembic.config import Config
+
+    config = Config(str(API_ROOT / "alembic.ini"))
+    config.set_main_option("script_location", str(API_ROOT / "alembic"))
+    command.upgrade(config, "head")
+    _migrated = True
+
+
+@pytest.fixture
+def database() -> Callable[[Awaitable[Any]], Any]:
+    """Empty the test database and return a runner for coroutines using the app's engine.
+
+    IDs are not reset, so per-worker caches keyed by ID never see a reused one.
+    """
+    if not TEST_DATABASE_URL:
+        pytest.skip("TEST_DATABASE_URL is not set")
+    _migrate()
+
+    from sqlalchemy import text
+
+    from app.core.database import Base, engine
+
+    def run(coro: Awaitable[Any]) -> Any:
+        async def main() -> Any:
+            try:
+                return await coro
+            finally:
+                # Pooled connections belong to this event loop
+                await engine.dispose()
+
+        return asyncio.run(main())
+
+    async def truncate() -> None:
+        tables = ", ".join(table.name for table in Base.metadata.sorted_tables)
+        async with engine.begin() as connection:
+            await connection.execute(text(f"TRUNCATE {tables} CASCADE"))
+
+    run(truncate())
+    return run
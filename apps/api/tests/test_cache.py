@@ -0,0 +1,111 @@
+"""Entity cache tests against an in-process fake Redis."""
+import asyncio
+from datetime import datetime, timezone
+
+import fakeredis
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import make_transient_to_detached
+
+from app.core.cache import EntityCache, RedisTier, dump_entity
+from app.models.user import User, UserRole
+
+
+def make_user(full_name: str = "Ada") -> User:
+    """Build a persistent-looking user as if just loaded from the database."""
+    now = datetime.now(timezone.utc)
+    user = User(
+        id=1,
+        email="ada@example.com",
+        hashed_password="$2b$12$secret",
+        full_name=full_name,
+        role=UserRole.admin,
+        is_active=True,
+        token_version=0,
+        created_at=now,
+        updated_at=now,
+        last_login=None,
+    )
+    make_transient_to_detached(user)
+    return user
+
+
+@pytest.fixture
+def redis():
+    return fakeredis.aioredis.FakeRedis(decode_responses=True)
+
+
+def worker(redis) -> EntityCache:
+    """An entity cache as set up in one uvicorn worker, sharing the Redis tier."""
+    tier = RedisTier()
+    tier.client = redis
+    return EntityCache(tier)
+
+
+def test_snapshots_leave_out_secret_columns(redis):
+    async def run():
+        cache = worker(redis)
+        session = AsyncSession()
+        assert await cache.load(session, User, 1) is None
+        await cache.store(session, make_user())
+
+        raw = await redis.get(cache.key(User, 1))
+        assert raw is not None
+        assert "hashed_password" not in raw
+        assert "hashed_password" not in dump_entity(make_user())
+
+    asyncio.run(run())
+
+
+def test_store_is_served_to_other_workers(redis):
+    async def run():
+        first, second = worker(redis), worker(redis)
+        session = AsyncSession()
+        assert await first.load(session, User, 1) is None
+        await first.store(session, make_user())
+
+        cached = await second.load(AsyncSession(), User, 1)
+        assert cached is not None
+        assert cached.full_name == "Ada"
+
+    asyncio.run(run())
+
+
+def test_store_after_invalidate_is_dropped(redis):
+    async def run():
+        cache = worker(redis)
+        reader, writer = AsyncSession(), AsyncSession()
+        # The read-through misses and starts loading the old row...
+        assert await cache.load(reader, User, 1) is None
+        # ...while a writer commits and invalidates the user
+        await cache.invalidate(writer, User, 1)
+        await cache.flush_pending(writer)
+        await cache.store(reader, make_user("Stale"))
+
+        assert await redis.get(cache.key(User, 1)) is None
+        assert cache.local.get(cache.key(User, 1)) is None
+
+    asyncio.run(run())
+
+
+def test_store_after_invalidate_on_another_worker_is_dropped(redis):
+    async def run():
+        first, second = worker(redis), worker(redis)
+        reader = AsyncSession()
+        assert await first.load(reader, User, 1) is None
+        await second.invalidate(AsyncSession(), User, 1)
+        await first.store(reader, make_user("Stale"))
+
+        assert await redis.get(first.key(User, 1)) is None
+        assert await second.load(AsyncSession(), User, 1) is None
+
+    asyncio.run(run())
+
+
+def test_store_without_a_load_is_skipped(redis):
+    async def run():
+        cache = worker(redis)
+        await cache.store(AsyncSession(), make_user())
+        assert await redis.get(cache.key(User, 1)) is None
+
+    asyncio.run(run())
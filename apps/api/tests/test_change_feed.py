@@ -0,0 +1,73 @@
+"""Change feed tests; the ordering ones need Postgres (see conftest)."""
+from sqlalchemy import delete
+
+from app.core.database import async_session_maker
+from app.models.project import Project
+from app.models.user import User
+from app.services.change_feed import ChangeCursor, decode_change_token, encode_change_token
+from app.services.project_service import ProjectService
+
+
+async def add_owner() -> int:
+    async with async_session_maker() as session:
+        owner = User(email="owner@example.com", hashed_password="x", full_name="Owner")
+        session.add(owner)
+        await session.commit()
+        return owner.id
+
+
+async def get_changes(since: ChangeCursor | None):
+    async with async_session_maker() as session:
+        return await ProjectService(session).get_changes(since, 100)
+
+
+def test_change_tokens_round_trip():
+    cursor = ChangeCursor(xid=812, id=5, tombstone_xid=790, tombstone_id=3)
+    assert decode_change_token(encode_change_token(cursor)) == cursor
+    assert decode_change_token("not-a-token") is None
+
+
+def test_late_committing_row_is_returned_after_the_cursor_passes_its_start(database):
+    async def run():
+        owner_id = await add_owner()
+        start = await get_changes(None)
+
+        # Written first, committed last: its transaction stays open across a feed read
+        slow = async_session_maker()
+        slow.add(Project(name="slow", owner_id=owner_id))
+        await slow.flush()
+        async with async_session_maker() as session:
+            session.add(Project(name="fast", owner_id=owner_id))
+            await session.commit()
+
+        during = await get_changes(start.cursor)
+        await slow.commit()
+        await slow.close()
+        after = await get_changes(during.cursor)
+        return during, after
+
+    during, after = database(run())
+    # The feed waits for the open transaction instead of moving its cursor past it
+    assert [project.name for project in during.changed] == []
+    assert [project.name for project in after.changed] == ["slow", "fast"]
+
+
+def test_deletes_after_the_cursor_are_reported(database):
+    async def run():
+        owner_id = await add_owner()
+        async with async_session_maker() as session:
+            kept = Project(name="kept", owner_id=owner_id)
+            dropped = Project(name="dropped", owner_id=owner_id)
+            session.add_all([kept, dropped])
+            await session.commit()
+        start = await get_changes(None)
+        async with async_session_maker() as session:
+            await session.execute(delete(Project).where(Project.id == dropped.id))
+            await session.commit()
+        return start, await get_changes(start.cursor), dropped.id
+
+    start, changes, dropped_id = database(run())
+    assert sorted(project.name for project in start.changed) == ["dropped", "kept"]
+    assert start.deleted == []
+    assert changes.changed == []
+    assert changes.deleted == [dropped_id]
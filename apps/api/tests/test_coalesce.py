@@ -0,0 +1,69 @@
+"""Single-flight coalescing tests."""
+import asyncio
+
+import pytest
+
+from app.core.coalesce import SingleFlight
+from app.core.deadlines import DeadlineExceeded
+
+
+def test_waiters_share_the_leaders_result():
+    async def run():
+        flight = SingleFlight()
+        calls = 0
+
+        async def compute():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.05)
+            return calls
+
+        results = await asyncio.gather(*(flight.do("key", compute) for _ in range(5)))
+        return results, calls
+
+    results, calls = asyncio.run(run())
+    assert results == [1] * 5
+    assert calls == 1
+
+
+def test_leaders_timeout_is_not_passed_to_waiters():
+    async def run():
+        flight = SingleFlight()
+        started = asyncio.Event()
+
+        async def short_deadline():
+            started.set()
+            await asyncio.sleep(0.05)
+            raise DeadlineExceeded("Request exceeded its 0.1s budget")
+
+        async def compute():
+            await asyncio.sleep(0.05)
+            return "fresh"
+
+        leader = asyncio.create_task(flight.do("key", short_deadline))
+        await started.wait()
+        waiters = [asyncio.create_task(flight.do("key", compute)) for _ in range(3)]
+        with pytest.raises(DeadlineExceeded):
+            await leader
+        return await asyncio.gather(*waiters)
+
+    assert asyncio.run(run()) == ["fresh"] * 3
+
+
+def test_other_errors_are_shared():
+    async def run():
+        flight = SingleFlight()
+        started = asyncio.Event()
+
+        async def failing():
+            started.set()
+            await asyncio.sleep(0.05)
+            raise ValueError("bad")
+
+        leader = asyncio.create_task(flight.do("key", failing))
+        await started.wait()
+        waiter = asyncio.create_task(flight.do("key", failing))
+        results = await asyncio.gather(leader, waiter, return_exceptions=True)
+        return [type(result) for result in results]
+
+    assert asyncio.run(run()) == [ValueError, ValueError]
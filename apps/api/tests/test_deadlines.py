@@ -0,0 +1,96 @@
+"""Request deadline tests on a bare app with the deadline middleware and error handler."""
+import asyncio
+
+import httpx
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from sqlalchemy.exc import DBAPIError
+
+from app.core.deadlines import DeadlineMiddleware, remaining
+from app.core.middleware import global_exception_handler
+
+
+class CanceledStatement(Exception):
+    """Driver error as raised for a statement stopped by statement_timeout."""
+    sqlstate = "57014"
+
+
+def make_app() -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(DeadlineMiddleware)
+    app.add_exception_handler(Exception, global_exception_handler)
+
+    @app.get("/slow")
+    async def slow():
+        await asyncio.sleep(5)
+
+    @app.get("/canceled")
+    async def canceled():
+        raise DBAPIError("SELECT pg_sleep(60)", None, CanceledStatement())
+
+    @app.get("/stream")
+    async def stream():
+        async def chunks():
+            for _ in range(3):
+                await asyncio.sleep(0.2)
+                yield b"chunk\n"
+
+        return StreamingResponse(chunks(), media_type="text/plain")
+
+    return app
+
+
+def get(path: str, timeout: str | None = None) -> httpx.Response:
+    async def run():
+        transport = httpx.ASGITransport(app=make_app(), raise_app_exceptions=False)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            headers = {"X-Request-Timeout": timeout} if timeout else {}
+            return await client.get(path, headers=headers)
+
+    return asyncio.run(run())
+
+
+def scope(timeout: str | None = None) -> dict:
+    headers = [(b"x-request-timeout", timeout.encode())] if timeout else []
+    return {"type": "http", "method": "GET", "path": "/test", "headers": headers}
+
+
+async def noop_receive():
+    return {"type": "http.request", "body": b""}
+
+
+async def noop_send(message):
+    pass
+
+
+def test_expired_budget_is_answered_with_504():
+    response = get("/slow", timeout="0.1")
+    assert response.status_code == 504
+    assert response.json()["detail"] == "The request took too long to process"
+
+
+def test_statement_timeout_is_answered_with_504():
+    assert get("/canceled").status_code == 504
+
+
+def test_streamed_body_may_outlast_the_budget():
+    response = get("/stream", timeout="0.1")
+    assert response.status_code == 200
+    assert response.text == "chunk\n" * 3
+
+
+def test_nested_request_budget_is_capped_by_the_outer_one():
+    seen = []
+
+    async def handler(scope, receive, send):
+        seen.append(remaining())
+
+    inner = DeadlineMiddleware(handler)
+
+    async def outer_app(scope_, receive, send):
+        # Like a batch sub-request: no header of its own, so the route default would apply
+        await inner(scope(), receive, send)
+
+    asyncio.run(DeadlineMiddleware(outer_app)(scope("0.5"), noop_receive, noop_send))
+    assert 0 < seen[0] <= 0.5
+
@@ -0,0 +1,174 @@
+"""Rate limiter tests, on a fake clock and an in-process fake Redis."""
+import asyncio
+
+import fakeredis
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from app.api import deps
+from app.api.v1.endpoints.auth import LOGIN_ACCOUNT_LIMIT
+from app.core import rate_limit
+from app.core.config import settings
+from app.core.rate_limit import Limit, LocalBuckets, RateLimiter, RateLimitMiddleware, route_cost
+from app.core.redis import set_redis
+from app.main import app
+
+LIMIT = Limit(capacity=10, per_second=2)
+
+
+class Clock:
+    """Stands in for the time module; both clocks move only when told to."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def time(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float) -> None:
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(rate_limit, "time", clock)
+    return clock
+
+
+@pytest.fixture
+def limiter(monkeypatch, clock):
+    """A fresh limiter in place of the shared one."""
+    limiter = RateLimiter()
+    monkeypatch.setattr(rate_limit, "rate_limiter", limiter)
+    monkeypatch.setattr(deps, "rate_limiter", limiter)
+    return limiter
+
+
+@pytest.fixture
+def redis(monkeypatch):
+    """Redis-backed buckets on a fake server, reset afterwards."""
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(settings, "RATE_LIMIT_REDIS_ENABLED", True)
+    set_redis(fakeredis.aioredis.FakeRedis(server=server, decode_responses=True))
+    yield server
+    set_redis(None)
+
+
+def test_bucket_refills_at_its_rate(clock):
+    buckets = LocalBuckets(max_keys=10)
+    assert buckets.take("ip:a", 10, LIMIT) == 0
+    assert buckets.take("ip:a", 4, LIMIT) == 2.0
+    clock.advance(1)
+    assert buckets.take("ip:a", 4, LIMIT) == 1.0
+    clock.advance(1)
+    assert buckets.take("ip:a", 4, LIMIT) == 0
+    # Never refills past its capacity
+    clock.advance(3600)
+    assert buckets.take("ip:a", 10, LIMIT) == 0
+    assert buckets.take("ip:a", 1, LIMIT) == 0.5
+
+
+def test_retry_after_rounds_up_to_whole_seconds():
+    assert rate_limit.retry_after(0.01) == "1"
+    assert rate_limit.retry_after(2.0) == "2"
+    assert rate_limit.retry_after(2.1) == "3"
+
+
+def test_local_buckets_are_capped_dropping_the_least_recently_used(monkeypatch, clock):
+    monkeypatch.setattr(settings, "RATE_LIMIT_LOCAL_MAX_KEYS", 2)
+    buckets = RateLimiter().local
+    buckets.take("ip:a", 10, LIMIT)
+    buckets.take("ip:b", 10, LIMIT)
+    buckets.take("ip:a", 0.5, LIMIT)
+    buckets.take("ip:c", 10, LIMIT)
+    assert len(buckets) == 2
+    # a was kept, still drained; b was evicted and starts full again
+    assert buckets.take("ip:a", 1, LIMIT) > 0
+    assert buckets.take("ip:b", 10, LIMIT) == 0
+
+
+def test_route_costs():
+    assert route_cost("POST", "/api/v1/auth/login") == 30
+    assert route_cost("GET", "/health") == 0
+    assert route_cost("GET", "/api/v1/projects") == settings.RATE_LIMIT_READ_COST
+    assert route_cost("DELETE", "/api/v1/projects/1") == settings.RATE_LIMIT_WRITE_COST
+
+
+def test_free_requests_do_not_touch_the_bucket(limiter):
+    asyncio.run(limiter.take("ip:a", 10, LIMIT))
+    assert asyncio.run(limiter.take("ip:a", 0, LIMIT)) == 0
+    assert asyncio.run(limiter.take("ip:a", 1, LIMIT)) > 0
+
+
+def test_redis_buckets_are_shared_between_workers(redis, clock):
+    async def run():
+        first, second = RateLimiter(), RateLimiter()
+        drained = await first.take("ip:a", 10, LIMIT)
+        short = await second.take("ip:a", 4, LIMIT)
+        clock.advance(2)
+        refilled = await second.take("ip:a", 4, LIMIT)
+        return drained, short, refilled, len(first.local) + len(second.local)
+
+    assert asyncio.run(run()) == (0, 2.0, 0, 0)
+
+
+def test_falls_back_to_local_buckets_while_redis_is_down(redis, clock):
+    async def run():
+        limiter = RateLimiter()
+        redis.connected = False
+        drained = await limiter.take("ip:a", 10, LIMIT)
+        short = await limiter.take("ip:a", 4, LIMIT)
+
+        # Redis is retried only after CACHE_REDIS_RETRY_SECONDS, with its own bucket
+        redis.connected = True
+        clock.advance(1)
+        still_local = await limiter.take("ip:a", 4, LIMIT)
+        clock.advance(settings.CACHE_REDIS_RETRY_SECONDS)
+        back_on_redis = await limiter.take("ip:a", 10, LIMIT)
+        return drained, short, still_local, back_on_redis
+
+    assert asyncio.run(run()) == (0, 2.0, 1.0, 0)
+
+
+def test_middleware_rejects_with_retry_after(monkeypatch, limiter):
+    monkeypatch.setattr(settings, "RATE_LIMIT_IP_BURST", 3)
+    monkeypatch.setattr(settings, "RATE_LIMIT_IP_PER_SECOND", 0.5)
+    bare = FastAPI()
+    bare.add_middleware(RateLimitMiddleware)
+
+    @bare.post("/write")
+    async def write():
+        return {}
+
+    async def run():
+        transport = httpx.ASGITransport(app=bare)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return [await client.post("/write") for _ in range(2)]
+
+    allowed, rejected = asyncio.run(run())
+    assert allowed.status_code == 200
+    assert rejected.status_code == 429
+    # Short of the 3 units a write costs; refilled at 0.5 per second
+    assert rejected.headers["Retry-After"] == "6"
+
+
+def test_login_is_throttled_per_account(limiter):
+    async def run():
+        # As after a burst of attempts from many IPs; the throttle answers before any DB work
+        burst = LOGIN_ACCOUNT_LIMIT.capacity
+        await limiter.take("login:ada@example.com", burst, LOGIN_ACCOUNT_LIMIT)
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.post(
+                "/api/v1/auth/login", json={"email": "Ada@Example.com", "password": "secret123"}
+            )
+
+    response = asyncio.run(run())
+    assert response.status_code == 429
+    assert response.json()["detail"] == "Too many login attempts, try again later"
+    assert response.headers["Retry-After"] == str(round(1 / LOGIN_ACCOUNT_LIMIT.per_second))
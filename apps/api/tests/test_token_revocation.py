@@ -0,0 +1,136 @@
+"""Token revocation tests: claim versions, deleted users and logged out token IDs."""
+import asyncio
+
+import httpx
+
+from app.core.bloom import BloomFilter
+from app.core.database import async_session_maker
+from app.core.security import create_access_token, create_refresh_token, decode_token
+from app.main import app
+from app.models.user import User, UserRole
+from app.schemas.user import UserUpdate
+from app.services import token_revocations as revocations_module
+from app.services.token_revocations import TokenRevocationList, token_revocations
+from app.services.token_versions import TokenVersionRegistry
+from app.services.user_deletion import UserDeletionWorker
+from app.services.user_service import UserService
+
+
+async def add_user(email: str) -> int:
+    async with async_session_maker() as session:
+        user = User(email=email, hashed_password="x", full_name=email, role=UserRole.manager)
+        session.add(user)
+        await session.commit()
+        return user.id
+
+
+def bearer(token: str) -> dict[str, str]:
+    return {"Authorization": f"Bearer {token}"}
+
+
+def client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+
+
+async def other_worker_versions() -> TokenVersionRegistry:
+    """A registry loaded from the database alone, as on a worker that made no change."""
+    registry = TokenVersionRegistry()
+    await registry.refresh()
+    return registry
+
+
+def test_bloom_filter_never_misses_an_added_item():
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    for n in range(1000):
+        bloom.add(f"jti-{n}")
+    assert all(f"jti-{n}" in bloom for n in range(1000))
+    false_positives = sum(f"other-{n}" in bloom for n in range(10_000))
+    assert false_positives < 300
+
+
+def test_version_bump_rejects_tokens_issued_before_it(database):
+    async def run():
+        user_id = await add_user("promoted@example.com")
+        old_token = create_access_token(user_id, UserRole.manager.value, 0)
+        async with client() as c:
+            before = await c.get("/api/v1/auth/me", headers=bearer(old_token))
+            async with async_session_maker() as session:
+                user = await session.get(User, user_id)
+                await UserService(session).update(user, UserUpdate(role=UserRole.admin))
+                await session.commit()
+            after = await c.get("/api/v1/auth/me", headers=bearer(old_token))
+            new_token = create_access_token(user_id, UserRole.admin.value, 1)
+            current = await c.get("/api/v1/auth/me", headers=bearer(new_token))
+        registry = await other_worker_versions()
+        return before, after, current, registry.is_current(user_id, 0)
+
+    before, after, current, elsewhere = database(run())
+    assert before.status_code == 200
+    assert after.status_code == 401
+    assert current.json()["role"] == "admin"
+    assert not elsewhere
+
+
+def test_deleted_user_is_rejected(database):
+    async def run():
+        user_id = await add_user("deleted@example.com")
+        async with async_session_maker() as session:
+            user = await session.get(User, user_id)
+            await UserService(session).request_deletion(user, user_id)
+            await session.commit()
+        await UserDeletionWorker().run_pending()
+        # Even a token carrying the latest version; nothing is left to bump on the user row
+        refresh = create_refresh_token(user_id, UserRole.manager.value, 1)
+        async with client() as c:
+            response = await c.post("/api/v1/auth/refresh", json={"refresh_token": refresh})
+        registry = await other_worker_versions()
+        return response, registry.is_current(user_id, 1)
+
+    response, elsewhere = database(run())
+    assert response.status_code == 401
+    assert response.json()["detail"] == "User not found or inactive"
+    # Other workers learn of it from the users tombstone
+    assert not elsewhere
+
+
+def test_logged_out_refresh_token_is_rejected(database):
+    async def run():
+        user_id = await add_user("leaving@example.com")
+        access = create_access_token(user_id, UserRole.manager.value, 0)
+        refresh = create_refresh_token(user_id, UserRole.manager.value, 0)
+        async with client() as c:
+            logout = await c.post(
+                "/api/v1/auth/logout", json={"refresh_token": refresh}, headers=bearer(access)
+            )
+            response = await c.post("/api/v1/auth/refresh", json={"refresh_token": refresh})
+        revocations = TokenRevocationList()
+        await revocations.refresh()
+        return logout, response, await revocations.is_revoked(decode_token(refresh)["jti"])
+
+    logout, response, elsewhere = database(run())
+    assert logout.status_code == 200
+    assert response.status_code == 401
+    assert response.json()["detail"] == "Invalid refresh token"
+    assert elsewhere
+
+
+def test_failed_lookup_after_a_filter_hit_rejects_the_token(monkeypatch):
+    def unavailable():
+        raise ConnectionRefusedError("database unavailable")
+
+    monkeypatch.setattr(revocations_module, "async_session_maker", unavailable)
+    hit = create_refresh_token(1, UserRole.manager.value, 0)
+    miss = create_refresh_token(1, UserRole.manager.value, 0)
+    monkeypatch.setattr(token_revocations, "_filter", BloomFilter(100, 0.01))
+    token_revocations._filter.add(decode_token(hit)["jti"])
+
+    async def run():
+        async with client() as c:
+            rejected = await c.post("/api/v1/auth/refresh", json={"refresh_token": hit})
+            # Filter misses never reach the database
+            accepted = await c.post("/api/v1/auth/refresh", json={"refresh_token": miss})
+            return rejected, accepted
+
+    rejected, accepted = asyncio.run(run())
+    assert rejected.status_code == 401
+    assert accepted.status_code == 200
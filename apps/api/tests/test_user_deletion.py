@@ -0,0 +1,200 @@
+"""Background user deletion tests against Postgres (see conftest)."""
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import httpx
+import pytest
+from sqlalchemy import func, select, update
+
+from app.core.config import settings
+from app.core.database import async_session_maker
+from app.core.security import create_access_token
+from app.main import app
+from app.models.project import Project
+from app.models.user import User, UserRole
+from app.models.user_deletion import UserDeletion, UserDeletionStatus
+from app.services.user_deletion import UserDeletionWorker, _retry_due
+from app.services.user_service import UserService
+
+
+@pytest.fixture(autouse=True)
+def small_batches(monkeypatch):
+    monkeypatch.setattr(settings, "USER_DELETION_BATCH_SIZE", 2)
+    monkeypatch.setattr(settings, "USER_DELETION_BATCH_PAUSE_SECONDS", 0)
+
+
+async def add_user(email: str, projects: int = 0, role: UserRole = UserRole.manager) -> int:
+    async with async_session_maker() as session:
+        user = User(email=email, hashed_password="x", full_name=email, role=role)
+        session.add(user)
+        await session.flush()
+        session.add_all(Project(name=f"{email} {n}", owner_id=user.id) for n in range(projects))
+        await session.commit()
+        return user.id
+
+
+async def request_deletion(user_id: int, reassign_to_id: int | None = None) -> int | None:
+    async with async_session_maker() as session:
+        user = await session.get(User, user_id)
+        deletion = await UserService(session).request_deletion(user, user_id, reassign_to_id)
+        await session.commit()
+        return deletion.id if deletion else None
+
+
+async def get_job(job_id: int) -> UserDeletion:
+    async with async_session_maker() as session:
+        return await session.get(UserDeletion, job_id)
+
+
+async def count_projects(owner_id: int) -> int:
+    async with async_session_maker() as session:
+        return await session.scalar(select(func.count(Project.id)).where(Project.owner_id == owner_id))
+
+
+def test_interrupted_job_resumes_where_it_stopped(database):
+    async def run():
+        user_id = await add_user("gone@example.com", projects=5)
+        target_id = await add_user("heir@example.com")
+        job_id = await request_deletion(user_id, reassign_to_id=target_id)
+
+        # A worker that stops after its first batch, as on a restart
+        interrupted = UserDeletionWorker()
+        batches = 0
+        step = interrupted._step
+
+        async def step_once(*args):
+            nonlocal batches
+            batches += 1
+            if batches > 1:
+                raise asyncio.CancelledError
+            return await step(*args)
+
+        interrupted._step = step_once
+        with pytest.raises(asyncio.CancelledError):
+            await interrupted.run_pending()
+        halfway = await get_job(job_id)
+
+        assert await UserDeletionWorker().run_pending() == 1
+        return halfway, await get_job(job_id), await count_projects(target_id), user_id
+
+    halfway, job, reassigned, user_id = database(run())
+    assert halfway.status == UserDeletionStatus.running
+    assert halfway.projects_done == 2
+    assert job.status == UserDeletionStatus.completed
+    assert (job.projects_total, job.projects_done) == (5, 5)
+    assert reassigned == 5
+
+
+def test_failing_job_backs_off_then_fails_without_blocking_others(database, monkeypatch):
+    monkeypatch.setattr(settings, "USER_DELETION_MAX_ATTEMPTS", 2)
+
+    async def run():
+        stuck_id = await request_deletion(await add_user("stuck@example.com", projects=1))
+        other_id = await request_deletion(await add_user("other@example.com", projects=1))
+        worker = UserDeletionWorker()
+        step = worker._step
+
+        async def flaky_step(job_id, *args):
+            if job_id == stuck_id:
+                raise TimeoutError("canceling statement due to statement timeout")
+            return await step(job_id, *args)
+
+        worker._step = flaky_step
+        await worker.run_pending()
+        first = await get_job(stuck_id), await get_job(other_id)
+
+        # Still waiting out its backoff, so not run again
+        await worker.run_pending()
+        waiting = await get_job(stuck_id)
+
+        async with async_session_maker() as session:
+            await session.execute(
+                update(UserDeletion)
+                .where(UserDeletion.id == stuck_id)
+                .values(updated_at=func.now() - timedelta(seconds=settings.USER_DELETION_POLL_SECONDS))
+            )
+            await session.commit()
+        await worker.run_pending()
+        return first, waiting, await get_job(stuck_id)
+
+    (stuck, other), waiting, failed = database(run())
+    assert (stuck.status, stuck.attempts) == (UserDeletionStatus.running, 1)
+    assert "statement timeout" in stuck.error
+    assert other.status == UserDeletionStatus.completed
+    assert waiting.attempts == 1
+    assert (failed.status, failed.attempts) == (UserDeletionStatus.failed, 2)
+
+
+def test_retry_waits_double_from_the_poll_interval():
+    now = datetime.now(timezone.utc)
+    poll = timedelta(seconds=settings.USER_DELETION_POLL_SECONDS)
+    assert _retry_due(0, now, now)
+    assert not _retry_due(1, now, now + poll / 2)
+    assert _retry_due(1, now, now + poll)
+    assert not _retry_due(3, now, now + poll * 3)
+    assert _retry_due(3, now, now + poll * 4)
+
+
+def test_rows_referencing_the_user_before_the_delete_send_the_job_back(database):
+    async def run():
+        user_id = await add_user("late@example.com", projects=1)
+        target_id = await add_user("keeper@example.com")
+        job_id = await request_deletion(user_id, reassign_to_id=target_id)
+        worker = UserDeletionWorker()
+        finish = worker._finish
+        finished = []
+
+        async def finish_after_late_insert(job_id, user_id):
+            if not finished:
+                # Created between the last batch and the delete, e.g. by an admin
+                async with async_session_maker() as session:
+                    session.add(Project(name="late", owner_id=user_id))
+                    await session.commit()
+            finished.append(await finish(job_id, user_id))
+            return finished[-1]
+
+        worker._finish = finish_after_late_insert
+        await worker.run_pending()
+        return finished, await get_job(job_id), await count_projects(target_id)
+
+    finished, job, reassigned = database(run())
+    assert finished == [False, True]
+    assert job.status == UserDeletionStatus.completed
+    # Reassigned like the others rather than cascaded away with the user
+    assert reassigned == 2
+
+
+def test_concurrent_deletion_requests_queue_one_job(database):
+    async def run():
+        user_id = await add_user("twice@example.com")
+        first = async_session_maker()
+        user = await first.get(User, user_id)
+        assert await UserService(first).request_deletion(user, user_id) is not None
+
+        # Blocks on the unique index until the first request's transaction ends
+        second = asyncio.create_task(request_deletion(user_id))
+        await asyncio.sleep(0.2)
+        await first.commit()
+        await first.close()
+        return await second
+
+    assert database(run()) is None
+
+
+def test_projects_cannot_be_given_to_a_user_being_deleted(database):
+    async def run():
+        admin_id = await add_user("admin@example.com", role=UserRole.admin)
+        user_id = await add_user("leaving@example.com")
+        await request_deletion(user_id)
+        token = create_access_token(admin_id, UserRole.admin.value, 0)
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.post(
+                "/api/v1/projects",
+                json={"name": "Orphan", "owner_id": user_id},
+                headers={"Authorization": f"Bearer {token}"},
+            )
+
+    response = database(run())
+    assert response.status_code == 409
+    assert response.json()["detail"] == "Owner is being deleted"
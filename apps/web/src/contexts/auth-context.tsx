@@ -58,7 +58,8 @@ export function AuthProvider({ children }: { children: React.ReactNode }) {
 
   const logout = async () => {
     try {
-      await api.post('/auth/logout')
+      const refreshToken = localStorage.getItem('refresh_token')
+      await api.post('/auth/logout', refreshToken ? { refresh_token: refreshToken } : undefined)
     } catch {
       // Ignore errors on logout
     } finally {